@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+海报缩放性能对比脚本
+
+对比两种处理方式在一批样例海报上的吞吐量：
+1. 旧方式：每个目标尺寸单独解码一次原图，整图 LANCZOS 缩放后再中心裁剪
+2. 新方式：原图只解码一次（大幅缩小时使用 JPEG draft），一次性生成所有预设尺寸
+
+使用方法：
+    python benchmark_resize.py 海报样例目录
+    python benchmark_resize.py 海报样例目录 --presets 基础尺寸 河南尺寸 --rounds 3
+    python benchmark_resize.py            # 不指定目录时生成临时样例图片
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+from io import BytesIO
+
+from PIL import Image
+
+from poster_engine import SIZE_PRESETS, RESAMPLE_LANCZOS, render_poster_variants
+
+IMAGE_EXTS = ('.jpg', '.jpeg', '.png', '.webp')
+
+
+def legacy_resize_and_crop(img, target_width, target_height):
+    """旧的 smart_resize_and_crop：整图等比例缩放后中心裁剪"""
+    original_width, original_height = img.size
+    scale_ratio = max(target_width / original_width, target_height / original_height)
+    new_width = int(original_width * scale_ratio)
+    new_height = int(original_height * scale_ratio)
+    scaled_img = img.resize((new_width, new_height), RESAMPLE_LANCZOS)
+    left = (new_width - target_width) // 2
+    top = (new_height - target_height) // 2
+    return scaled_img.crop((left, top, left + target_width, top + target_height))
+
+
+def encode_jpeg(img):
+    buffer = BytesIO()
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    img.save(buffer, format='JPEG', quality=95)
+    return buffer.getvalue()
+
+
+def run_legacy(sources, targets):
+    """每个尺寸都重新解码一次原图"""
+    for raw_bytes in sources:
+        for w, h in targets:
+            img = Image.open(BytesIO(raw_bytes))
+            encode_jpeg(legacy_resize_and_crop(img, w, h))
+
+
+def run_engine(sources, targets):
+    """原图解码一次，生成全部尺寸"""
+    for raw_bytes in sources:
+        for img in render_poster_variants(raw_bytes, targets):
+            encode_jpeg(img)
+
+
+def load_sources(folder):
+    sources = []
+    for name in sorted(os.listdir(folder)):
+        if name.lower().endswith(IMAGE_EXTS):
+            with open(os.path.join(folder, name), 'rb') as f:
+                sources.append(f.read())
+    return sources
+
+
+def make_samples(count=12):
+    """生成模拟的大尺寸海报（竖版、横版各半）"""
+    folder = tempfile.mkdtemp(prefix="poster_samples_")
+    for i in range(count):
+        size = (2000, 3000) if i % 2 == 0 else (3840, 2160)
+        img = Image.effect_mandelbrot(size, (-2.0, -1.5, 1.0, 1.5), 60 + i).convert('RGB')
+        img.save(os.path.join(folder, f"sample_{i:02d}.jpg"), quality=92)
+    return folder
+
+
+def main():
+    parser = argparse.ArgumentParser(description="海报缩放性能对比")
+    parser.add_argument("folder", nargs="?", help="样例海报目录（不填则生成临时样例）")
+    parser.add_argument("--presets", nargs="*", help="参与对比的尺寸预设，默认全部固定尺寸预设")
+    parser.add_argument("--rounds", type=int, default=1, help="重复轮数")
+    args = parser.parse_args()
+
+    folder = args.folder or make_samples()
+    sources = load_sources(folder)
+    if not sources:
+        print(f"目录中没有图片: {folder}")
+        return 1
+
+    preset_names = args.presets or [
+        name for name, sizes in SIZE_PRESETS.items() if sizes["vertical"][0] > 0
+    ]
+    targets = []
+    for name in preset_names:
+        if name not in SIZE_PRESETS:
+            print(f"未知预设: {name}")
+            return 1
+        targets.append(SIZE_PRESETS[name]["vertical"])
+        targets.append(SIZE_PRESETS[name]["horizontal"])
+
+    print(f"样例目录: {folder}")
+    print(f"样例数量: {len(sources)}，预设: {', '.join(preset_names)}（共 {len(targets)} 个输出尺寸）")
+
+    timings = {}
+    for label, func in (("旧方式(逐尺寸解码)", run_legacy), ("新方式(单次解码多尺寸)", run_engine)):
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            func(sources, targets)
+        elapsed = time.perf_counter() - start
+        outputs = len(sources) * len(targets) * args.rounds
+        timings[label] = elapsed
+        print(f"{label}: {elapsed:.2f} 秒，{outputs / elapsed:.1f} 张/秒")
+
+    legacy, engine = timings.values()
+    print(f"加速比: {legacy / engine:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+优酷搜索页解析性能对比脚本
+
+对比两种从优酷搜索页中提取影视节点的方式：
+1. 旧方式：正则截取整段 __INITIAL_DATA__，整段替换 JS 写法后 json.loads，再递归遍历节点树
+2. 新方式：extract_initial_data 从对象起点原地解析，iter_youku_video_nodes 显式栈遍历，取够即停
+
+使用方法：
+    python benchmark_youku.py 优酷页面目录          # 目录中保存的搜索页 .html
+    python benchmark_youku.py 页面1.html 页面2.html --rounds 20 --limit 50
+    python benchmark_youku.py                      # 不指定页面时生成模拟页面
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import itertools
+
+from poster_engine import extract_initial_data, iter_youku_video_nodes
+
+
+def legacy_extract(html):
+    """旧的 fetch_youku_items 解析：正则截取 + 整段替换 + json.loads"""
+    match = re.search(r'window\.__INITIAL_DATA__\s*=\s*({.*?})\s*;', html, re.DOTALL)
+    if not match:
+        raise ValueError("找不到 __INITIAL_DATA__")
+    text = re.sub(r'new\s+Date\s*\(\s*"(.*?)"\s*\)', r'"\1"', match.group(1))
+    return json.loads(text.replace('undefined', 'null'))
+
+
+def legacy_find_nodes(node_list, found_count, limit):
+    """旧的 find_youku_video_nodes 遍历方式：逐层递归并拼接中间列表（只取节点 data，不生成条目）"""
+    found = []
+    if not isinstance(node_list, list) or found_count[0] >= limit:
+        return found
+    for node in node_list:
+        if not isinstance(node, dict):
+            continue
+        if found_count[0] >= limit:
+            break
+        node_data = node.get('data', {})
+        if isinstance(node_data, dict) and 'titleDTO' in node_data and 'posterDTO' in node_data and \
+                ('thumbUrl' in node_data or node_data.get('posterDTO', {}).get('vThumbUrl')):
+            found.append(node_data)
+            found_count[0] += 1
+            if found_count[0] >= limit:
+                return found
+        for children in (node.get('nodes', []), node_data.get('nodes', []) if isinstance(node_data, dict) else []):
+            if children:
+                found.extend(legacy_find_nodes(children, found_count, limit))
+                if found_count[0] >= limit:
+                    return found
+    return found
+
+
+def run_legacy(pages, limit):
+    results = []
+    for html in pages:
+        data = legacy_extract(html)
+        results.append(legacy_find_nodes(data.get('data', {}).get('nodes', []), [0], limit))
+    return results
+
+
+def run_engine(pages, limit):
+    results = []
+    for html in pages:
+        data = extract_initial_data(html)
+        nodes = data.get('data', {}).get('nodes', [])
+        results.append(list(itertools.islice(iter_youku_video_nodes(nodes), limit)))
+    return results
+
+
+def make_page(index, sections=40, cards=30):
+    """生成模拟的优酷搜索页：多层嵌套的区块节点，每个区块若干影视卡片和大量无关字段"""
+    def card(i):
+        return {
+            "type": 10009,
+            "data": {
+                "titleDTO": {"displayName": f"模拟影片{index}-{i}", "subTitle": "简介" * 20},
+                "posterDTO": {"vThumbUrl": f"//m.ykimg.com/v{index}_{i}.jpg",
+                              "iconCorner": {"tagType": 3, "tagText": "VIP"}},
+                "thumbUrl": f"//m.ykimg.com/h{index}_{i}.jpg",
+                "showMediaTag": [{"tagType": 1, "tagText": "高清"}],
+                "action": {"report": {"trackInfo": {f"k{j}": "x" * 16 for j in range(20)}}},
+            },
+        }
+    sections_data = [
+        {"type": 1, "data": {"title": f"区块{s}", "nodes": [
+            {"type": 2, "nodes": [card(s * cards + c) for c in range(cards)]},
+        ]}}
+        for s in range(sections)
+    ]
+    data = {"data": {"nodes": sections_data}}
+    if index % 2:
+        # 一半页面带 new Date(...) 和 undefined 等 JS 写法
+        data["extra"] = {"ts": "__DATE__", "flag": "__UNDEF__"}
+    body = json.dumps(data, ensure_ascii=False)
+    body = body.replace('"__DATE__"', 'new Date("2025-01-01")').replace('"__UNDEF__"', 'undefined')
+    return ("<html><head><script>var a = {x: 1};</script></head><body>"
+            + "<div class=\"card\">占位</div>" * 500
+            + f"<script>window.__INITIAL_DATA__ = {body};</script></body></html>")
+
+
+def load_pages(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, name) for name in sorted(os.listdir(path))
+                         if name.lower().endswith(('.html', '.htm')))
+        else:
+            files.append(path)
+    pages = []
+    for file_path in files:
+        with open(file_path, encoding='utf-8', errors='replace') as f:
+            pages.append(f.read())
+    return pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="优酷搜索页解析性能对比")
+    parser.add_argument("pages", nargs="*", help="保存的优酷搜索页（.html 文件或目录），不填则生成模拟页面")
+    parser.add_argument("--rounds", type=int, default=10, help="重复轮数")
+    parser.add_argument("--limit", type=int, default=50, help="每页最多提取的影视节点数（与 fetch_youku_items 一致）")
+    args = parser.parse_args()
+
+    pages = load_pages(args.pages) if args.pages else [make_page(i) for i in range(5)]
+    if not pages:
+        print("没有找到页面文件")
+        return 1
+    total_mb = sum(len(page.encode('utf-8')) for page in pages) / 1024 / 1024
+    print(f"页面数量: {len(pages)}，共 {total_mb:.1f} MB，每页最多提取 {args.limit} 个节点")
+
+    timings = {}
+    outputs = {}
+    for label, func in (("旧方式(正则+递归)", run_legacy), ("新方式(原地解析+迭代)", run_engine)):
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            outputs[label] = func(pages, args.limit)
+        elapsed = time.perf_counter() - start
+        timings[label] = elapsed
+        print(f"{label}: {elapsed:.2f} 秒，{len(pages) * args.rounds / elapsed:.1f} 页/秒")
+
+    legacy, engine = outputs.values()
+    print(f"提取结果{'一致' if legacy == engine else '不一致'}（共 {sum(map(len, engine))} 个节点）")
+    legacy_time, engine_time = timings.values()
+    print(f"加速比: {legacy_time / engine_time:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -27,28 +27,35 @@
 """
 
 import os
-import re
 import json
 import requests
-import urllib.parse
-import difflib
-from bs4 import BeautifulSoup
 import customtkinter as ctk
-from tkinter import filedialog, messagebox, ttk
+from tkinter import filedialog, messagebox, ttk, TclError
 from PIL import Image, ImageTk, ImageFilter
 from io import BytesIO
-import traceback
 import threading
 import pandas as pd
 import time
-import random
+import math
+import queue
+from concurrent.futures import ThreadPoolExecutor
+import multiprocessing
 from datetime import datetime
 
+from poster_engine import (
+    PosterEngine, BatchJournal, find_cid_column, find_movie_name_column,
+    list_excel_sheets, read_excel_sheet, write_excel_results,
+)
+
 
 TARGET_PREVIEW_V_HEIGHT = 80 # Target height for Vertical/Original previews
 TARGET_PREVIEW_H_WIDTH = 120 # Target width for Horizontal previews
+BATCH_TABLE_PAGE_SIZE = 200  # 批量表格每页显示的行数，只有当前页的行插入Treeview
+BATCH_TABLE_FLUSH_MS = 100  # 批量表格行更新的合并间隔（毫秒）
+BATCH_RESULT_COLUMNS = ("获取图片标题", "处理状态", "标题不一致")  # 批量爬取写回Excel的结果列
+
 
-class MultiPlatformImageDownloader(ctk.CTk):
+class MultiPlatformImageDownloader(ctk.CTk, PosterEngine):
     def __init__(self):
         super().__init__()
 
@@ -57,10 +64,12 @@ class MultiPlatformImageDownloader(ctk.CTk):
         ctk.set_default_color_theme("blue")  # 设置蓝色主题
         
         self.config_file = "config.json"
+        self.settings_overrides = {}
+        self.settings_cache = None
         settings = self.load_settings() # Load settings early
 
-        # Store filename format
-        self.filename_format = settings.get("filename_format", "{标题}_{类型}_{图片尺寸}")
+        # 搜索/下载核心：网络会话、缓存、限速器、请求头、文件名格式
+        self.init_engine(settings)
         
         # 设置窗口
         self.title("视频海报下载器")
@@ -155,17 +164,6 @@ class MultiPlatformImageDownloader(ctk.CTk):
         # 初始化图片类型选择变量
         self.orientation_var = ctk.StringVar(value=settings.get("default_download_type", "全部"))
         
-        # 尺寸预设选择
-        self.size_presets = {
-            "原尺寸": {"vertical": (-1, -1), "horizontal": (-1, -1)}, # -1,-1 signifies original size
-            "基础尺寸": {"vertical": (412, 600), "horizontal": (528, 296)}, # Renamed
-            "河南尺寸": {"vertical": (525, 750), "horizontal": (257, 145)},
-            "甘肃尺寸": {"vertical": (375, 562), "horizontal": (562, 375)},
-            "陕西尺寸": {"vertical": (245, 350), "horizontal": (384, 216)},
-            "云南尺寸": {"vertical": (262, 360), "horizontal": (412, 230)}, # Added Yunnan
-            "自定义尺寸": {"vertical": (0, 0), "horizontal": (0, 0)} # 0,0 signifies custom input needed
-        }
-        
         # 存储结果
         self.results = []
         self.result_checkboxes = []
@@ -178,7 +176,27 @@ class MultiPlatformImageDownloader(ctk.CTk):
         self.is_batch_processing = False
         self.batch_paused = False
         self.current_batch_row = 0
+        self.batch_completed_rows = set()  # 检查点之后已乱序完成的行
+        self.batch_journal = None  # 当前Sheet的进度日志
+        self.batch_save_lock = threading.Lock()  # 串行化Excel保存
+        self.preview_executor = None  # 预览图线程池，首次使用时创建
+        self.preview_futures = []
+        self.preview_generation = 0  # 每次新搜索递增，用来丢弃旧的预览结果
+        self.preview_result_q = queue.Queue()
+        self.preview_flush_lock = threading.Lock()
+        self.preview_flush_scheduled = False
         self.batch_df = None
+        self.batch_excel_rows = []  # batch_df 每行对应的Excel行号
+        self.batch_save_text = ""  # 最近一次保存Excel的耗时
+        self.batch_options = None  # 本次批量的设置快照（开始时生成）
+        self.batch_stats_path = None  # 本次批量统计报告路径（不含扩展名）
+        self.batch_sheet_name = None  # 本次批量写回的Sheet（开始时记录，后台线程不读取界面控件）
+        self.batch_table_page = 0  # 批量表格当前页
+        self.batch_table_follow = True  # 处理时自动翻到正在更新的行所在页
+        self.batch_tree_items = {}  # 当前页 行号 -> Treeview项
+        self.batch_dirty_rows = set()  # 等待刷新到表格的行号
+        self.batch_table_flush_lock = threading.Lock()
+        self.batch_table_flush_scheduled = False
         self.excel_file_path = ""
         self.current_table_mode = "batch"
         
@@ -192,30 +210,6 @@ class MultiPlatformImageDownloader(ctk.CTk):
         self.selected_priority_index = -1
         self.priority_frames = []
         
-        # 设置爱奇艺请求头 (Load cookie from settings)
-        self.iqiyi_headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-            "Referer": "https://www.iqiyi.com/",
-            "Accept": "application/json, text/plain, */*",
-            "Cookie": settings.get("iqiyi_cookie", "") # Load from settings
-        }
-
-        # 腾讯视频请求头 (Load cookie from settings)
-        self.tencent_headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/117.0.0.0 Safari/537.36",
-            "Content-Type": "application/json",
-            "Referer": "https://v.qq.com/",
-            "Origin": "https://v.qq.com",
-            "Cookie": settings.get("tencent_cookie", "") # Load from settings
-        }
-
-        # 优酷视频请求头 (Load cookie from settings)
-        self.youku_headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Safari/537.36 Edg/135.0.0.0",
-            "Referer": "https://www.youku.com/",
-            "Cookie": settings.get("youku_cookie", "") # Load from settings
-        }
-
         # 初始化VIP检测相关变量
         self.vip_batch_var = ctk.BooleanVar(value=False)
         
@@ -547,6 +541,7 @@ class MultiPlatformImageDownloader(ctk.CTk):
         self.vip_excel_file_path = None
         self.vip_excel_sheet_name = None
         self.vip_df = None  # VIP检测数据DataFrame
+        self.vip_tree_items = []  # VIP检测表格项（按影片序号）
         
         # 默认显示单独搜索模式
         self.on_vip_mode_change()
@@ -633,6 +628,20 @@ class MultiPlatformImageDownloader(ctk.CTk):
         )
         self.table_title_label.pack(side="left")
         
+        # 分页控件：大表只渲染当前页，避免一次插入上万行
+        self.batch_next_page_button = ctk.CTkButton(
+            self.table_title_frame, text="下一页 ▶", width=70,
+            command=lambda: self.change_batch_table_page(1)
+        )
+        self.batch_next_page_button.pack(side="right")
+        self.batch_page_label = ctk.CTkLabel(self.table_title_frame, text="")
+        self.batch_page_label.pack(side="right", padx=8)
+        self.batch_prev_page_button = ctk.CTkButton(
+            self.table_title_frame, text="◀ 上一页", width=70,
+            command=lambda: self.change_batch_table_page(-1)
+        )
+        self.batch_prev_page_button.pack(side="right")
+        
         # 使用ttk.Treeview创建表格
         style = ttk.Style()
         style.theme_use("clam")  # 使用较现代的主题
@@ -751,7 +760,12 @@ class MultiPlatformImageDownloader(ctk.CTk):
         self.batch_progress_bar.set(0)
         
         self.batch_progress_label = ctk.CTkLabel(self.control_frame, text="就绪")
-        self.batch_progress_label.pack(pady=(0, 10))
+        self.batch_progress_label.pack(pady=(0, 5))
+
+        # 分阶段耗时统计（批量运行时实时刷新）
+        self.batch_stats_label = ctk.CTkLabel(self.control_frame, text="", justify="left",
+                                              text_color="#555555", font=ctk.CTkFont(size=11))
+        self.batch_stats_label.pack(pady=(0, 10))
         
         # 操作按钮（居中显示）
         button_frame = ctk.CTkFrame(self.control_frame, fg_color="transparent")
@@ -901,8 +915,8 @@ class MultiPlatformImageDownloader(ctk.CTk):
         self.delete_button_frame.grid(row=3, column=0, padx=10, pady=10, sticky="ew")
         
         # 状态标签
-#        self.delete_status_label = ctk.CTkLabel(self.delete_button_frame, text="请选择Excel文件查看错误海报")
-#        self.delete_status_label.pack(side="left", padx=10, pady=10)
+        self.delete_status_label = ctk.CTkLabel(self.delete_button_frame, text="请选择Excel文件查看错误海报")
+        self.delete_status_label.pack(side="left", padx=10, pady=10)
         
         # 操作按钮（居中显示）
         button_frame = ctk.CTkFrame(self.delete_button_frame, fg_color="transparent")
@@ -1056,7 +1070,6 @@ class MultiPlatformImageDownloader(ctk.CTk):
         pass
     
 
-
     def toggle_select_all(self, button):
         """切换全选/取消全选状态"""
         if self.select_all_state:  # 当前是全选状态
@@ -1093,36 +1106,6 @@ class MultiPlatformImageDownloader(ctk.CTk):
         else: # Unknown platform
             return original_url
 
-    def build_iqiyi_sized_url(self, original_url, width, height):
-        """构建爱奇艺带尺寸参数的URL (_width_height suffix)"""
-        if not original_url or not width or not height:
-            return original_url
-        try:
-            last_dot_index = original_url.rfind('.')
-            query_start_index = original_url.rfind('?')
-            # Handle cases with or without query parameters
-            end_index = query_start_index if query_start_index != -1 else len(original_url)
-            if last_dot_index == -1 or last_dot_index < original_url.rfind('/'):
-                base_url = original_url[:end_index]
-                extension = ""
-            else:
-                 # Ensure the dot is before any query params
-                 if query_start_index != -1 and last_dot_index > query_start_index:
-                      # Dot is part of query params, treat as no extension
-                      base_url = original_url[:end_index]
-                      extension = "" # No extension part
-                 else:
-                      base_url = original_url[:last_dot_index]
-                      extension = original_url[last_dot_index:end_index] # Include dot
-                 # Remove potential old suffix before adding new one
-                 base_url = re.sub(r'_\d+_\d+$', '', base_url)
-                 # Add query params back if they existed
-                 query_string = original_url[query_start_index:] if query_start_index != -1 else ""
-            
-            sized_url = f"{base_url}_{width}_{height}{extension}{query_string}"
-            return sized_url
-        except Exception as e:
-            return original_url
         
     def on_vip_mode_change(self):
         """VIP检测模式切换"""
@@ -1188,26 +1171,15 @@ class MultiPlatformImageDownloader(ctk.CTk):
     def _vip_single_search_worker(self, search_term):
         """VIP单独搜索工作线程"""
         try:
-            # 搜索三个平台
-            all_results = {}
-            
-            # 爱奇艺
-            iqiyi_results = self.search_iqiyi_vip(search_term)
-            all_results['爱奇艺'] = iqiyi_results
-            
-            # 腾讯视频
-            tencent_results = self.search_tencent_vip(search_term)
-            all_results['腾讯视频'] = tencent_results
-            
-            # 优酷
-            youku_results = self.search_youku_vip(search_term)
-            all_results['优酷'] = youku_results
+            # 三个平台同时检测
+            all_results = self.search_vip_all(search_term)
             
             # 更新UI
             self.after(0, self._update_vip_single_results, all_results, search_term)
             
         except Exception as e:
-            self.after(0, lambda: self.vip_status_label.configure(text=f"搜索失败: {str(e)}"))
+            msg = f"搜索失败: {e}"
+            self.after(0, lambda msg=msg: self.vip_status_label.configure(text=msg))
             self.after(0, lambda: self.vip_search_button.configure(state="normal"))
         finally:
             self.after(0, lambda: self.vip_search_button.configure(state="normal"))
@@ -1327,35 +1299,29 @@ class MultiPlatformImageDownloader(ctk.CTk):
     def _vip_batch_search_worker(self, search_terms):
         """VIP批量搜索工作线程 - 实时显示"""
         try:
-            all_results = {}
+            self.after(0, self._start_vip_batch_table)
+            completed = [0]
             
-            for i, search_term in enumerate(search_terms):
-                # 更新状态
-                self.after(0, lambda term=search_term, idx=i+1, total=len(search_terms): 
-                          self.vip_status_label.configure(text=f"检测中... ({idx}/{total}) {term}"))
-                
-                # 搜索三个平台
-                term_results = {}
-                term_results['爱奇艺'] = self.search_iqiyi_vip(search_term)
-                term_results['腾讯视频'] = self.search_tencent_vip(search_term)
-                term_results['优酷'] = self.search_youku_vip(search_term)
-                
-                all_results[search_term] = term_results
-                
-                # 实时更新显示 - 搜索一组显示一组
-                self.after(0, lambda current_results=all_results.copy(): self._update_vip_batch_results(current_results))
-                
-                # 短暂延迟避免请求过快
-                time.sleep(0.5)
+            def on_result(index, search_term, term_results):
+                # 只把这一行的结果交给界面线程追加显示
+                completed[0] += 1
+                self.after(0, self._append_vip_batch_row, index, search_term, term_results,
+                           completed[0], len(search_terms))
+            
+            # 多个关键词并发检测，每个关键词的三个平台同时请求（按平台限速）
+            self.run_vip_batch(search_terms, on_result=on_result)
+            self.after(0, lambda: self.vip_status_label.configure(
+                text=f"批量检测完成，共检测 {len(search_terms)} 个关键词"))
             
         except Exception as e:
-            self.after(0, lambda: self.vip_status_label.configure(text=f"批量搜索失败: {str(e)}"))
+            msg = f"批量搜索失败: {e}"
+            self.after(0, lambda msg=msg: self.vip_status_label.configure(text=msg))
             self.after(0, lambda: self.vip_batch_button.configure(state="normal"))
         finally:
             self.after(0, lambda: self.vip_batch_button.configure(state="normal"))
 
-    def _update_vip_batch_results(self, all_results):
-        """更新VIP批量搜索结果 - 网格化七栏展示（增强可视度）"""
+    def _start_vip_batch_table(self):
+        """创建VIP批量检测结果表格（标题和表头），结果行由 _append_vip_batch_row 逐行追加"""
         self.clear_vip_results()
         
         # 创建表格标题
@@ -1372,6 +1338,8 @@ class MultiPlatformImageDownloader(ctk.CTk):
         column_widths = [150, 180, 100, 200, 100, 200, 100]  # 固定列宽配置
         for i in range(7):
             table_frame.grid_columnconfigure(i, weight=0, minsize=column_widths[i])
+        self.vip_batch_table_frame = table_frame
+        self.vip_batch_column_widths = column_widths
         
         # 创建表头 - 网格化展示
         headers = ["搜索关键词", "爱奇艺-影片", "爱奇艺-结果", "腾讯视频-影片", "腾讯视频-结果", "优酷-影片", "优酷-结果"]
@@ -1385,107 +1353,111 @@ class MultiPlatformImageDownloader(ctk.CTk):
                                       font=ctk.CTkFont(size=14, weight="bold"), 
                                       text_color="#FFFFFF", fg_color="transparent")
             header_label.grid(row=0, column=0, padx=10, pady=8, sticky="ew")
+
+    def _append_vip_batch_row(self, index, search_term, platform_results, completed, total):
+        """追加一个关键词的检测结果行 - 网格化七栏展示（增强可视度）
+
+        行号按关键词的输入顺序放置，先完成的关键词不会打乱表格顺序。
+        """
+        table_frame = getattr(self, "vip_batch_table_frame", None)
+        if table_frame is None or not table_frame.winfo_exists():
+            return
+        column_widths = self.vip_batch_column_widths
+        self.vip_status_label.configure(text=f"检测中... ({completed}/{total}) {search_term}")
         
-        # 填充数据 - 网格化布局
-        row = 1
-        for search_term, platform_results in all_results.items():
-            # 创建网格化行框架
-            row_frame = ctk.CTkFrame(table_frame, fg_color="#1A1A1A", corner_radius=6)
-            row_frame.grid(row=row, column=0, columnspan=7, padx=2, pady=2, sticky="ew")
-            
-            # 配置七列 - 使用固定宽度
-            for i in range(7):
-                row_frame.grid_columnconfigure(i, weight=0, minsize=column_widths[i])
-            
-            # 搜索关键词 - 网格化单元格
-            term_cell = ctk.CTkFrame(row_frame, fg_color="#2A2A2A", corner_radius=4)
-            term_cell.grid(row=0, column=0, padx=3, pady=3, sticky="ew")
-            term_cell.grid_columnconfigure(0, weight=1)
-            
-            term_label = ctk.CTkLabel(term_cell, text=search_term, 
-                                    font=ctk.CTkFont(size=13, weight="bold"), text_color="white")
-            term_label.grid(row=0, column=0, padx=8, pady=6, sticky="w")
-            
-            # 各平台结果 - 网格化单元格展示
-            platforms = ['爱奇艺', '腾讯视频', '优酷']
-            for platform_idx, platform in enumerate(platforms):
-                results = platform_results.get(platform, [])
-                result_text = self._format_vip_results(results, search_term)
+        # 创建网格化行框架
+        row_frame = ctk.CTkFrame(table_frame, fg_color="#1A1A1A", corner_radius=6)
+        row_frame.grid(row=index + 1, column=0, columnspan=7, padx=2, pady=2, sticky="ew")
+        
+        # 配置七列 - 使用固定宽度
+        for i in range(7):
+            row_frame.grid_columnconfigure(i, weight=0, minsize=column_widths[i])
+        
+        # 搜索关键词 - 网格化单元格
+        term_cell = ctk.CTkFrame(row_frame, fg_color="#2A2A2A", corner_radius=4)
+        term_cell.grid(row=0, column=0, padx=3, pady=3, sticky="ew")
+        term_cell.grid_columnconfigure(0, weight=1)
+        
+        term_label = ctk.CTkLabel(term_cell, text=search_term, 
+                                font=ctk.CTkFont(size=13, weight="bold"), text_color="white")
+        term_label.grid(row=0, column=0, padx=8, pady=6, sticky="w")
+        
+        # 各平台结果 - 网格化单元格展示
+        platforms = ['爱奇艺', '腾讯视频', '优酷']
+        for platform_idx, platform in enumerate(platforms):
+            results = platform_results.get(platform, [])
+            result_text = self._format_vip_results(results, search_term)
+            
+            # 计算列位置：每个平台占用两列
+            col_start = 1 + platform_idx * 2
+            
+            if result_text == "未找到结果":
+                # 影片名称网格化单元格
+                movie_cell = ctk.CTkFrame(row_frame, fg_color="#2A2A2A", corner_radius=4)
+                movie_cell.grid(row=0, column=col_start, padx=3, pady=3, sticky="ew")
+                movie_cell.grid_columnconfigure(0, weight=1)
+                
+                movie_label = ctk.CTkLabel(movie_cell, text="无", 
+                                         text_color="#888888", wraplength=100,
+                                         font=ctk.CTkFont(size=11))
+                movie_label.grid(row=0, column=0, padx=6, pady=4, sticky="w")
                 
-                # 计算列位置：每个平台占用两列
-                col_start = 1 + platform_idx * 2
+                # 结果网格化单元格
+                result_cell = ctk.CTkFrame(row_frame, fg_color="#2A2A2A", corner_radius=4)
+                result_cell.grid(row=0, column=col_start+1, padx=3, pady=3, sticky="ew")
+                result_cell.grid_columnconfigure(0, weight=1)
                 
-                if result_text == "未找到结果":
+                result_label = ctk.CTkLabel(result_cell, text="无", 
+                                          text_color="#888888", wraplength=60,
+                                          font=ctk.CTkFont(size=11))
+                result_label.grid(row=0, column=0, padx=6, pady=4, sticky="w")
+            else:
+                lines = result_text.split('\n')
+                # 只显示第一个结果（最匹配的）
+                if lines and " - " in lines[0]:
+                    movie_name, status = lines[0].split(" - ", 1)
+                    
                     # 影片名称网格化单元格
                     movie_cell = ctk.CTkFrame(row_frame, fg_color="#2A2A2A", corner_radius=4)
                     movie_cell.grid(row=0, column=col_start, padx=3, pady=3, sticky="ew")
                     movie_cell.grid_columnconfigure(0, weight=1)
                     
-                    movie_label = ctk.CTkLabel(movie_cell, text="无", 
-                                             text_color="#888888", wraplength=100,
-                                             font=ctk.CTkFont(size=11))
+                    movie_label = ctk.CTkLabel(movie_cell, text=movie_name, 
+                                            text_color="white", font=ctk.CTkFont(size=11), wraplength=100)
                     movie_label.grid(row=0, column=0, padx=6, pady=4, sticky="w")
                     
-                    # 结果网格化单元格
+                    # 结果网格化单元格 - 用不同颜色标识
                     result_cell = ctk.CTkFrame(row_frame, fg_color="#2A2A2A", corner_radius=4)
                     result_cell.grid(row=0, column=col_start+1, padx=3, pady=3, sticky="ew")
                     result_cell.grid_columnconfigure(0, weight=1)
                     
-                    result_label = ctk.CTkLabel(result_cell, text="无", 
-                                              text_color="#888888", wraplength=60,
-                                              font=ctk.CTkFont(size=11))
+                    if "VIP" in status:
+                        status_color = "#FF6B6B"  # 低饱和度红色
+                    else:
+                        status_color = "#4ECDC4"  # 低饱和度绿色
+                    
+                    result_label = ctk.CTkLabel(result_cell, text=status, 
+                                              text_color=status_color, 
+                                              font=ctk.CTkFont(weight="bold", size=11))
                     result_label.grid(row=0, column=0, padx=6, pady=4, sticky="w")
                 else:
-                    lines = result_text.split('\n')
-                    # 只显示第一个结果（最匹配的）
-                    if lines and " - " in lines[0]:
-                        movie_name, status = lines[0].split(" - ", 1)
-                        
-                        # 影片名称网格化单元格
-                        movie_cell = ctk.CTkFrame(row_frame, fg_color="#2A2A2A", corner_radius=4)
-                        movie_cell.grid(row=0, column=col_start, padx=3, pady=3, sticky="ew")
-                        movie_cell.grid_columnconfigure(0, weight=1)
-                        
-                        movie_label = ctk.CTkLabel(movie_cell, text=movie_name, 
-                                                text_color="white", font=ctk.CTkFont(size=11), wraplength=100)
-                        movie_label.grid(row=0, column=0, padx=6, pady=4, sticky="w")
-                        
-                        # 结果网格化单元格 - 用不同颜色标识
-                        result_cell = ctk.CTkFrame(row_frame, fg_color="#2A2A2A", corner_radius=4)
-                        result_cell.grid(row=0, column=col_start+1, padx=3, pady=3, sticky="ew")
-                        result_cell.grid_columnconfigure(0, weight=1)
-                        
-                        if "VIP" in status:
-                            status_color = "#FF6B6B"  # 低饱和度红色
-                        else:
-                            status_color = "#4ECDC4"  # 低饱和度绿色
-                        
-                        result_label = ctk.CTkLabel(result_cell, text=status, 
-                                                  text_color=status_color, 
-                                                  font=ctk.CTkFont(weight="bold", size=11))
-                        result_label.grid(row=0, column=0, padx=6, pady=4, sticky="w")
-                    else:
-                        # 单行结果网格化单元格
-                        movie_cell = ctk.CTkFrame(row_frame, fg_color="#2A2A2A", corner_radius=4)
-                        movie_cell.grid(row=0, column=col_start, padx=3, pady=3, sticky="ew")
-                        movie_cell.grid_columnconfigure(0, weight=1)
-                        
-                        movie_label = ctk.CTkLabel(movie_cell, text=lines[0] if lines else "无", 
-                                                text_color="white", font=ctk.CTkFont(size=11), wraplength=100)
-                        movie_label.grid(row=0, column=0, padx=6, pady=4, sticky="w")
-                        
-                        result_cell = ctk.CTkFrame(row_frame, fg_color="#2A2A2A", corner_radius=4)
-                        result_cell.grid(row=0, column=col_start+1, padx=3, pady=3, sticky="ew")
-                        result_cell.grid_columnconfigure(0, weight=1)
-                        
-                        result_label = ctk.CTkLabel(result_cell, text="免费", 
-                                                  text_color="#4ECDC4", 
-                                                  font=ctk.CTkFont(weight="bold", size=11))
-                        result_label.grid(row=0, column=0, padx=6, pady=4, sticky="w")
-            
-            row += 1
-        
-        self.vip_status_label.configure(text=f"批量检测完成，共检测 {len(all_results)} 个关键词")
+                    # 单行结果网格化单元格
+                    movie_cell = ctk.CTkFrame(row_frame, fg_color="#2A2A2A", corner_radius=4)
+                    movie_cell.grid(row=0, column=col_start, padx=3, pady=3, sticky="ew")
+                    movie_cell.grid_columnconfigure(0, weight=1)
+                    
+                    movie_label = ctk.CTkLabel(movie_cell, text=lines[0] if lines else "无", 
+                                            text_color="white", font=ctk.CTkFont(size=11), wraplength=100)
+                    movie_label.grid(row=0, column=0, padx=6, pady=4, sticky="w")
+                    
+                    result_cell = ctk.CTkFrame(row_frame, fg_color="#2A2A2A", corner_radius=4)
+                    result_cell.grid(row=0, column=col_start+1, padx=3, pady=3, sticky="ew")
+                    result_cell.grid_columnconfigure(0, weight=1)
+                    
+                    result_label = ctk.CTkLabel(result_cell, text="免费", 
+                                              text_color="#4ECDC4", 
+                                              font=ctk.CTkFont(weight="bold", size=11))
+                    result_label.grid(row=0, column=0, padx=6, pady=4, sticky="w")
 
     def _format_vip_results(self, results, search_term):
         """格式化VIP检测结果"""
@@ -1554,9 +1526,7 @@ class MultiPlatformImageDownloader(ctk.CTk):
     def load_vip_excel_sheets(self):
         """加载VIP检测Excel工作表"""
         try:
-            import pandas as pd
-            excel_file = pd.ExcelFile(self.vip_excel_file_path)
-            sheet_names = excel_file.sheet_names
+            sheet_names = list_excel_sheets(self.vip_excel_file_path)
             
             self.vip_sheet_combo.configure(values=sheet_names)
             if sheet_names:
@@ -1572,12 +1542,17 @@ class MultiPlatformImageDownloader(ctk.CTk):
             return
         
         try:
-            import pandas as pd
-            self.vip_excel_data = pd.read_excel(self.vip_excel_file_path, sheet_name=selected_sheet)
+            # 只读取影片名称列（找不到时使用第一列）
+            start_time = time.perf_counter()
+            self.vip_excel_data, _ = read_excel_sheet(
+                self.vip_excel_file_path, selected_sheet,
+                select=lambda header: [next((c for c in header if "影片名称" in str(c)), header[0])] if header else [])
             self.vip_excel_sheet_name = selected_sheet
             
             # 显示预览
             self._show_vip_excel_preview()
+            self.vip_status_label.configure(
+                text=f"{self.vip_status_label.cget('text')} | 加载用时 {time.perf_counter() - start_time:.2f} 秒")
             
         except Exception as e:
             messagebox.showerror("错误", f"加载工作表失败: {str(e)}")
@@ -1660,40 +1635,33 @@ class MultiPlatformImageDownloader(ctk.CTk):
         try:
             all_results = {}
             
-            # 初始化VIP检测DataFrame
-            self.vip_df = pd.DataFrame(columns=[
-                "序号", "影片名称", "爱奇艺-影片", "爱奇艺-结果", 
-                "腾讯视频-影片", "腾讯视频-结果", "优酷-影片", "优酷-结果"
-            ])
+            # 初始化VIP检测DataFrame，按影片顺序预先占好行，结果完成后原位填充
+            self.vip_df = pd.DataFrame({
+                "序号": range(1, len(movie_names) + 1), "影片名称": movie_names,
+                "爱奇艺-影片": "", "爱奇艺-结果": "",
+                "腾讯视频-影片": "", "腾讯视频-结果": "", "优酷-影片": "", "优酷-结果": ""
+            })
             
-            # 更新表格标题
-            self.after(0, lambda: self.vip_table_title_label.configure(text="📊 VIP检测进行中..."))
+            # 更新表格标题并显示待检测的影片
+            self.after(0, self._start_vip_excel_table, movie_names)
+            completed = [0]
             
-            for i, movie_name in enumerate(movie_names):
-                # 更新状态
-                self.after(0, lambda name=movie_name, idx=i+1, total=len(movie_names): 
-                          self.vip_status_label.configure(text=f"检测中... ({idx}/{total}) {name}"))
-                
-                # 搜索三个平台
-                movie_results = {}
-                movie_results['爱奇艺'] = self.search_iqiyi_vip(movie_name)
-                movie_results['腾讯视频'] = self.search_tencent_vip(movie_name)
-                movie_results['优酷'] = self.search_youku_vip(movie_name)
-                
+            def on_result(index, movie_name, movie_results):
                 all_results[movie_name] = movie_results
-                
-                # 实时更新表格 - 处理当前结果并更新表格
-                self.after(0, lambda current_results=all_results.copy(), current_name=movie_name, current_idx=i: 
-                          self._update_vip_table_row(current_results, current_name, current_idx))
-                
-                # 短暂延迟避免请求过快
-                time.sleep(0.5)
+                completed[0] += 1
+                # 只把这一行的结果交给界面线程，不再复制整个结果字典
+                self.after(0, self._update_vip_table_row, movie_results, movie_name, index,
+                           completed[0], len(movie_names))
+            
+            # 多部影片并发检测，每部影片的三个平台同时请求（按平台限速）
+            self.run_vip_batch(movie_names, on_result=on_result)
             
             # 最终更新UI和保存结果
             self.after(0, lambda: self._finalize_vip_excel_results(all_results))
             
         except Exception as e:
-            self.after(0, lambda: self.vip_status_label.configure(text=f"Excel检测失败: {str(e)}"))
+            msg = f"Excel检测失败: {e}"
+            self.after(0, lambda msg=msg: self.vip_status_label.configure(text=msg))
             self.after(0, lambda: self.vip_excel_search_button.configure(state="normal"))
         finally:
             self.after(0, lambda: self.vip_excel_search_button.configure(state="normal"))
@@ -2014,15 +1982,23 @@ class MultiPlatformImageDownloader(ctk.CTk):
         except Exception as e:
             messagebox.showerror("保存失败", f"保存文件时出错: {str(e)}")
 
-    def _update_vip_table_row(self, all_results, movie_name, row_index):
-        """实时更新VIP检测表格行"""
+    def _start_vip_excel_table(self, movie_names):
+        """清空预览并为每部影片插入一行待检测的表格项"""
+        self.vip_table_title_label.configure(text="📊 VIP检测进行中...")
+        self.vip_tree.delete(*self.vip_tree.get_children())
+        self.vip_tree_items = [
+            self.vip_tree.insert("", "end", values=[i + 1, name, "", "检测中...", "", "检测中...", "", "检测中..."])
+            for i, name in enumerate(movie_names)
+        ]
+
+    def _update_vip_table_row(self, movie_results, movie_name, row_index, completed=None, total=None):
+        """实时更新VIP检测表格行（只处理这一行的结果）"""
         try:
+            if completed is not None:
+                self.vip_status_label.configure(text=f"检测中... ({completed}/{total}) {movie_name}")
             if not hasattr(self, "vip_tree") or not self.vip_tree.winfo_exists():
                 return
             
-            # 处理当前影片的结果
-            movie_results = all_results.get(movie_name, {})
-            
             # 准备表格行数据
             row_data = {
                 "序号": row_index + 1,
@@ -2078,18 +2054,16 @@ class MultiPlatformImageDownloader(ctk.CTk):
                 row_data["优酷-影片"], row_data["优酷-结果"]
             ]
             
-            # 查找或创建表格项
-            items = self.vip_tree.get_children()
-            if row_index < len(items):
-                # 更新现有行
+            # 更新预先插入的表格项
+            items = getattr(self, "vip_tree_items", [])
+            if row_index < len(items) and self.vip_tree.exists(items[row_index]):
                 item = items[row_index]
                 self.vip_tree.item(item, values=values)
             else:
-                # 添加新行
-                self.vip_tree.insert("", "end", values=values)
+                item = self.vip_tree.insert("", "end", values=values)
             
-            # 滚动到最新行
-            self.vip_tree.see(self.vip_tree.get_children()[-1])
+            # 滚动到刚完成的行
+            self.vip_tree.see(item)
             
         except Exception as e:
             pass  # 更新VIP表格行失败，静默处理
@@ -2156,504 +2130,6 @@ class MultiPlatformImageDownloader(ctk.CTk):
         except Exception as e:
             pass  # 打开VIP检测Excel文件失败，静默处理
 
-
-
-    def search_iqiyi_vip(self, search_term):
-        """搜索爱奇艺VIP标识"""
-        results = []
-        try:
-            # 构建API URL
-            encoded_term = urllib.parse.quote(search_term)
-            api_url = f"https://mesh.if.iqiyi.com/portal/lw/search/homePageV3?key={encoded_term}&current_page=1&pageNum=1&pageSize=10"
-            
-            # 发送请求
-            response = requests.get(api_url, headers=self.iqiyi_headers, timeout=20)
-            
-            if response.status_code == 200:
-                data_dict = response.json()
-                
-                # 提取搜索结果 - 使用新的albumInfo结构
-                templates = data_dict.get('data', {}).get('templates', [])
-                if templates:
-                    # 查找包含albumInfo的模板
-                    for template in templates:
-                        album_info = template.get('albumInfo')
-                        if album_info:
-                            title = album_info.get('title')
-                            img_url = album_info.get('img')
-                            qipu_id = album_info.get('qipuId')
-                            
-                            # 检查VIP标识
-                            vip_identifier = self.extract_iqiyi_vip_identifier_from_album(album_info)
-                            
-                            if title and img_url:
-                                if img_url.startswith('//'):
-                                    img_url = 'https:' + img_url
-                                results.append({
-                                    'title': title,
-                                    'img_url': img_url,
-                                    'vip_identifier': vip_identifier
-                                })
-                            
-                            # 限制结果数量
-                            if len(results) >= 10:
-                                break
-            
-        except Exception as e:
-            pass  # 爱奇艺VIP搜索出错，静默处理
-        
-        return results
-
-    def get_iqiyi_detailed_vip_info(self, qipu_id, item):
-        """获取爱奇艺详细的VIP信息"""
-        try:
-            # 方法1: 从搜索结果中检查payMarkUrl
-            pay_mark_url = item.get('payMarkUrl', '')
-            if pay_mark_url and 'vip' in pay_mark_url.lower():
-                return "VIP"
-            
-            # 方法2: 如果有qipuId，尝试获取详细信息
-            if qipu_id:
-                try:
-                    # 构建详细信息API URL
-                    detail_api_url = f"https://pcw-api.iqiyi.com/video/video/playervideoinfo?tvid={qipu_id}"
-                    response = requests.get(detail_api_url, headers=self.iqiyi_headers, timeout=10)
-                    
-                    if response.status_code == 200:
-                        detail_data = response.json()
-                        if detail_data.get('code') == 'A00000':
-                            vip_type = detail_data.get('data', {}).get('vipType', [])
-                            if vip_type:
-                                return f"VIP ({', '.join(vip_type)})"
-                except Exception as e:
-                    pass  # 获取爱奇艺详细信息失败，静默处理
-            
-            return None
-            
-        except Exception as e:
-            pass  # 获取爱奇艺VIP信息时出错，静默处理
-            return None
-
-    def extract_iqiyi_vip_identifier_from_album(self, album_info):
-        """从albumInfo中提取爱奇艺VIP标识"""
-        try:
-            # 检查payMarkUrl字段（最直接的VIP标识）
-            pay_mark_url = album_info.get('payMarkUrl', '')
-            if pay_mark_url and 'vip' in pay_mark_url.lower():
-                return "VIP"
-            
-            # 检查firstVideoIsVip字段
-            first_video_is_vip = album_info.get('firstVideoIsVip')
-            if first_video_is_vip:
-                return "VIP"
-            
-            # 检查vipTips字段
-            vip_tips = album_info.get('vipTips', '')
-            if vip_tips and 'VIP' in vip_tips.upper():
-                return "VIP"
-            
-            # 检查specialTags字段
-            special_tags = album_info.get('specialTags', [])
-            for tag in special_tags:
-                tag_text = tag.get('text', '')
-                if 'VIP' in tag_text.upper():
-                    return tag_text
-            
-            # 检查tags字段
-            tags = album_info.get('tags', [])
-            for tag in tags:
-                tag_text = tag.get('text', '')
-                if 'VIP' in tag_text.upper():
-                    return tag_text
-            
-            return None
-            
-        except Exception as e:
-            pass  # 从albumInfo提取爱奇艺VIP标识时出错，静默处理
-            return None
-
-    def extract_iqiyi_vip_identifier(self, item):
-        """提取爱奇艺VIP标识"""
-        try:
-            # 检查vipType字段（最准确的标识）
-            vip_type = item.get('vipType', [])
-            if vip_type and any('VIP' in str(vt).upper() for vt in vip_type):
-                return "VIP"
-            
-            # 检查payMark字段
-            pay_mark = item.get('payMark')
-            if pay_mark == 1:
-                return "VIP"
-            
-            # 检查payMarkUrl字段
-            pay_mark_url = item.get('payMarkUrl', '')
-            if pay_mark_url and 'vip' in pay_mark_url.lower():
-                return "VIP"
-            
-            # 检查markList字段
-            mark_list = item.get('markList', [])
-            for mark in mark_list:
-                mark_text = mark.get('text', '')
-                if 'VIP' in mark_text.upper():
-                    return mark_text
-            
-            # 检查labelList字段
-            label_list = item.get('labelList', [])
-            for label in label_list:
-                label_text = label.get('text', '')
-                if 'VIP' in label_text.upper():
-                    return label_text
-            
-            return None
-            
-        except Exception as e:
-            pass  # 提取爱奇艺VIP标识时出错，静默处理
-            return None
-
-    def search_tencent_vip(self, search_term):
-        """搜索腾讯视频VIP标识"""
-        results = []
-        try:
-            # 使用与海报爬取相同的API和payload
-            api_url = "https://pbaccess.video.qq.com/trpc.videosearch.mobile_search.MultiTerminalSearch/MbSearch?vplatform=2"
-            
-            # 使用完整的payload（与海报爬取相同）
-            payload = {
-                "version": "25031901",
-                "clientType": 1,
-                "filterValue": "",
-                "uuid": "75D75495-4CF1-4C67-9F10-B0B313C1C999",
-                "retry": 0,
-                "query": search_term,
-                "pagenum": 0,
-                "isPrefetch": True,
-                "pagesize": 10,  # VIP检测使用较少的结果
-                "queryFrom": 0,
-                "searchDatakey": "",
-                "transInfo": "",
-                "isneedQc": True,
-                "preQid": "",
-                "adClientInfo": "",
-                "extraInfo": {
-                    "isNewMarkLabel": "1",
-                    "multi_terminal_pc": "1",
-                    "themeType": "1",
-                    "sugRelatedIds": "{}",
-                    "appVersion": ""
-                }
-            }
-            
-            # 使用与海报爬取相同的headers
-            clean_headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/117.0.0.0 Safari/537.36",
-                "Content-Type": "application/json",
-                "Referer": "https://v.qq.com/",
-                "Origin": "https://v.qq.com"
-            }
-            
-            # 如果有Cookie，确保它是ASCII兼容的
-            if self.tencent_headers.get("Cookie") and self.tencent_headers["Cookie"] != "":
-                clean_headers["Cookie"] = self.tencent_headers["Cookie"]
-            
-            # 发送POST请求
-            response = requests.post(api_url, headers=clean_headers, json=payload, timeout=20)
-            
-            if response.status_code == 200:
-                # 解析JSON响应
-                data_dict = response.json()
-                
-                # 检查API返回是否包含错误
-                ret_code = data_dict.get('ret')
-                if ret_code != 0 and ret_code is not None:
-                    return []
-                
-                # 使用与海报爬取相同的数据提取逻辑
-                try:
-                    area_box_list = data_dict.get('data', {}).get('areaBoxList', [])
-                    
-                    if area_box_list and len(area_box_list) > 0:
-                        item_list_container = area_box_list[0]
-                        item_list = item_list_container.get('itemList', [])
-                        
-                        for item in item_list:
-                            video_info = item.get('videoInfo')
-                            if video_info:
-                                title = video_info.get('title')
-                                img_url = video_info.get('imgUrl')
-                                
-                                # 检查VIP标识
-                                vip_identifier = self.extract_tencent_vip_identifier(item)
-                                
-                                if title and img_url:
-                                    if img_url.startswith('//'):
-                                        img_url = 'https:' + img_url
-                                    results.append({
-                                        'title': title,
-                                        'img_url': img_url,
-                                        'vip_identifier': vip_identifier
-                                    })
-                    
-                    
-                except (AttributeError, IndexError, TypeError, KeyError) as e:
-                    return []
-            
-            else:
-                pass
-        
-        except Exception as e:
-            pass
-        
-        return results
-
-    def parse_tencent_html_search(self, html_content, search_term):
-        """解析腾讯视频HTML搜索结果"""
-        results = []
-        try:
-            from bs4 import BeautifulSoup
-            import re
-            
-            soup = BeautifulSoup(html_content, 'html.parser')
-            
-            # 查找视频卡片
-            video_cards = soup.find_all(['div', 'li'], class_=re.compile(r'.*video.*|.*card.*|.*item.*'))
-            
-            for card in video_cards[:10]:  # 限制数量
-                # 查找标题
-                title_elem = card.find(['h3', 'h4', 'a', 'span'], class_=re.compile(r'.*title.*|.*name.*'))
-                title = title_elem.get_text(strip=True) if title_elem else ''
-                
-                # 查找图片
-                img_elem = card.find('img')
-                img_url = img_elem.get('src', '') if img_elem else ''
-                
-                # 检查VIP标识
-                vip_identifier = self.extract_tencent_vip_identifier_from_html(card)
-                
-                if title and img_url:
-                    if img_url.startswith('//'):
-                        img_url = 'https:' + img_url
-                    results.append({
-                        'title': title,
-                        'img_url': img_url,
-                        'vip_identifier': vip_identifier
-                    })
-            
-        except Exception as e:
-            pass
-        
-        return results
-
-    def extract_tencent_vip_identifier_from_html(self, card):
-        """从HTML卡片中提取腾讯视频VIP标识"""
-        try:
-            # 查找VIP相关的文本
-            vip_texts = card.find_all(string=re.compile(r'VIP', re.IGNORECASE))
-            if vip_texts:
-                return "VIP"
-            
-            # 查找VIP相关的class
-            vip_classes = card.find_all(class_=re.compile(r'.*vip.*', re.IGNORECASE))
-            if vip_classes:
-                return "VIP"
-            
-            # 查找VIP相关的图片
-            vip_imgs = card.find_all('img', src=re.compile(r'.*vip.*', re.IGNORECASE))
-            if vip_imgs:
-                return "VIP"
-            
-            return None
-            
-        except Exception as e:
-            pass
-            return None
-
-    def extract_tencent_vip_identifier(self, item):
-        """提取腾讯视频VIP标识"""
-        try:
-            video_info = item.get('videoInfo', {})
-            
-            # 检查imgTag字段（主要VIP标识来源）
-            img_tag = video_info.get('imgTag', '')
-            if img_tag:
-                # imgTag是JSON字符串，需要解析
-                try:
-                    import json
-                    img_tag_data = json.loads(img_tag)
-                    
-                    # 遍历所有标签
-                    for tag_key, tag_info in img_tag_data.items():
-                        if isinstance(tag_info, dict):
-                            tag_text = tag_info.get('text', '')
-                            if tag_text and 'VIP' in tag_text.upper():
-                                return tag_text
-                except json.JSONDecodeError:
-                    # 如果JSON解析失败，直接搜索字符串
-                    if 'VIP' in img_tag.upper():
-                        return "VIP"
-            
-            # 检查labelList
-            label_list = video_info.get('labelList', [])
-            for label in label_list:
-                label_text = label.get('text', '')
-                if 'VIP' in label_text.upper():
-                    return label_text
-            
-            # 检查markList
-            mark_list = video_info.get('markList', [])
-            for mark in mark_list:
-                mark_text = mark.get('text', '')
-                if 'VIP' in mark_text.upper():
-                    return mark_text
-            
-            # 检查payStatus字段
-            pay_status = video_info.get('payStatus', '')
-            if pay_status and 'VIP' in pay_status.upper():
-                return pay_status
-            
-            return None
-            
-        except Exception as e:
-            pass
-            return None
-
-    def search_youku_vip(self, search_term):
-        """搜索优酷VIP标识"""
-        results = []
-        try:
-            # 构建搜索URL
-            encoded_term = urllib.parse.quote(search_term)
-            search_url = f"https://so.youku.com/search/q_{encoded_term}"
-            
-            response = requests.get(search_url, headers=self.youku_headers, timeout=20)
-            
-            if response.status_code == 200:
-                html_content = response.text
-                
-                # 首先尝试从JSON数据中提取
-                initial_data_match = re.search(r'window\.__INITIAL_DATA__\s*=\s*({.*?});', html_content, re.DOTALL)
-                if initial_data_match:
-                    try:
-                        json_str = initial_data_match.group(1)
-                        data = json.loads(json_str)
-                        
-                        # 从JSON数据中提取视频信息
-                        nodes = data.get('data', {}).get('nodes', [])
-                        for node_group in nodes:
-                            if isinstance(node_group, dict) and 'nodes' in node_group:
-                                for sub_group in node_group['nodes']:
-                                    if isinstance(sub_group, dict) and 'nodes' in sub_group:
-                                        for video_node in sub_group['nodes']:
-                                            if isinstance(video_node, dict) and 'data' in video_node:
-                                                video_data = video_node['data']
-                                                
-                                                # 提取基本信息
-                                                title = video_data.get('titleDTO', {}).get('displayName', '')
-                                                poster_dto = video_data.get('posterDTO', {})
-                                                img_url = poster_dto.get('vThumbUrl', '')
-                                                
-                                                # 检查VIP标识
-                                                vip_identifier = self.extract_youku_vip_identifier_from_json(video_data)
-                                                
-                                                if title and img_url:
-                                                    if img_url.startswith('//'):
-                                                        img_url = 'https:' + img_url
-                                                    results.append({
-                                                        'title': title,
-                                                        'img_url': img_url,
-                                                        'vip_identifier': vip_identifier
-                                                    })
-                                                
-                                                # 限制结果数量
-                                                if len(results) >= 10:
-                                                    break
-                    except json.JSONDecodeError:
-                        pass
-                
-                # 如果JSON解析失败，回退到HTML解析
-                if not results:
-                    soup = BeautifulSoup(html_content, 'html.parser')
-                    video_cards = soup.find_all('div', class_=re.compile(r'.*video.*|.*card.*'))
-                    
-                    for card in video_cards[:10]:
-                        title_elem = card.find(['h3', 'h4', 'a'], class_=re.compile(r'.*title.*'))
-                        title = title_elem.get_text(strip=True) if title_elem else ''
-                        
-                        img_elem = card.find('img')
-                        img_url = img_elem.get('src', '') if img_elem else ''
-                        
-                        vip_identifier = self.extract_youku_vip_identifier_from_html(card)
-                        
-                        if title and img_url:
-                            if img_url.startswith('//'):
-                                img_url = 'https:' + img_url
-                            results.append({
-                                'title': title,
-                                'img_url': img_url,
-                                'vip_identifier': vip_identifier
-                            })
-            
-        except Exception as e:
-            pass
-        
-        return results
-
-    def extract_youku_vip_identifier_from_json(self, video_data):
-        """从JSON数据中提取优酷VIP标识"""
-        try:
-            # 检查iconCorner字段（最准确的标识）
-            poster_dto = video_data.get('posterDTO', {})
-            icon_corner = poster_dto.get('iconCorner', {})
-            
-            if isinstance(icon_corner, dict):
-                tag_type = icon_corner.get('tagType')
-                tag_text = icon_corner.get('tagText')
-                
-                # tagType=3 且 tagText="VIP" 表示VIP内容
-                if tag_type == 3 and tag_text == "VIP":
-                    return "VIP"
-            
-            # 检查showMediaTag字段
-            show_media_tag = video_data.get('showMediaTag', [])
-            for tag in show_media_tag:
-                if isinstance(tag, dict):
-                    tag_type = tag.get('tagType')
-                    tag_text = tag.get('tagText')
-                    if tag_type == 3 and tag_text == "VIP":
-                        return "VIP"
-            
-            # 检查paid字段
-            paid = video_data.get('paid')
-            if paid == 1:
-                return "VIP"
-            
-            return None
-            
-        except Exception as e:
-            pass
-            return None
-
-    def extract_youku_vip_identifier_from_html(self, card):
-        """从HTML中提取优酷VIP标识"""
-        try:
-            # 查找VIP标识的多种可能位置
-            vip_elements = card.find_all(string=re.compile(r'VIP', re.IGNORECASE))
-            if vip_elements:
-                return "VIP"
-            
-            vip_classes = card.find_all(class_=re.compile(r'.*vip.*', re.IGNORECASE))
-            if vip_classes:
-                return "VIP"
-            
-            vip_imgs = card.find_all('img', src=re.compile(r'.*vip.*', re.IGNORECASE))
-            if vip_imgs:
-                return "VIP"
-            
-            return None
-            
-        except Exception as e:
-            pass
-            return None
-
     def search(self):
         """根据选择的平台执行搜索并获取结果"""
         search_term = self.search_entry.get().strip()
@@ -2697,257 +2173,14 @@ class MultiPlatformImageDownloader(ctk.CTk):
             messagebox.showerror("错误", f"搜索过程中发生错误: {str(e)}")
 
 
+    
+    
 
-    def search_iqiyi(self, search_term):
-        """执行爱奇艺搜索"""
-        results_list = []
-        try:
-            pass
-            
-            # 构建API URL
-            encoded_term = urllib.parse.quote(search_term)
-            api_url = f"https://mesh.if.iqiyi.com/portal/lw/search/homePageV3?key={encoded_term}&current_page=1&pageNum=1&pageSize=25"
-            
-            # 发送请求
-            response = requests.get(api_url, headers=self.iqiyi_headers, timeout=20)
-
-            if response.status_code == 200:
-                # 解析JSON响应
-                data_dict = response.json()
-
-                # 检查搜索模式
-                if self.precise_search_var.get():
-                    # 处理精确搜索结果
-                    try:
-                        # 获取templates列表
-                        templates = data_dict.get('data', {}).get('templates', [])
-                        
-                        if templates:
-                            # 获取albumInfo对象
-                            album_info = templates[0].get('albumInfo')
-                            if album_info:
-                                # 提取title和img
-                                title = album_info.get('title')
-                                img_url = album_info.get('img') or album_info.get('imgH')
-
-                                if title and img_url:
-                                    # 清理URL
-                                    if img_url.startswith('//'): img_url = 'https:' + img_url
-                                    results_list.append((title, img_url))
-
-                    except Exception as e:
-                        pass
-                else:
-                    # 处理宽泛搜索结果
-                    try:
-                        templates = data_dict.get('data', {}).get('templates', [])
-                        
-                        if templates:
-                            # 获取intentAlbumInfos列表
-                            intent_album_infos = templates[0].get('intentAlbumInfos', [])
-                        
-                            # 遍历列表提取信息
-                            for item in intent_album_infos:
-                                title = item.get('title')
-                                img_url = item.get('img')
-
-                                if title and img_url:
-                                    # 清理URL
-                                    if img_url.startswith('//'): img_url = 'https:' + img_url
-                                    results_list.append((title, img_url))
-                    except Exception as e:
-                        pass
-            else:
-                raise requests.RequestException(f"爱奇艺API请求失败，状态码: {response.status_code}，可能是Cookie过期")
-
-        except Exception as e:
-            raise
 
-        return results_list
-    
-    def search_tencent(self, search_term):
-        """执行腾讯视频搜索"""
-        results_list = []
-        try:
-            # 构建API URL
-            api_url = "https://pbaccess.video.qq.com/trpc.videosearch.mobile_search.MultiTerminalSearch/MbSearch?vplatform=2"
-            
-            # 构建POST请求的JSON负载
-            payload = {
-                "version": "25031901",
-                "clientType": 1,
-                "filterValue": "",
-                "uuid": "75D75495-4CF1-4C67-9F10-B0B313C1C999",  # 可能需要生成或使用通用值
-                "retry": 0,
-                "query": search_term,
-                "pagenum": 0,  # 第一页
-                "isPrefetch": True,
-                "pagesize": 30,
-                "queryFrom": 0,
-                "searchDatakey": "",
-                "transInfo": "",
-                "isneedQc": True,
-                "preQid": "",
-                "adClientInfo": "",
-                "extraInfo": {
-                    "isNewMarkLabel": "1",
-                    "multi_terminal_pc": "1",
-                    "themeType": "1",
-                    "sugRelatedIds": "{}",
-                    "appVersion": ""
-                }
-            }
-            
-            
-            # 创建一个干净的headers字典，只保留必要的ASCII字段
-            clean_headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/117.0.0.0 Safari/537.36",
-                "Content-Type": "application/json",
-                "Referer": "https://v.qq.com/",
-                "Origin": "https://v.qq.com"
-            }
-            
-            # 如果有Cookie，确保它是ASCII兼容的
-            if self.tencent_headers.get("Cookie") and self.tencent_headers["Cookie"] != "":
-                clean_headers["Cookie"] = self.tencent_headers["Cookie"]
-            
-            # 发送POST请求
-            response = requests.post(api_url, headers=clean_headers, json=payload, timeout=20)
-            
-            if response.status_code == 200:
-                # 解析JSON响应
-                data_dict = response.json()
-                
-                # 保存调试文件
-                try:
-                    with open("debug_tencent_response.json", "w", encoding="utf-8") as f:
-                        json.dump(data_dict, f, ensure_ascii=False, indent=4)
-                except Exception as e_save:
-                    pass
-                
-                # 检查API返回是否包含错误
-                ret_code = data_dict.get('ret')
-                if ret_code != 0 and ret_code is not None:
-                    # 尝试简化的payload
-                    simple_payload = {"query": search_term}
-                    
-                    try:
-                        simple_response = requests.post(api_url, headers=clean_headers, json=simple_payload, timeout=20)
-                        if simple_response.status_code == 200:
-                            simple_data = simple_response.json()
-                            simple_ret = simple_data.get('ret')
-                            if simple_ret == 0:
-                                data_dict = simple_data
-                            else:
-                                return []
-                        else:
-                            return []
-                    except Exception:
-                        return []
-                
-                # 使用正确的JSON路径提取数据
-                full_results_list = []
-                try:
-                    # 1. 安全地获取 areaBoxList (它是一个列表)
-                    area_box_list = data_dict.get('data', {}).get('areaBoxList', [])
-
-                    if area_box_list:
-                        # 2. 遍历 areaBoxList 中的每个区域 (通常第一个区域最相关，但也可能需要检查其他区域)
-                        #    我们先只处理第一个区域 areaBoxList[0]
-                        if len(area_box_list) > 0:
-                            item_list_container = area_box_list[0]  # 或者根据 type 等字段选择正确的 areaBox
-                            # 3. 安全地获取该区域的 itemList (它也是一个列表)
-                            item_list = item_list_container.get('itemList', [])
-
-
-                            # 4. 遍历 itemList 中的每个项目
-                            for item in item_list:
-                                # 5. 安全地获取 videoInfo 对象
-                                video_info = item.get('videoInfo')
-                                if video_info:
-                                    # 6. 从 videoInfo 中提取 title 和 imgUrl
-                                    title = video_info.get('title')
-                                    img_url = video_info.get('imgUrl')  # 注意键名是 imgUrl
-                            
-                                    if title and img_url:
-                                        # 清理或补全 img_url
-                                        if img_url.startswith('//'):
-                                            img_url = 'https:' + img_url
-                                        full_results_list.append((title, img_url))
-
-                    # 根据精确搜索开关决定是否过滤结果
-                    if self.precise_search_var.get():
-                        search_key = search_term
-                        # 调用排序和过滤函数
-                        results_list = self.filter_tencent_results(full_results_list, search_key)
-                    else:
-                        # 宽泛搜索，直接使用全部结果
-                        results_list = full_results_list
-
-                except (AttributeError, IndexError, TypeError, KeyError) as e:
-                    return []
-            
-            else:
-                raise requests.RequestException(f"腾讯视频API请求失败，状态码: {response.status_code}")
-        
-        except Exception as e:
-            raise
-        
-        return results_list
-    
-    def normalize_text(self, text):
-        """标准化文本，用于匹配比较"""
-        # 转小写，替换罗马数字，移除空格
-        text = text.lower()
-        text = text.replace('ii', '2').replace('iii', '3').replace('iv', '4').replace('v', '5')\
-               .replace('vi', '6').replace('vii', '7').replace('viii', '8')
-        text = text.replace('第一季', '1').replace('第二季', '2').replace('第三季', '3')\
-               .replace('第四季', '4').replace('第五季', '5').replace('第六季', '6')
-        text = re.sub(r'\s+', '', text)  # 移除空格
-        return text
-
-    def calculate_match_score(self, title, search_key):
-        """计算匹配分数，分数越低表示匹配度越高"""
-        norm_title = self.normalize_text(title)
-        norm_key = self.normalize_text(search_key)
-
-        # 完全匹配
-        if title == search_key:
-            return 0
-        
-        # 标准化后匹配
-        if norm_title == norm_key:
-            return 1
-        
-        # 第一季检查
-        is_base_key = not any(s in norm_key for s in ['1', '2', '3', '4', '5', '6', '第一季', '第二季'])
-        is_title_s1 = norm_title == norm_key + '1' or norm_title == norm_key + '第一季' or norm_title == norm_key
-        if is_base_key and is_title_s1:
-            return 2
-        
-        # 相似度分数（相似度越高越好，转换为越低的分数）
-        ratio = difflib.SequenceMatcher(None, norm_key, norm_title).ratio()
-        return 3 + (1 - ratio)  # 为较高相似度给较低分数
-
-    def filter_tencent_results(self, results, search_key):
-        """过滤并排序腾讯视频结果，返回前3个最匹配的结果"""
-        if not results or not search_key:
-            return results[:3] if not search_key else results
-
-        scored_results = []
-        for title, img_url in results:
-            # Use the complex scoring function specific to Tencent
-            score = self.calculate_match_score(title, search_key)
-            scored_results.append((score, title, img_url))
-
-        # Sort by score ascending (lower score is better for calculate_match_score)
-        scored_results.sort(key=lambda x: x[0])
-
-        # Return top 3 results as (title, img_url) tuples
-        return [(title, img_url) for score, title, img_url in scored_results[:3]]
     
     def clear_results(self):
         """清除所有结果控件"""
+        self.cancel_preview_jobs()
         # 清除框架中的所有控件
         for widget in self.results_frame.winfo_children():
             widget.destroy()
@@ -2961,7 +2194,6 @@ class MultiPlatformImageDownloader(ctk.CTk):
         self.select_all_state = True
     
 
-
     def update_results_list(self):
         """更新GUI显示搜索结果，显示原图、竖图和横图预览"""
         
@@ -3087,13 +2319,12 @@ class MultiPlatformImageDownloader(ctk.CTk):
         
         self.status_label.configure(text=f"找到 {len(self.results)} 个结果")
         
-        # Start background thread to load previews
-        threading.Thread(target=self.load_all_previews, args=(preview_items,), daemon=True).start()
+        # Submit preview jobs to the thread pool
+        self.load_all_previews(preview_items)
     
 
-
     def load_all_previews(self, preview_items):
-        """异步加载所有预览图。
+        """在线程池中并行加载所有预览图（主线程调用，只负责提交任务）。
         - 原图和竖图: 下载原图URL, 本地缩放。
         - 横图: 爱奇艺尝试服务器小图，优酷本地缩放原图，腾讯显示'无'
         """
@@ -3101,23 +2332,24 @@ class MultiPlatformImageDownloader(ctk.CTk):
         preview_h_width = 150
         preview_h_height = 90
 
+        platform = self.selected_platform
+        generation = self.preview_generation
         for item in preview_items:
-            platform = self.selected_platform
             orig_display_url = item["horz_url"] if platform == "优酷视频" else item["img_url"]
             vert_display_url = item["vert_url"] if platform == "优酷视频" else item["img_url"]
             base_horz_url = item["horz_url"] if platform == "优酷视频" else item["img_url"] # Base URL for horz
 
             # --- Load Original Preview ---
             if orig_display_url:
-                 self.load_preview_image(orig_display_url, item["orig_label"], "原图")
+                 self.load_preview_image(orig_display_url, item["orig_label"], "原图", platform, generation)
             else:
-                 self.after(0, lambda lw=item["orig_label"]: lw.configure(text="无图", image=None))
+                 self.post_preview_result(generation, item["orig_label"], ("text", "无图"))
 
             # --- Load Vertical Preview ---
             if vert_display_url:
-                 self.load_preview_image(vert_display_url, item["vert_label"], "竖图")
+                 self.load_preview_image(vert_display_url, item["vert_label"], "竖图", platform, generation)
             else:
-                 self.after(0, lambda lw=item["vert_label"]: lw.configure(text="无", image=None))
+                 self.post_preview_result(generation, item["vert_label"], ("text", "无"))
 
             # --- Load Horizontal Preview ---
             url_to_load_for_horz = None
@@ -3125,127 +2357,164 @@ class MultiPlatformImageDownloader(ctk.CTk):
                 # --- Build the sized URL specifically for iQiyi horizontal preview ---
                 url_to_load_for_horz = self.build_iqiyi_sized_url(base_horz_url, preview_h_width, preview_h_height)
             elif platform == "优酷视频" and base_horz_url:
-                 # Youku uses the original horizontal URL; load_preview_image will scale it
+                 # Youku uses the original horizontal URL; prepare_preview_image will scale it
                  url_to_load_for_horz = base_horz_url
             elif platform == "腾讯视频":
                  # Tencent handled directly in load_preview_image to show "无"
                  url_to_load_for_horz = None # Pass None
 
             # Call load_preview_image with the determined URL
-            self.load_preview_image(url_to_load_for_horz, item["horz_label"], "横图")
-
-
-    def load_preview_image(self, preview_url_to_download, label_widget, img_type):
-        """加载单个预览图并更新标签.
-        - Scales images proportionally based on TARGET constants.
-        - Displays iQiyi horizontal previews using their downloaded small size.
-        - Handles Tencent horizontal preview ("无").
+            self.load_preview_image(url_to_load_for_horz, item["horz_label"], "横图", platform, generation)
+
+    def get_preview_executor(self):
+        """懒加载的预览图线程池"""
+        if self.preview_executor is None:
+            workers = max(1, int(self.load_settings().get("preview_workers", 6)))
+            self.preview_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="preview")
+        return self.preview_executor
+
+    def cancel_preview_jobs(self):
+        """作废当前所有预览任务：未开始的直接取消，已完成的结果在回到主线程时丢弃"""
+        self.preview_generation += 1
+        for future in self.preview_futures:
+            future.cancel()
+        self.preview_futures = []
+
+    def load_preview_image(self, preview_url_to_download, label_widget, img_type, platform=None, generation=None):
+        """提交单个预览图的加载任务，结果分批交回主线程更新标签.
+        - Handles Tencent horizontal preview ("无") and missing URLs without a network job.
         """
-        if not label_widget.winfo_exists():
-             return
-
-        platform = self.selected_platform
+        if platform is None:
+            platform = self.selected_platform
+        if generation is None:
+            generation = self.preview_generation
 
         # Handle Tencent Horizontal Preview explicitly
         if platform == "腾讯视频" and img_type == "横图":
-            if label_widget.winfo_exists():
-                self.after(0, lambda lw=label_widget: lw.configure(text="无", image=None))
+            self.post_preview_result(generation, label_widget, ("text", "无"))
             return
 
         # Handle cases where no URL is provided
         if not preview_url_to_download:
-             if label_widget.winfo_exists():
-                 text_to_show = "无URL" # Generic default
-                 if platform == "爱奇艺" and img_type == "横图": text_to_show = "无横图URL"
-                 elif platform == "优酷视频": text_to_show = f"无{img_type}URL" # Covers both horz/vert
-                 self.after(0, lambda lw=label_widget, txt=text_to_show: lw.configure(text=txt, image=None))
-             return
+            text_to_show = "无URL" # Generic default
+            if platform == "爱奇艺" and img_type == "横图": text_to_show = "无横图URL"
+            elif platform == "优酷视频": text_to_show = f"无{img_type}URL" # Covers both horz/vert
+            self.post_preview_result(generation, label_widget, ("text", text_to_show))
+            return
 
+        future = self.get_preview_executor().submit(
+            self._preview_job, generation, preview_url_to_download, label_widget, img_type, platform
+        )
+        self.preview_futures.append(future)
+
+    def _preview_job(self, generation, preview_url_to_download, label_widget, img_type, platform):
+        """线程池中执行：下载并解码缩放预览图"""
+        if generation != self.preview_generation:
+            return  # 已有新的搜索，放弃旧任务
+        result = self.prepare_preview_image(preview_url_to_download, img_type, platform)
+        self.post_preview_result(generation, label_widget, result)
+
+    def prepare_preview_image(self, preview_url_to_download, img_type, platform):
+        """下载并生成预览图，返回 ("image", PIL图片, (宽, 高)) 或 ("text", 提示文字).
+        - Scales images proportionally based on TARGET constants, using Image.draft for reduced-size JPEG decoding.
+        - Displays iQiyi horizontal previews using their downloaded small size.
+        """
         try:
             headers_to_use = self.iqiyi_headers # Default
             if platform == "腾讯视频": headers_to_use = self.tencent_headers
             elif platform == "优酷视频": headers_to_use = self.youku_headers
 
-            response = requests.get(preview_url_to_download, headers=headers_to_use, timeout=10)
+            response = self.fetch_image(preview_url_to_download, headers_to_use, timeout=10)
 
             # Handle Download Failure
             if response.status_code != 200:
                 error_text = f"失败:{response.status_code}"
                 if platform == "爱奇艺" and img_type == "横图": # Specific check for iQiyi sized URL failure
                      error_text = "尺寸无效" if response.status_code == 404 else f"横图:{response.status_code}"
-
-                if label_widget.winfo_exists():
-                    self.after(0, lambda lw=label_widget, et=error_text: lw.configure(text=et, image=None))
                 # --- DO NOT FALLBACK TO ORIGINAL URL FOR IQIYI HORIZONTAL PREVIEW ---
-                return
-                
+                return "text", error_text
+
             img_data_bytes = response.content
             if not img_data_bytes:
-                error_text = "空数据"
-                if label_widget.winfo_exists():
-                    self.after(0, lambda lw=label_widget, et=error_text: lw.configure(text=et, image=None))
-                return
+                return "text", "空数据"
 
-            # Open Image
+            # Open Image (header only, pixels are decoded below)
             img_data = Image.open(BytesIO(img_data_bytes))
             original_width, original_height = img_data.size
 
-            # --- Determine Display Size and Resize ---
-            display_width = original_width
-            display_height = original_height
-            img_to_display = img_data
-            needs_resizing = True # Assume resizing is needed unless it's iQiyi horz
-
             is_iqiyi_horizontal_preview = (platform == "爱奇艺" and img_type == "横图")
 
             if is_iqiyi_horizontal_preview:
                 # Use downloaded dimensions directly, no further scaling
                 display_width = max(1, original_width)
                 display_height = max(1, original_height)
-                img_to_display = img_data
-                needs_resizing = False # Already the size we want
-        
-            else:
-                # --- New Scaling Logic for all other previews ---
-                if original_height == 0 or original_width == 0: aspect_ratio = 1
-                else: aspect_ratio = original_width / original_height
-
-                if img_type == "竖图" or img_type == "原图":
-                    target_h = TARGET_PREVIEW_V_HEIGHT
-                    display_height = target_h
-                    display_width = max(1, int(aspect_ratio * display_height))
-                elif img_type == "横图": # This now only applies to Youku horizontal
-                    target_w = TARGET_PREVIEW_H_WIDTH
-                    display_width = target_w
-                    display_height = max(1, int(display_width / aspect_ratio)) if aspect_ratio != 0 else 1
-
-                # Only resize if calculated dimensions differ from original
-                if display_width != original_width or display_height != original_height:
-    
-                    try:
-                        img_to_display = img_data.resize((display_width, display_height), Image.Resampling.LANCZOS)
-                    except AttributeError:
-                        img_to_display = img_data.resize((display_width, display_height), Image.LANCZOS)
-                else:
-                    needs_resizing = False # No resize needed
-                    img_to_display = img_data
-
-            # --- Create CTkImage and Update Label ---
-            ctk_img = ctk.CTkImage(light_image=img_to_display, dark_image=img_to_display, size=(display_width, display_height))
-
-            if label_widget.winfo_exists():
-                 # Label size configured automatically by CTkImage, ensure text is cleared
-                 self.after(0, lambda lw=label_widget, img=ctk_img: lw.configure(image=img, text=""))
+                img_data.load()
+                return "image", img_data, (display_width, display_height)
+
+            # --- Scaling Logic for all other previews ---
+            if original_height == 0 or original_width == 0: aspect_ratio = 1
+            else: aspect_ratio = original_width / original_height
+
+            display_width, display_height = original_width, original_height
+            if img_type == "竖图" or img_type == "原图":
+                display_height = TARGET_PREVIEW_V_HEIGHT
+                display_width = max(1, int(aspect_ratio * display_height))
+            elif img_type == "横图": # This now only applies to Youku horizontal
+                display_width = TARGET_PREVIEW_H_WIDTH
+                display_height = max(1, int(display_width / aspect_ratio)) if aspect_ratio != 0 else 1
+
+            if display_width == original_width and display_height == original_height:
+                img_data.load()
+                return "image", img_data, (display_width, display_height)
+
+            # JPEG 可按 1/2、1/4、1/8 直接缩小解码，大图预览省去大部分解码开销
+            img_data.draft("RGB", (display_width, display_height))
+            try:
+                img_to_display = img_data.resize((display_width, display_height), Image.Resampling.LANCZOS)
+            except AttributeError:
+                img_to_display = img_data.resize((display_width, display_height), Image.LANCZOS)
+            return "image", img_to_display, (display_width, display_height)
 
         except requests.exceptions.Timeout:
-            error_text = "超时"
-            if label_widget.winfo_exists():
-                 self.after(0, lambda lw=label_widget, et=error_text: lw.configure(text=et, image=None))
+            return "text", "超时"
         except Exception as e:
-            error_text = "加载失败"
-            if label_widget.winfo_exists():
-                 self.after(0, lambda lw=label_widget, et=error_text: lw.configure(text=et, image=None))
-            
+            return "text", "加载失败"
+
+    def post_preview_result(self, generation, label_widget, result):
+        """把预览结果放入队列，并确保主线程稍后批量处理"""
+        self.preview_result_q.put((generation, label_widget, result))
+        with self.preview_flush_lock:
+            if self.preview_flush_scheduled:
+                return
+            self.preview_flush_scheduled = True
+        self.after(50, self._flush_preview_results)
+
+    def _flush_preview_results(self):
+        """主线程中批量更新预览标签，丢弃旧搜索的结果"""
+        with self.preview_flush_lock:
+            self.preview_flush_scheduled = False
+        while True:
+            try:
+                generation, label_widget, result = self.preview_result_q.get_nowait()
+            except queue.Empty:
+                break
+            if generation != self.preview_generation:
+                continue
+            try:
+                if not label_widget.winfo_exists():
+                    continue
+                if result[0] == "image":
+                    _, img, size = result
+                    # --- Create CTkImage and Update Label ---
+                    ctk_img = ctk.CTkImage(light_image=img, dark_image=img, size=size)
+                    label_widget.configure(image=ctk_img, text="")
+                else:
+                    label_widget.configure(text=result[1], image=None)
+            except TclError:
+                pass  # 控件已销毁
+            except Exception as e:
+                print(f"更新预览图失败: {e}")
+
     def select_directory(self):
         """选择下载目录"""
         directory = filedialog.askdirectory()
@@ -3253,60 +2522,7 @@ class MultiPlatformImageDownloader(ctk.CTk):
             self.path_entry.delete(0, "end")
             self.path_entry.insert(0, directory)
             
-    def sanitize_filename(self, filename):
-        """清理文件名，移除不允许的字符"""
-        return re.sub(r'[\\/*?:"<>|]', "_", filename)
 
-    def smart_resize_and_crop(self, img, target_width, target_height):
-        """智能缩放裁剪：先根据最小修改幅度的边等比例缩放，再中心裁剪多余部分"""
-        try:
-            original_width, original_height = img.size
-            
-            # 计算缩放比例
-            width_scale = target_width / original_width
-            height_scale = target_height / original_height
-            
-            print(f"  智能缩放裁剪: 原始尺寸 {original_width}x{original_height} -> 目标尺寸 {target_width}x{target_height}")
-            print(f"  缩放比例: 宽度 {width_scale:.3f}, 高度 {height_scale:.3f}")
-            
-            # 选择最大的缩放比例（修改幅度最小的边作为基准）
-            scale_ratio = max(width_scale, height_scale)
-            print(f"  选择缩放比例: {scale_ratio:.3f} (基于{'宽度' if width_scale > height_scale else '高度'})")
-            
-            # 按基准边等比例缩放
-            new_width = int(original_width * scale_ratio)
-            new_height = int(original_height * scale_ratio)
-            
-            print(f"  等比例缩放后尺寸: {new_width}x{new_height}")
-            
-            # 执行缩放
-            try:
-                scaled_img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-            except AttributeError:
-                scaled_img = img.resize((new_width, new_height), Image.LANCZOS)
-            
-            # 计算裁剪区域（中心裁剪）
-            left = (new_width - target_width) // 2
-            top = (new_height - target_height) // 2
-            right = left + target_width
-            bottom = top + target_height
-            
-            print(f"  裁剪区域: left={left}, top={top}, right={right}, bottom={bottom}")
-            
-            # 执行裁剪
-            cropped_img = scaled_img.crop((left, top, right, bottom))
-            
-            print(f"  智能缩放裁剪完成: 最终尺寸 {cropped_img.size}")
-            return cropped_img
-            
-        except Exception as e:
-            print(f"  智能缩放裁剪失败: {e}")
-            print(f"  回退到简单缩放...")
-            # 回退到简单缩放
-            try:
-                return img.resize((target_width, target_height), Image.Resampling.LANCZOS)
-            except AttributeError:
-                return img.resize((target_width, target_height), Image.LANCZOS)
             
     def download_selected(self):
         """下载选中的图片"""
@@ -3444,7 +2660,8 @@ class MultiPlatformImageDownloader(ctk.CTk):
                     size_str=size_str,
                     platform=platform,
                     target_width=width, target_height=height, 
-                    img_type=img_type
+                    img_type=img_type,
+                    preset_name=preset_name
                 )
                 
                 if success:
@@ -3478,205 +2695,10 @@ class MultiPlatformImageDownloader(ctk.CTk):
                 failed_text += f"\n... 还有 {len(failed_items) - 10} 个失败项"
             messagebox.showwarning("失败详情", f"失败的下载项:\n{failed_text}")
     
-    def download_image(self, base_img_url, title, download_path, suffix=None, size_str=None,
-                     platform=None, target_width=0, target_height=0, img_type="", use_cid_filename=False):
-
-        if not base_img_url:
-            return False, "无图片URL"
-
-        download_url_to_try = base_img_url
-        attempt_server_side_scaling = False
-        needs_forced_local_scaling = False
-        headers_to_use = self.iqiyi_headers
-
-        is_original_size = target_width == -1 and target_height == -1
-        if platform == "腾讯视频":
-            headers_to_use = self.tencent_headers
-            if target_width > 0 and target_height > 0 and not is_original_size:
-                needs_forced_local_scaling = True
-        elif platform == "优酷视频":
-            headers_to_use = self.youku_headers
-            if target_width > 0 and target_height > 0 and not is_original_size:
-                needs_forced_local_scaling = True
-                download_url_to_try = base_img_url
-        elif platform == "爱奇艺":
-            headers_to_use = self.iqiyi_headers
-            if target_width > 0 and target_height > 0 and not is_original_size:
-                attempted_sized_url = self.build_iqiyi_sized_url(base_img_url, target_width, target_height)
-                if attempted_sized_url != base_img_url:
-                    download_url_to_try = attempted_sized_url
-                    attempt_server_side_scaling = True
-
-        try:
-            img_response = requests.get(download_url_to_try, headers=headers_to_use, timeout=30)
-
-            if attempt_server_side_scaling and img_response.status_code != 200:
-                return False, f"爱奇艺尺寸URL无效，状态码:{img_response.status_code}"
-
-            if img_response.status_code != 200:
-                return False, f"HTTP状态码:{img_response.status_code}"
-
-            img_response.raise_for_status()
-
-            content_type = img_response.headers.get('Content-Type', '').lower()
-            if not content_type.startswith('image/'):
-                # 不是图片类型，可能是登录页、错误页等，但我们只警告，不直接失败
-                # return False, f"Content-Type异常:{content_type}，请检查Cookie或URL"
-                pass
-
-            save_content = img_response.content
-            save_format = 'JPEG' # Default format if no scaling or type detection occurs
-            force_jpeg_conversion = True
-
-            # 只要PIL能打开就转成JPG保存
-            try:
-                img = Image.open(BytesIO(img_response.content))
-            except Exception as pil_open_err:
-                return False, f"PIL无法打开图片:{pil_open_err}"
-
-            if needs_forced_local_scaling and target_width > 0 and target_height > 0:
-                try:
-                    print(f"  开始智能缩放裁剪: {img.size} -> {target_width}x{target_height}")
-                    resized_img = self.smart_resize_and_crop(img, target_width, target_height)
-                    output_buffer = BytesIO()
-                    save_format = 'JPEG'
-                    if resized_img.mode != 'RGB':
-                        resized_img = resized_img.convert('RGB')
-                    resized_img.save(output_buffer, format='JPEG', quality=95)
-                    save_content = output_buffer.getvalue()
-                    print(f"  智能缩放裁剪成功")
-                except Exception as resize_err:
-                    print(f"错误：智能缩放裁剪失败 ({title} - {img_type}): {resize_err}")
-                    print(f"警告：缩放裁剪失败，将保存原始下载的图片...")
-                    try:
-                        if img.mode != 'RGB':
-                            img = img.convert('RGB')
-                        output_buffer = BytesIO()
-                        img.save(output_buffer, format='JPEG', quality=95)
-                        save_content = output_buffer.getvalue()
-                        save_format = 'JPEG'
-                    except Exception as pil_err:
-                        return False, f"PIL缩放/转换失败:{pil_err}"
-            else:
-                # 不需要缩放，直接转JPG
-                try:
-                    if img.mode != 'RGB':
-                        img = img.convert('RGB')
-                    output_buffer = BytesIO()
-                    img.save(output_buffer, format='JPEG', quality=95)
-                    save_content = output_buffer.getvalue()
-                    save_format = 'JPEG'
-                except Exception as convert_err:
-                    return False, f"PIL强制JPG失败:{convert_err}"
-
-            # --- 添加自动压缩功能 ---
-            preset_name = self.preset_combo.get() if hasattr(self, 'preset_combo') else ""
-            
-            # 根据不同预设设置不同的压缩目标
-            if preset_name == "云南尺寸":
-                target_filesize_kb = 100  # 云南尺寸压缩到100KB
-                size_check_name = "云南尺寸"
-            else:
-                target_filesize_kb = 300  # 其他尺寸压缩到300KB
-                size_check_name = "自动压缩"
-            
-            # 获取当前 save_content 的大小 (Bytes)
-            current_size_bytes = len(save_content)
-            current_size_kb = current_size_bytes / 1024
-
-            print(f"  {size_check_name}检查: 当前图片大小 {current_size_kb:.2f} KB (目标 <= {target_filesize_kb} KB)")
-
-            if current_size_kb > target_filesize_kb:
-                print(f"  {size_check_name}警告: 图片大小超过 {target_filesize_kb} KB，尝试压缩...")
-                try:
-                    img_to_compress = Image.open(BytesIO(save_content))
-                    quality = 85
-                    step = 5
-                    min_quality = 10
-                    compressed_buffer = BytesIO()
-                    new_size_kb = current_size_kb
-                    while quality >= min_quality:
-                        compressed_buffer.seek(0)
-                        compressed_buffer.truncate()
-                        save_img = img_to_compress
-                        if save_img.mode != 'RGB':
-                            save_img = save_img.convert('RGB')
-                        save_img.save(compressed_buffer, format='JPEG', quality=quality)
-                        new_size_kb = len(compressed_buffer.getvalue()) / 1024
-                        if new_size_kb <= target_filesize_kb:
-                            save_content = compressed_buffer.getvalue()
-                            print(f"  压缩成功！最终大小 {new_size_kb:.2f} KB (质量 {quality})")
-                            break
-                        quality -= step
-                    else:
-                        save_content = compressed_buffer.getvalue()
-                        print(f"  警告: 压缩至最低质量 {min_quality} 后，大小仍为 {new_size_kb:.2f} KB，超过目标。将使用此最低质量图片。")
-                except Exception as compress_err:
-                    print(f"错误：压缩{size_check_name}图片时出错: {compress_err}")
-                    print(traceback.format_exc())
-                    print("警告：压缩失败，将保存压缩前的图片。")
-            ext = ".jpg"
-            
-            # 如果提供了suffix，直接使用title + suffix作为文件名
-            if suffix:
-                base_filename = self.sanitize_filename(title + suffix)
-            elif use_cid_filename:
-                base_filename = self.sanitize_filename(title)
-            else:
-                format_data = {
-                    "标题": self.sanitize_filename(title),
-                    "图片尺寸": f"{target_width}x{target_height}" if target_width > 0 and target_height > 0 and target_width != -1 and target_height != -1 else (size_str if size_str else "原尺寸"),
-                    "类型": img_type if img_type else "",
-                    "平台": platform if platform else ""
-                }
-                try:
-                    base_filename = self.filename_format.format(
-                        **{k: format_data.get(k, '') for k in ['标题', '图片尺寸', '类型', '平台']}
-                    )
-                    base_filename = re.sub(r'_+', '_', base_filename).strip('_')
-                    if not base_filename:
-                        base_filename = self.sanitize_filename(title)
-                except KeyError as e:
-                    base_filename = f"{format_data['标题']}_{format_data['类型']}_{format_data['图片尺寸']}"
-                    base_filename = re.sub(r'_+', '_', base_filename).strip('_')
-            file_path = os.path.join(download_path, f"{base_filename}{ext}")
-            counter = 1
-            original_path_base = os.path.join(download_path, base_filename)
-            while os.path.exists(file_path):
-                file_path = f"{original_path_base}_{counter}{ext}"
-                counter += 1
-            with open(file_path, 'wb') as f:
-                f.write(save_content)
-            return True, ""
-        except requests.exceptions.Timeout:
-            return False, "请求超时"
-        except requests.exceptions.RequestException as e:
-            return False, f"请求异常:{e}"
-        except Exception as e:
-            return False, f"未知异常:{e}"
-
-    def parse_dimension_string(self, dim_str: str) -> tuple[int, int]:
-        """解析 '宽度x高度' 格式的字符串, 返回 (int, int) 或引发 ValueError"""
-        if not dim_str:
-            raise ValueError("尺寸字符串不能为空")
-        try:
-            parts = dim_str.lower().split('x')
-            if len(parts) != 2:
-                raise ValueError("格式应为 '宽度x高度'")
-            width = int(parts[0].strip())
-            height = int(parts[1].strip())
-            if width <= 0 or height <= 0:
-                raise ValueError("宽度和高度必须是正数")
-            return width, height
-        except (ValueError, IndexError) as e:
-            # Reraise with a more specific message if it's not already one of ours
-            if isinstance(e, ValueError) and str(e) in ["尺寸字符串不能为空", "格式应为 '宽度x高度'", "宽度和高度必须是正数"]:
-                 raise e
-            else:
-                 raise ValueError(f"无效的尺寸格式 '{dim_str}'. 错误: {e}")
 
     def clear_results_widgets_only(self):
          """Helper to destroy only widgets in results_frame, not reset data lists"""
+         self.cancel_preview_jobs()
          for widget in self.results_frame.winfo_children():
             widget.destroy()
 
@@ -3684,8 +2706,6 @@ class MultiPlatformImageDownloader(ctk.CTk):
         """更新当前选择的平台 (No argument needed anymore)"""
         self.selected_platform = self.platform_var.get() # Read from StringVar
 
-
-
     def show_zoomed_image(self, horz_url, vert_url, preview_type, title=""):
         """显示点击预览图的放大视图，展示对应类型和当前选定尺寸的最终图片。"""
 
@@ -3693,7 +2713,6 @@ class MultiPlatformImageDownloader(ctk.CTk):
         preset_name = self.preset_combo.get()
 
 
-
         # 1. Get Original Base URLs (handle None safely)
         original_url_h = horz_url
         original_url_v = vert_url
@@ -3779,8 +2798,6 @@ class MultiPlatformImageDownloader(ctk.CTk):
             size_info_str = f"爱奇艺横图: {display_w_final}x{display_h_final}"
 
 
-
-
         # --- Create Popup Window ---
         popup_title = f"{title} - {preview_type} 预览 ({size_info_str})" if title else f"{preview_type} 预览 ({size_info_str})"
         popup = ctk.CTkToplevel(self)
@@ -3810,7 +2827,7 @@ class MultiPlatformImageDownloader(ctk.CTk):
                 if platform == "腾讯视频": headers_to_use = self.tencent_headers
                 elif platform == "优酷视频": headers_to_use = self.youku_headers
 
-                response = requests.get(url_to_download, headers=headers_to_use, timeout=20)
+                response = self.fetch_image(url_to_download, headers_to_use, timeout=20)
 
                 if response.status_code != 200:
                     error_msg = f"加载失败: HTTP {response.status_code}"
@@ -3818,7 +2835,7 @@ class MultiPlatformImageDownloader(ctk.CTk):
                     # Special handling for iQiyi attempted server-side sizing failure
                     if attempted_server_side and platform == "爱奇艺":
                         # Try with original URL as fallback for iQiyi
-                        fallback_response = requests.get(base_url_to_download, headers=headers_to_use, timeout=20)
+                        fallback_response = self.fetch_image(base_url_to_download, headers_to_use, timeout=20)
                         
                         if fallback_response.status_code == 200:
                             response = fallback_response
@@ -3899,160 +2916,18 @@ class MultiPlatformImageDownloader(ctk.CTk):
         # Start the background thread
         threading.Thread(target=load_zoomed_image_async, daemon=True).start()
 
-    def find_youku_video_nodes(self, node_list, found_count, limit=100):
-        """递归遍历节点列表，查找并提取优酷影视结果信息，带有限制"""
-        found_results = []
-        if not isinstance(node_list, list):
+    def get_default_precise(self):
+        """界面中以精确搜索复选框为准"""
+        return self.precise_search_var.get()
 
-            return found_results
-        
-        # Stop recursion if limit is reached
-        if found_count[0] >= limit:
-
-             return found_results
-
-        for node in node_list:
-            if not isinstance(node, dict): continue
-
-            # Stop processing this level if limit is reached
-            if found_count[0] >= limit:
-                 break
-
-            node_data = node.get('data', {})
-            node_type = node.get('type')
-
-            is_target_node = isinstance(node_data, dict) and \
-                             'titleDTO' in node_data and \
-                             'posterDTO' in node_data and \
-                             ('thumbUrl' in node_data or node_data.get('posterDTO', {}).get('vThumbUrl'))
-
-            if is_target_node:
-                title = node_data.get('titleDTO', {}).get('displayName') or node_data.get('tempTitle')
-                vert_url = node_data.get('posterDTO', {}).get('vThumbUrl')
-                horz_url = node_data.get('thumbUrl')
-
-                if not horz_url and vert_url: horz_url = vert_url
-                if not vert_url and horz_url: vert_url = horz_url
-
-                if title and (horz_url or vert_url):
-                    if horz_url and isinstance(horz_url, str) and horz_url.startswith('//'):
-                        horz_url = 'https:' + horz_url
-                    if vert_url and isinstance(vert_url, str) and vert_url.startswith('//'):
-                        vert_url = 'https:' + vert_url
-
-                    found_results.append((title, horz_url, vert_url))
-                    found_count[0] += 1 # Increment count
-
-                    # Early exit check after incrementing
-                    if found_count[0] >= limit:
-    
-                         return found_results # Return immediately after reaching limit
-
-            # --- Recursively Search Child Nodes (only if limit not reached) ---
-            if found_count[0] < limit:
-                 child_nodes_direct = node.get('nodes', [])
-                 child_nodes_in_data = node_data.get('nodes', []) if isinstance(node_data, dict) else []
-
-                 if child_nodes_direct:
-                     found_results.extend(self.find_youku_video_nodes(child_nodes_direct, found_count, limit))
-                     # Check limit again after direct children recursion
-                     if found_count[0] >= limit: return found_results
-
-                 if child_nodes_in_data:
-                     found_results.extend(self.find_youku_video_nodes(child_nodes_in_data, found_count, limit))
-                     # Check limit again after data children recursion
-                     if found_count[0] >= limit: return found_results
-
-        return found_results
-
-    def search_youku(self, search_term):
+    def search_youku(self, search_term, precise=None):
         """执行优酷视频搜索 (从内嵌 __INITIAL_DATA__ JSON 提取 - 使用递归查找)"""
-        initial_results = []
+        if precise is None:
+            precise = self.get_default_precise()
         self.results = []
 
         try:
-            print(f"开始优酷搜索: {search_term}")
-            encoded_term = urllib.parse.quote(search_term)
-            search_url = f"https://so.youku.com/search/q_{encoded_term}"
-            response = requests.get(search_url, headers=self.youku_headers, timeout=20)
-            
-            if response.status_code == 200:
-                html_content = response.text
-
-                data_dict = None
-                json_string = None
-                json_data_match = re.search(r'window\.__INITIAL_DATA__\s*=\s*({.*?})\s*;', html_content, re.DOTALL)
-
-                if json_data_match:
-                    json_string = json_data_match.group(1)
-
-
-                    # --- 添加预处理步骤 ---
-                    try:
-                        # 1. 替换 new Date("...") 为 "..." (保留日期字符串，加引号)
-                        #    使用正则表达式匹配 new Date(...) 结构并提取引号内的内容
-                        processed_json_string = re.sub(r'new\s+Date\s*\(\s*"(.*?)"\s*\)', r'"\1"', json_string)
-
-                        # 2. 替换 JavaScript 的 undefined 为 JSON 的 null
-                        processed_json_string = processed_json_string.replace('undefined', 'null')
-
-                        # 3. (可选) 检查是否还有其他明显的非 JSON 模式需要替换，例如函数定义等
-                        # --- 预处理结束 ---
-
-                        # 使用处理后的字符串进行解析
-                        data_dict = json.loads(processed_json_string)
-
-                    except json.JSONDecodeError as e:
-
-                        self.status_label.configure(text="错误：解析优酷页面数据失败 (格式处理后)")
-                        messagebox.showerror("解析错误", f"尝试处理后，解析优酷页面数据仍然失败。\n错误: {e}")
-                        self.results = []
-                        self.update_results_list()
-                        return []
-                    except Exception as e_other:
-
-                        self.status_label.configure(text="错误：处理优酷数据时异常")
-                        self.results = []
-                        self.update_results_list()
-                        return []
-
-                else:
-
-                    self.status_label.configure(text="错误：无法获取优酷页面核心数据")
-                    messagebox.showerror("数据错误", "无法在优酷页面源码中找到 `window.__INITIAL_DATA__ = {...};` 结构。")
-                    self.results = []
-                    self.update_results_list()
-                    return []
-
-                # 此处继续处理成功解析的情况
-                if data_dict is None:
-
-                    self.results = []
-                    self.update_results_list()
-                    return []
-
-                try:
-                    top_level_nodes = data_dict.get('data', {}).get('nodes', [])
-                    found_count = [0]
-                    initial_results = self.find_youku_video_nodes(top_level_nodes, found_count, limit=50)
-                except Exception as e:
-                    initial_results = []
-
-            else:
-
-                self.status_label.configure(text=f"错误：无法访问优酷搜索页 ({response.status_code})")
-                messagebox.showerror("网络错误", f"访问优酷搜索页失败，状态码: {response.status_code}")
-                self.results = []
-                self.update_results_list()
-                return []
-
-            # --- 精确搜索过滤 (客户端) ---
-            if self.precise_search_var.get() and initial_results:
-                self.results = self.filter_results_by_title_similarity(initial_results, search_term, top_n=3)
-            else:
-                self.results = initial_results
-
-            pass
+            self.results = self.fetch_youku_results(search_term, precise)
 
             # --- 更新 GUI ---
             if not self.results:
@@ -4062,14 +2937,25 @@ class MultiPlatformImageDownloader(ctk.CTk):
 
             self.update_results_list()
 
+        except json.JSONDecodeError as e:
+            self.status_label.configure(text="错误：解析优酷页面数据失败 (格式处理后)")
+            messagebox.showerror("解析错误", f"尝试处理后，解析优酷页面数据仍然失败。\n错误: {e}")
+            self.results = []
+            self.update_results_list()
+            return []
         except requests.exceptions.RequestException as e:
-
+            self.status_label.configure(text="错误：无法访问优酷搜索页")
             messagebox.showerror("网络错误", f"无法连接到优酷或请求失败: {e}")
             self.results = []
             self.update_results_list()
             return []
+        except ValueError as e:
+            self.status_label.configure(text="错误：无法获取优酷页面核心数据")
+            messagebox.showerror("数据错误", str(e))
+            self.results = []
+            self.update_results_list()
+            return []
         except Exception as e:
-
             messagebox.showerror("处理错误", f"处理优酷搜索结果时出错: {e}")
             self.results = []
             self.update_results_list()
@@ -4077,137 +2963,9 @@ class MultiPlatformImageDownloader(ctk.CTk):
 
         return self.results
 
-    def filter_results_by_title_similarity(self, results, search_key, top_n=3):
-        """根据标题与搜索词的相似度过滤和排序结果 (通用)"""
-        # ... (Implementation remains the same) ...
-        if not results or not search_key:
-            return results[:top_n] if not search_key else results
-
-        scored_results = []
-        norm_key = self.normalize_text(search_key)
-
-        # Adapt to handle different tuple lengths if necessary, but expect (title, url1, url2) for Youku
-        for item in results:
-            title = item[0] # Assume title is always the first element
-            norm_title = self.normalize_text(title)
-            score = difflib.SequenceMatcher(None, norm_key, norm_title).ratio()
-            scored_results.append((score, item)) # Keep the original item tuple
-
-        scored_results.sort(key=lambda x: x[0], reverse=True)
-
-        # Return top N original items
-        return [item for score, item in scored_results[:top_n]]
-
-    def build_youku_vertical_sized_url(self, original_url, width, height):
-        """尝试构建优酷带尺寸参数的竖图URL (基于阿里云OSS规则)"""
-        if not original_url or width <= 0 or height <= 0:
-            return original_url # Return original if params are invalid or no URL
-
-        try:
-            parsed_url = urllib.parse.urlparse(original_url)
-            query_params = urllib.parse.parse_qs(parsed_url.query)
-
-            # OSS process parameter key
-            process_key = 'x-oss-process'
-            new_actions = []
-
-            if process_key in query_params:
-                # Existing process parameter found
-                current_process_val = query_params[process_key][0]
-                # Split actions like 'image/resize,w_412,h_600/quality,q_90'
-                actions = current_process_val.split('/')
-                has_resize = False
-                for action in actions:
-                    if action.startswith('image/resize'):
-                         # Modify existing resize action
-                         # Keep existing options like m_fill etc. if present
-                         parts = action.split(',')
-                         new_parts = [parts[0]] # Keep 'image/resize'
-                         # Add new width/height, replacing old ones
-                         new_parts.append(f'w_{width}')
-                         new_parts.append(f'h_{height}')
-                         # Keep other options if they existed
-                         for part in parts[1:]:
-                              if not part.startswith('w_') and not part.startswith('h_'):
-                                   new_parts.append(part)
-                         new_actions.append(','.join(new_parts))
-                         has_resize = True
-                    elif action.strip(): # Keep other non-empty actions
-                         new_actions.append(action)
-
-                if not has_resize:
-                    # Add new resize action if none existed
-                    new_actions.insert(0, f'image/resize,w_{width},h_{height}') # Add at beginning
-            else:
-                # No existing process parameter, create a new one
-                new_actions.append(f'image/resize,w_{width},h_{height}')
-
-            # Reconstruct the process string
-            new_process_val = '/'.join(new_actions)
-
-            # Update query parameters
-            query_params[process_key] = [new_process_val]
-
-            # Rebuild the query string
-            new_query_string = urllib.parse.urlencode(query_params, doseq=True)
-
-            # Reconstruct the full URL
-            sized_url = urllib.parse.urlunparse((
-                parsed_url.scheme,
-                parsed_url.netloc,
-                parsed_url.path,
-                parsed_url.params,
-                new_query_string,
-                parsed_url.fragment
-            ))
-            return sized_url
-
-        except Exception as e:
-            return original_url # Fallback to original URL on any error
 
     # --- Settings Methods ---
 
-    def get_default_settings(self):
-        """Returns a dictionary with default settings."""
-        return {
-            "default_platform": "爱奇艺",
-            "default_precise": False,
-            "default_download_type": "全部",
-            "default_path": os.path.join(os.path.expanduser("~"), "Desktop"),
-            "default_poster_size": "原尺寸",  # 更新为原尺寸，与UI配色优化后的默认值一致
-            "default_vertical_size": "412x600",
-            "default_horizontal_size": "528x296",
-            "filename_format": "{标题}_{类型}_{图片尺寸}",
-            "batch_search_priority": [
-                "优酷视频-精确搜索", "爱奇艺-精确搜索", "爱奇艺-普通搜索"
-            ],
-            "batch_horizontal_path": os.path.join(os.path.expanduser("~"), "Desktop", "横图"),
-            "batch_vertical_path": os.path.join(os.path.expanduser("~"), "Desktop", "竖图"),
-            "delete_horizontal_path": os.path.join(os.path.expanduser("~"), "Desktop", "横图"),  # 添加删除路径配置
-            "delete_vertical_path": os.path.join(os.path.expanduser("~"), "Desktop", "竖图"),    # 添加删除路径配置
-            "batch_default_size": "原尺寸",  # 更新为原尺寸
-            "batch_default_vertical_size": "412x600",
-            "batch_default_horizontal_size": "528x296",
-            "iqiyi_cookie": "", # Start empty
-            "tencent_cookie": "",
-            "youku_cookie": ""
-        }
-
-    def load_settings(self):
-        """Loads settings from config.json, returning defaults if file not found or invalid."""
-        defaults = self.get_default_settings()
-        try:
-            if os.path.exists(self.config_file):
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    loaded_settings = json.load(f)
-                # Ensure all keys exist by merging with defaults
-                settings = {**defaults, **loaded_settings}
-                return settings
-            else:
-                return defaults
-        except (json.JSONDecodeError, IOError) as e:
-            return defaults
-
     def save_settings(self):
         """Saves the current settings from the settings window to config.json."""
         if not hasattr(self, 'settings_window') or not self.settings_window.winfo_exists():
@@ -4235,8 +2993,8 @@ class MultiPlatformImageDownloader(ctk.CTk):
                  # Don't proceed with save yet, let user correct if needed or save again
                  return # Stop saving if format is invalid
 
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(settings_to_save, f, ensure_ascii=False, indent=4)
+            # 与已有配置合并，保留界面上没有的配置项（如并发数、平台限速），并刷新设置缓存
+            self.save_settings_file(settings_to_save)
 
             # --- Apply changes immediately to the running application ---
             new_default_platform = settings_to_save["default_platform"]
@@ -4260,13 +3018,11 @@ class MultiPlatformImageDownloader(ctk.CTk):
             # --- End Apply Changes ---
 
 
-
             self.settings_window.destroy() # Close settings window after saving
 
         except Exception as e:
             messagebox.showerror("保存错误", f"保存设置时出错: {e}", parent=self.settings_window)
 
-
     def open_settings_window(self):
         """Opens the settings configuration window."""
         if hasattr(self, 'settings_window') and self.settings_window.winfo_exists():
@@ -4511,8 +3267,7 @@ class MultiPlatformImageDownloader(ctk.CTk):
         """加载Excel文件的Sheet名称"""
         try:
             # 获取所有sheet名称
-            excel_file = pd.ExcelFile(self.excel_file_path)
-            sheet_names = excel_file.sheet_names
+            sheet_names = list_excel_sheets(self.excel_file_path)
             
             # 更新ComboBox
             self.batch_sheet_combo.configure(values=sheet_names)
@@ -4531,10 +3286,11 @@ class MultiPlatformImageDownloader(ctk.CTk):
                 if selected_sheet is None:
                     selected_sheet = sheet_names[0]
                 
+                self.status_label.configure(text=f"批量爬取Excel文件已加载，找到 {len(sheet_names)} 个Sheet")
                 self.batch_sheet_combo.set(selected_sheet)
-                self.on_sheet_change(selected_sheet)
-            
-            self.status_label.configure(text=f"批量爬取Excel文件已加载，找到 {len(sheet_names)} 个Sheet")
+                self.on_sheet_change(selected_sheet)  # 状态栏显示该Sheet的加载用时
+            else:
+                self.status_label.configure(text="批量爬取Excel文件中没有Sheet")
             
         except Exception as e:
             messagebox.showerror("错误", f"加载Excel文件失败: {str(e)}")
@@ -4543,8 +3299,11 @@ class MultiPlatformImageDownloader(ctk.CTk):
     def on_sheet_change(self, selected_sheet):
         """当Sheet选择变化时，更新表格预览"""
         try:
-            # 读取选中的sheet
-            self.batch_df = pd.read_excel(self.excel_file_path, sheet_name=selected_sheet)
+            # 流式读取选中的sheet，只保留影片名称、CID和结果列
+            start_time = time.perf_counter()
+            self.batch_df, self.batch_excel_rows = read_excel_sheet(
+                self.excel_file_path, selected_sheet, select=self.select_batch_columns)
+            load_seconds = time.perf_counter() - start_time
             
             # 确保有必要的列
             if len(self.batch_df.columns) < 2:
@@ -4559,42 +3318,46 @@ class MultiPlatformImageDownloader(ctk.CTk):
             if "标题不一致" not in self.batch_df.columns:
                 self.batch_df["标题不一致"] = False
             
+            # 打开该Sheet的进度日志，恢复上次未写入Excel的处理结果
+            if self.batch_journal is not None:
+                self.batch_journal.close()
+            self.batch_journal = BatchJournal(self.get_batch_journal_path(selected_sheet))
+            self.current_batch_row = 0
+            self.batch_completed_rows = set()
+            restored_rows = self.restore_batch_journal()
+            
             # 切换到批量爬取模式显示
             if self.current_table_mode != "batch":
                 self.setup_table_columns("batch")
             
-            # 清空表格
-            for item in self.batch_tree.get_children():
-                self.batch_tree.delete(item)
-            
-            # 填充表格数据
-            for index, row in self.batch_df.iterrows():
-                sequence_num = index + 1  # 序号从1开始
-                movie_name = str(row.iloc[0]) if pd.notna(row.iloc[0]) else ""
-                cid = str(row.iloc[1]) if pd.notna(row.iloc[1]) else ""
-                title = str(row.get("获取图片标题", "")) if pd.notna(row.get("获取图片标题", "")) else ""
-                status = str(row.get("处理状态", "")) if pd.notna(row.get("处理状态", "")) else ""
-                
-                # 插入行数据
-                item_id = self.batch_tree.insert("", "end", values=(sequence_num, movie_name, cid, title, status))
-                
-                # 检查已有数据是否标题不一致
-                title_mismatch = row.get("标题不一致", False)
-                if title_mismatch and pd.notna(title_mismatch) and title_mismatch:
-                    self.batch_tree.item(item_id, tags=("mismatch",))
+            # 填充表格数据（只渲染第一页）
+            with self.batch_table_flush_lock:
+                self.batch_dirty_rows.clear()
+            self.batch_table_follow = True
+            self.show_batch_table_page(0)
             
             # 启用开始按钮
             self.batch_start_button.configure(state="normal")
-            self.batch_progress_label.configure(text=f"已加载 {len(self.batch_df)} 条数据，可以开始批量爬取")
-            
-            # 重置进度
-            self.current_batch_row = 0
-            self.batch_progress_bar.set(0)
+            if restored_rows:
+                done = self.current_batch_row + len(self.batch_completed_rows)
+                self.batch_progress_label.configure(
+                    text=f"已加载 {len(self.batch_df)} 条数据，从进度日志恢复 {restored_rows} 行，将从第 {self.current_batch_row + 1} 行继续")
+                self.batch_progress_bar.set(done / len(self.batch_df) if len(self.batch_df) else 0)
+            else:
+                self.batch_progress_label.configure(text=f"已加载 {len(self.batch_df)} 条数据，可以开始批量爬取")
+                self.batch_progress_bar.set(0)
+            self.update_status(f"已加载Sheet「{selected_sheet}」{len(self.batch_df)} 行，用时 {load_seconds:.2f} 秒")
             
         except Exception as e:
             messagebox.showerror("错误", f"加载Sheet数据失败: {str(e)}")
             self.status_label.configure(text="Sheet数据加载失败")
 
+    def select_batch_columns(self, header):
+        """批量爬取只需要影片名称列、CID列和已有的结果列，其它列保留在Excel中不读取"""
+        columns = [find_movie_name_column(header), find_cid_column(header)]
+        columns += [col for col in BATCH_RESULT_COLUMNS if col in header and col not in columns]
+        return columns
+
     def start_batch_crawling(self):
         """开始批量爬取"""
         if self.batch_df is None or len(self.batch_df) == 0:
@@ -4616,280 +3379,318 @@ class MultiPlatformImageDownloader(ctk.CTk):
             messagebox.showerror("错误", f"创建保存目录失败: {str(e)}")
             return
         
+        # 生成本次批量的设置快照，暂停后继续也沿用同一快照，运行期间修改设置不影响本次批量
+        try:
+            self.batch_options = self.get_batch_download_options()
+        except ValueError as e:
+            messagebox.showerror("输入错误", f"批量设置无效: {e}")
+            return
+        self.batch_sheet_name = self.batch_sheet_combo.get()
+        self.batch_stats = None  # 新批量重新统计
+        self.batch_stats_path = self.get_batch_stats_path(self.batch_sheet_name)
+        
         # 设置处理状态
         self.is_batch_processing = True
         self.batch_paused = False
+        self.batch_table_follow = True
         
         # 更新按钮状态
         self.batch_start_button.configure(state="disabled")
-        self.batch_pause_button.configure(state="normal")
+        self.batch_pause_button.configure(state="normal", text="暂停爬取")
         
         # 启动后台线程
-        self.batch_thread = threading.Thread(target=self.batch_crawling_worker, daemon=True)
+        self.batch_thread = threading.Thread(target=self.batch_crawling_worker, args=(self.batch_options,), daemon=True)
         self.batch_thread.start()
         
         self.status_label.configure(text="批量爬取已开始...")
 
-    def batch_crawling_worker(self):
+    def batch_crawling_worker(self, options):
+        """批量爬取协调线程：按行投喂流水线（见 PosterEngine.start_batch_pipeline），
+        汇总结果并更新表格/进度/检查点。options 为开始时生成的设置快照（build_batch_options）。
+        只有协调线程会写 batch_df，工作线程只处理自己那一行的状态字典。
+        """
         print("[batch_crawling_worker] 启动批量爬取线程")
         total_rows = len(self.batch_df)
+        stop_event = threading.Event()
+        pipeline = None
+        finished = False
+        report_text = ""
         try:
             cid_col = self.get_cid_column()
             name_col = self.get_movie_name_column()
             print(f"[batch_crawling_worker] DataFrame列名: {self.batch_df.columns.tolist()}")
-            for i in range(self.current_batch_row, total_rows):
-                self.current_batch_row = i
-                row = self.batch_df.iloc[i]
-                movie_name = str(row[name_col]) if pd.notna(row[name_col]) else ""
-                cid = str(row[cid_col]) if pd.notna(row[cid_col]) else ""
-                if not movie_name or not cid:
-                    self.batch_df.at[i, "处理状态"] = "跳过"
-                    self.after(0, lambda idx=i: self.update_table_row(idx))
+
+            # 设置和界面参数已在开始时读取为快照，工作线程不再访问Tk控件
+            # 暂停后继续时沿用本次批量的统计（batch_stats），开始新批量时在 start_batch_crawling 中清空
+            pipeline = self.start_batch_pipeline(options, stop_event, stats=self.batch_stats)
+            search_q = pipeline["search_q"]
+            result_q = pipeline["result_q"]
+
+            # 同名影片（normalize_text 后相同）只搜索、下载一次，图片复制到每一行的CID文件名
+            names = self.batch_df[name_col].tolist()
+            cids = self.batch_df[cid_col].tolist()
+            pending_rows = self.group_batch_rows(
+                (i, str(names[i]) if pd.notna(names[i]) else "", str(cids[i]) if pd.notna(cids[i]) else "")
+                for i in range(self.current_batch_row, total_rows)
+                if i not in self.batch_completed_rows
+            )
+            duplicate_count = sum(len(followers) for _, _, _, followers in pending_rows)
+            if duplicate_count:
+                print(f"[batch_crawling_worker] {duplicate_count} 行与前面的影片同名，将复用其搜索和下载结果")
+            next_pos = 0
+            in_flight = 0
+            max_in_flight = pipeline["max_in_flight"]
+            stats_refresh_time = 0
+
+            while True:
+                # 投喂新行（暂停时停止投喂，只等待在途的行处理完）
+                while not self.batch_paused and next_pos < len(pending_rows) and in_flight < max_in_flight:
+                    i, movie_name, cid, followers = pending_rows[next_pos]
+                    next_pos += 1
+                    if not movie_name or not cid:
+                        self.batch_df.at[i, "处理状态"] = "跳过"
+                        self.batch_stats.record_row(False)
+                        self.update_table_row(i)
+                        self._journal_batch_row(i, cid)
+                        self._mark_batch_row_done(i, total_rows)
+                        continue
+                    for row_index in [i] + [index for index, _, _ in followers]:
+                        self.batch_df.at[row_index, "处理状态"] = "处理中..."
+                        self.update_table_row(row_index)
+                    self.after(0, lambda name=movie_name: self.update_status(f"正在处理: {name}"))
+                    search_q.put(self._new_batch_row_state(i, movie_name, cid, followers))
+                    in_flight += 1
+
+                with self.batch_state_lock:
+                    if in_flight == 0 and (self.batch_paused or next_pos >= len(pending_rows)):
+                        finished = next_pos >= len(pending_rows)
+                        self.is_batch_processing = False
+                        break
+
+                try:
+                    state = result_q.get(timeout=0.2)
+                except queue.Empty:
                     continue
-                self.batch_df.at[i, "处理状态"] = "处理中..."
-                self.after(0, lambda idx=i: self.update_table_row(idx))
-                self.after(0, lambda: self.update_status(f"正在处理: {movie_name}"))
-                result, successful_platform = self.search_with_priority(movie_name)
-                if result:
-                    print(f"搜索成功，开始下载图片: {movie_name}，成功平台: {successful_platform}")
-                    success = self.batch_download_images(result, cid, movie_name, successful_platform)
-                    if success:
-                        obtained_title = result[0]
-                        self.batch_df.at[i, "获取图片标题"] = obtained_title
-                        self.batch_df.at[i, "处理状态"] = "✔成功"
-                        if self.normalize_text(movie_name) != self.normalize_text(obtained_title):
-                            self.batch_df.at[i, "标题不一致"] = True
-                        else:
-                            self.batch_df.at[i, "标题不一致"] = False
-                    else:
-                        fail_reason = self.batch_df.loc[self.batch_df[cid_col] == cid, "处理状态"].values
-                        if len(fail_reason) > 0 and fail_reason[0].startswith("✘失败:"):
-                            self.batch_df.at[i, "处理状态"] = fail_reason[0]
-                        else:
-                            self.batch_df.at[i, "处理状态"] = "✘失败:未知原因"
-                else:
-                    self.batch_df.at[i, "处理状态"] = "✘失败:未搜索到结果"
-                
-                # 更新表格
-                self.after(0, lambda idx=i: self.update_table_row(idx))
-                
-                # 更新进度
-                progress = (i + 1) / total_rows
-                self.after(0, lambda p=progress: self.safe_set_progress(p))
-                self.after(0, lambda p=progress: self.safe_set_progress_label(p, i, total_rows))
-                
-                # 每5行保存一次Excel
-                if (i + 1) % 5 == 0 or i == total_rows - 1:
-                    self.save_batch_results()
-                
-                # 延迟2-3秒
-                time.sleep(random.uniform(2, 3))
+                in_flight -= 1
+                for index, cid, status, obtained_title, mismatch in self.summarize_batch_rows(state):
+                    self._apply_batch_row_result(index, status, obtained_title, mismatch)
+                    self.batch_stats.record_row(status == "✔成功")
+                    # 每行追加写进度日志，Excel 只在暂停/完成时整体保存
+                    self._journal_batch_row(index, cid)
+                    self._mark_batch_row_done(index, total_rows)
+                # 分阶段统计每秒刷新一次
+                if time.monotonic() - stats_refresh_time >= 1:
+                    stats_refresh_time = time.monotonic()
+                    stats_text = self.batch_stats.summary_text()
+                    self.after(0, lambda t=stats_text: self.safe_set_batch_stats(t))
+
+            self.save_batch_results()
         except Exception as e:
             error_msg = f"批量爬取过程中发生严重错误，已停止。\n\n错误详情: {e}"
             self.after(0, lambda: messagebox.showerror("批量处理失败", error_msg))
         finally:
-            self.is_batch_processing = False
+            # 通知各阶段线程退出
+            if pipeline is not None:
+                self.stop_batch_pipeline(pipeline)
+                report_text = self.write_batch_stats_report()
+                stats_text = self.batch_stats.summary_text()
+                self.after(0, lambda t=stats_text: self.safe_set_batch_stats(t))
+            with self.batch_state_lock:
+                self.is_batch_processing = False
             self.batch_thread = None
             self.after(0, lambda: self.safe_enable_batch_start())
-            self.after(0, lambda: self.safe_disable_batch_pause())
-            self.after(0, lambda: self.update_status("批量爬取完成"))
-            self.after(0, self.ask_open_excel_file)
-
-    def search_with_priority(self, movie_name):
-        """按设置中的优先级搜索"""
-        # 从设置中获取搜索优先级
-        settings = self.load_settings()
-        priority_list = settings.get("batch_search_priority", [
-            "优酷视频-精确搜索",
-            "爱奇艺-精确搜索", 
-            "爱奇艺-普通搜索"
-        ])
-        
-        # 转换优先级设置为搜索配置
-        search_configs = []
-        for priority_item in priority_list:
-            if priority_item == "优酷视频-精确搜索":
-                search_configs.append(("优酷视频", True))
-            elif priority_item == "优酷视频-普通搜索":
-                search_configs.append(("优酷视频", False))
-            elif priority_item == "爱奇艺-精确搜索":
-                search_configs.append(("爱奇艺", True))
-            elif priority_item == "爱奇艺-普通搜索":
-                search_configs.append(("爱奇艺", False))
-            elif priority_item == "腾讯视频-精确搜索":
-                search_configs.append(("腾讯视频", True))
-            elif priority_item == "腾讯视频-普通搜索":
-                search_configs.append(("腾讯视频", False))
-        
-        for platform, precise in search_configs:
-            # 检查是否暂停
-            if self.batch_paused:
-                return None
-            
-            # 设置平台和精确搜索模式
-            old_platform = self.selected_platform
-            old_precise = self.precise_search_var.get()
-            
-            self.selected_platform = platform
-            self.precise_search_var.set(precise)
-            
-            try:
-                # 执行搜索
-                if platform == "优酷视频":
-                    results = self.search_youku(movie_name)
-                elif platform == "爱奇艺":
-                    results = self.search_iqiyi(movie_name)
-                elif platform == "腾讯视频":
-                    results = self.search_tencent(movie_name)
-                else:
-                    results = []
-                
-                # 如果找到结果，返回第一个结果和成功的平台
-                if results and len(results) > 0:
-                    print(f"找到结果: {results[0][0] if results[0] else '无标题'}")
-                    # 不恢复原设置，保持成功搜索的平台
-                    return results[0], platform
-                else:
-                    print(f"平台 {platform} 未找到结果")
-                
-                # 平台切换延迟1-2秒
-                time.sleep(random.uniform(1, 2))
-                
-            except Exception as e:
-                print(f"搜索平台 {platform} 出错: {e}")
-                print(f"错误详情: {traceback.format_exc()}")
-                continue
-        
-        # 所有平台都未找到结果，恢复原设置
-        self.selected_platform = old_platform
-        self.precise_search_var.set(old_precise)
-        print(f"所有平台都未找到结果: {movie_name}")
-        return None, None
-
-    def batch_download_images(self, result, cid, movie_name, platform=None):
-        print(f"[batch_download_images] result={result}, cid={cid}, movie_name={movie_name}")
+            if self.batch_paused and not finished:
+                self.after(0, lambda: self.update_status("批量爬取已暂停"))
+            else:
+                self.after(0, lambda: self.safe_disable_batch_pause())
+                cache_text = "  ".join(t for t in (
+                    self.batch_save_text,
+                    report_text,
+                    self.get_search_cache_stats_text(),
+                    self.get_transfer_stats_text(),
+                    self.get_connection_stats_text(),
+                ) if t)
+                print(f"[batch_crawling_worker] 连接复用: {self.http.stats()}")
+                self.after(0, lambda: self.update_status(f"批量爬取完成  {cache_text}".strip()))
+                self.after(0, self.ask_open_excel_file)
+
+    def _apply_batch_row_result(self, i, status, obtained_title, mismatch):
+        """把一行的处理结果写回 batch_df 并刷新表格（仅在协调线程中调用）"""
+        self.batch_df.at[i, "处理状态"] = status
+        if obtained_title is not None:
+            self.batch_df.at[i, "获取图片标题"] = obtained_title
+            self.batch_df.at[i, "标题不一致"] = mismatch
+        self.update_table_row(i)
+
+    def _mark_batch_row_done(self, index, total_rows):
+        """记录完成的行，推进连续完成的检查点 current_batch_row 并更新进度"""
+        self.batch_completed_rows.add(index)
+        while self.current_batch_row in self.batch_completed_rows:
+            self.batch_completed_rows.discard(self.current_batch_row)
+            self.current_batch_row += 1
+        done = min(total_rows, self.current_batch_row + len(self.batch_completed_rows))
+        progress = done / total_rows if total_rows else 1
+        self.after(0, lambda p=progress: self.safe_set_progress(p))
+        speed_text = self.get_transfer_stats_text()
+        self.after(0, lambda p=progress, d=done, t=speed_text: self.safe_set_progress_label(p, d - 1, total_rows, t))
+
+    def get_batch_stats_path(self, sheet_name):
+        """统计报告与Excel放在同一目录：<Excel文件名>.<Sheet名>.stats.json / .stats.csv"""
+        return f"{self.excel_file_path}.{self.sanitize_filename(str(sheet_name))}.stats"
+
+    def write_batch_stats_report(self):
+        """把本次批量的分阶段统计导出为 JSON/CSV，返回用于状态栏的说明文字"""
+        if self.batch_stats is None or not self.batch_stats_path:
+            return ""
         try:
-            cid_col = self.get_cid_column()
-            selected_preset = self.batch_preset_combo.get()
-            v_size = self.size_presets[selected_preset]["vertical"]
-            h_size = self.size_presets[selected_preset]["horizontal"]
-            if selected_preset == "原尺寸":
-                v_size = (-1, -1)
-                h_size = (-1, -1)
-            h_dir = self.batch_h_path_entry.get().strip()
-            v_dir = self.batch_v_path_entry.get().strip()
-            download_type = self.batch_orientation_var.get()
-            
-            # 使用传入的platform参数，如果没有则使用当前选择的平台
-            if platform is None:
-                platform = self.selected_platform
-            print(f"使用平台: {platform}")
-            if platform == "优酷视频" and len(result) == 3:
-                title, horz_url, vert_url = result
-                success_count = 0
-                fail_reason = ""
-                if (download_type == "全部" or download_type == "竖图") and vert_url:
-                    ok, reason = self.download_image_batch(vert_url, cid, v_dir, platform, v_size[0], v_size[1], "竖图")
-                    print(f"[batch_download_images] 竖图: ok={ok}, reason={reason}")
-                    if ok:
-                        success_count += 1
-                    else:
-                        fail_reason = reason
-                if (download_type == "全部" or download_type == "横图") and horz_url:
-                    ok, reason = self.download_image_batch(horz_url, cid, h_dir, platform, h_size[0], h_size[1], "横图")
-                    print(f"[batch_download_images] 横图: ok={ok}, reason={reason}")
-                    if ok:
-                        success_count += 1
-                    else:
-                        fail_reason = reason
-                if success_count > 0:
-                    return True
-                else:
-                    # 写入失败原因
-                    self.batch_df.loc[self.batch_df[cid_col] == cid, "处理状态"] = f"✘失败:{fail_reason}"
-                    return False
-            elif len(result) == 2:
-                title, img_url = result
-                success_count = 0
-                fail_reason = ""
-                if (download_type == "全部" or download_type == "竖图"):
-                    ok, reason = self.download_image_batch(img_url, cid, v_dir, platform, v_size[0], v_size[1], "竖图")
-                    print(f"[batch_download_images] 竖图: ok={ok}, reason={reason}")
-                    if ok:
-                        success_count += 1
-                    else:
-                        fail_reason = reason
-                if (download_type == "全部" or download_type == "横图") and platform != "腾讯视频":
-                    ok, reason = self.download_image_batch(img_url, cid, h_dir, platform, h_size[0], h_size[1], "横图")
-                    print(f"[batch_download_images] 横图: ok={ok}, reason={reason}")
-                    if ok:
-                        success_count += 1
-                    else:
-                        fail_reason = reason
-                if success_count > 0:
-                    return True
-                else:
-                    self.batch_df.loc[self.batch_df[cid_col] == cid, "处理状态"] = f"✘失败:{fail_reason}"
-                    return False
-            return False
-        except Exception as e:
-            print(f"[batch_download_images] 批量下载异常: {e}\n{traceback.format_exc()}")
-            cid_col = self.get_cid_column() if hasattr(self, 'get_cid_column') else 'CID'
-            self.batch_df.loc[self.batch_df[cid_col] == cid, "处理状态"] = f"✘失败:{e}"
-            return False
-
-    def download_image_batch(self, base_url, cid, save_dir, platform, width, height, img_type):
-        print(f"[download_image_batch] base_url={base_url}, cid={cid}, save_dir={save_dir}, platform={platform}, width={width}, height={height}, img_type={img_type}")
+            json_path, csv_path = self.batch_stats.write_report(self.batch_stats_path)
+        except OSError as e:
+            print(f"[batch_crawling_worker] 统计报告保存失败: {e}")
+            return ""
+        print(f"[batch_crawling_worker] 统计报告已保存: {json_path}, {csv_path}")
+        return f"统计报告: {os.path.basename(json_path)}"
+
+    def get_batch_journal_path(self, sheet_name):
+        """进度日志与Excel放在同一目录：<Excel文件名>.<Sheet名>.progress.jsonl"""
+        return f"{self.excel_file_path}.{self.sanitize_filename(str(sheet_name))}.progress.jsonl"
+
+    def _journal_batch_row(self, index, cid):
+        """把一行的处理结果追加写入进度日志"""
+        if self.batch_journal is None:
+            return
+        row = self.batch_df.iloc[index]
+        title = row.get("获取图片标题", "")
+        mismatch = row.get("标题不一致", False)
         try:
-            filename = self.sanitize_filename(cid) + ".jpg"
-            file_path = os.path.join(save_dir, filename)
-            print(f"[download_image_batch] file_path={file_path}, exists={os.path.exists(file_path)}")
-            if os.path.exists(file_path):
-                print(f"[download_image_batch] 文件已存在，跳过: {file_path}")
-                return True, ""
-            size_str = "原始尺寸" if width == -1 and height == -1 else f"{width}x{height}"
-            ok, reason = self.download_image(
-                base_url, 
-                cid,  # 使用CID作为标题
-                save_dir, 
-                suffix=None,  # 批量模式不需要后缀
-                size_str=size_str,
-                platform=platform,
-                target_width=width,
-                target_height=height,
-                img_type=img_type,
-                use_cid_filename=True
-            )
-            print(f"[download_image_batch] download_image return: ok={ok}, reason={reason}")
-            return ok, reason
+            self.batch_journal.append({
+                "row": int(index),
+                "cid": cid,
+                "status": str(row.get("处理状态", "")),
+                "title": str(title) if pd.notna(title) else "",
+                "mismatch": bool(mismatch) if pd.notna(mismatch) else False,
+                "time": time.time(),
+            })
         except Exception as e:
-            print(f"[download_image_batch] 批量下载异常: {e}\n{traceback.format_exc()}")
-            return False, f"批量下载异常:{e}"
+            print(f"写入进度日志失败: {e}")
+
+    def restore_batch_journal(self):
+        """用进度日志恢复上次未保存进Excel的处理结果，返回恢复的行数。
+        恢复后 current_batch_row / batch_completed_rows 指向第一个未完成的行。
+        """
+        if self.batch_journal is None:
+            return 0
+        records = self.batch_journal.load()
+        if not records:
+            return 0
+        cid_col = self.get_cid_column()
+        done = set()
+        for index, record in records.items():
+            if index >= len(self.batch_df):
+                continue
+            cid = self.batch_df.at[index, cid_col]
+            cid = str(cid) if pd.notna(cid) else ""
+            if cid != str(record.get("cid", "")):
+                continue  # 表格行顺序已变化，不套用这条记录
+            status = record.get("status", "")
+            self.batch_df.at[index, "处理状态"] = status
+            self.batch_df.at[index, "获取图片标题"] = record.get("title", "")
+            self.batch_df.at[index, "标题不一致"] = bool(record.get("mismatch", False))
+            if status and status != "处理中...":
+                done.add(index)
+        self.current_batch_row = 0
+        while self.current_batch_row in done:
+            self.current_batch_row += 1
+        self.batch_completed_rows = {i for i in done if i > self.current_batch_row}
+        return len(done)
+
+    def get_batch_download_options(self, settings=None):
+        """读取批量下载相关的界面参数和设置，生成只读快照（需在主线程调用），参数无效时抛出 ValueError"""
+        if settings is None:
+            settings = self.load_settings()
+        preset_name = self.batch_preset_combo.get()
+        custom_sizes = None
+        if preset_name == "自定义尺寸":
+            custom_sizes = (self.batch_v_size_entry.get().strip(), self.batch_h_size_entry.get().strip())
+        return self.build_batch_options(
+            settings,
+            preset_name,
+            self.batch_h_path_entry.get().strip(),
+            self.batch_v_path_entry.get().strip(),
+            self.batch_orientation_var.get(),
+            custom_sizes=custom_sizes,
+        )
+
+    def batch_row_values(self, row_index):
+        """生成批量表格中一行的显示值和是否标题不一致"""
+        row_data = self.batch_df.iloc[row_index]
+        sequence_num = row_index + 1  # 序号从1开始
+        movie_name = str(row_data.iloc[0]) if pd.notna(row_data.iloc[0]) else ""
+        cid = str(row_data.iloc[1]) if pd.notna(row_data.iloc[1]) else ""
+        title = str(row_data.get("获取图片标题", "")) if pd.notna(row_data.get("获取图片标题", "")) else ""
+        status = str(row_data.get("处理状态", "")) if pd.notna(row_data.get("处理状态", "")) else ""
+        title_mismatch = row_data.get("标题不一致", False)
+        mismatch = bool(title_mismatch and pd.notna(title_mismatch) and title_mismatch)
+        return (sequence_num, movie_name, cid, title, status), mismatch
+
+    def show_batch_table_page(self, page):
+        """渲染批量表格的指定页，并重建 行号 -> Treeview项 映射"""
+        if self.batch_df is None or not self.batch_tree.winfo_exists():
+            return
+        page_count = max(1, math.ceil(len(self.batch_df) / BATCH_TABLE_PAGE_SIZE))
+        self.batch_table_page = min(max(0, page), page_count - 1)
+        start = self.batch_table_page * BATCH_TABLE_PAGE_SIZE
+        stop = min(start + BATCH_TABLE_PAGE_SIZE, len(self.batch_df))
+        
+        self.batch_tree.delete(*self.batch_tree.get_children())
+        self.batch_tree_items = {}
+        for row_index in range(start, stop):
+            values, mismatch = self.batch_row_values(row_index)
+            self.batch_tree_items[row_index] = self.batch_tree.insert(
+                "", "end", values=values, tags=("mismatch",) if mismatch else ())
+        
+        self.batch_page_label.configure(
+            text=f"第 {self.batch_table_page + 1}/{page_count} 页（{start + 1 if stop else 0}-{stop} 行）")
+        self.batch_prev_page_button.configure(state="normal" if self.batch_table_page > 0 else "disabled")
+        self.batch_next_page_button.configure(state="normal" if self.batch_table_page < page_count - 1 else "disabled")
+
+    def change_batch_table_page(self, delta):
+        """手动翻页；翻页后不再自动跟随处理进度，直到下次开始爬取"""
+        self.batch_table_follow = False
+        self.show_batch_table_page(self.batch_table_page + delta)
 
     def update_table_row(self, row_index):
-        """更新表格中指定行的数据"""
+        """标记表格中指定行需要刷新（可在任意线程调用），每 BATCH_TABLE_FLUSH_MS 毫秒合并刷新一次"""
+        with self.batch_table_flush_lock:
+            self.batch_dirty_rows.add(row_index)
+            if self.batch_table_flush_scheduled:
+                return
+            self.batch_table_flush_scheduled = True
+        self.after(BATCH_TABLE_FLUSH_MS, self._flush_table_rows)
+
+    def _flush_table_rows(self):
+        """主线程中批量刷新标记过的行，只更新当前页中存在的行"""
+        with self.batch_table_flush_lock:
+            self.batch_table_flush_scheduled = False
+            dirty_rows = self.batch_dirty_rows
+            self.batch_dirty_rows = set()
         try:
-            if self.current_table_mode != "batch":
+            if self.current_table_mode != "batch" or self.batch_df is None:
                 return
             if not hasattr(self, "batch_tree") or not self.batch_tree.winfo_exists():
                 return  # 控件已销毁
-            items = self.batch_tree.get_children()
-            if row_index < len(items):
-                item = items[row_index]
-                row_data = self.batch_df.iloc[row_index]
-                sequence_num = row_index + 1  # 序号从1开始
-                movie_name = str(row_data.iloc[0]) if pd.notna(row_data.iloc[0]) else ""
-                cid = str(row_data.iloc[1]) if pd.notna(row_data.iloc[1]) else ""
-                title = str(row_data.get("获取图片标题", "")) if pd.notna(row_data.get("获取图片标题", "")) else ""
-                status = str(row_data.get("处理状态", "")) if pd.notna(row_data.get("处理状态", "")) else ""
-                self.batch_tree.item(item, values=(sequence_num, movie_name, cid, title, status))
-                title_mismatch = row_data.get("标题不一致", False)
-                if title_mismatch and pd.notna(title_mismatch) and title_mismatch:
-                    self.batch_tree.set(item, "获取图片标题", title)
-                    self.batch_tree.item(item, tags=("mismatch",))
-                else:
-                    self.batch_tree.item(item, tags=())
-                self.batch_tree.see(item)
+            latest = max(dirty_rows, default=None)
+            if (self.batch_table_follow and latest is not None
+                    and latest // BATCH_TABLE_PAGE_SIZE != self.batch_table_page):
+                # 处理进度进入下一页，整页重新渲染即可
+                self.show_batch_table_page(latest // BATCH_TABLE_PAGE_SIZE)
+            for row_index in dirty_rows:
+                item = self.batch_tree_items.get(row_index)
+                if item is None:
+                    continue
+                values, mismatch = self.batch_row_values(row_index)
+                self.batch_tree.item(item, values=values, tags=("mismatch",) if mismatch else ())
+            if self.batch_table_follow and latest in self.batch_tree_items:
+                self.batch_tree.see(self.batch_tree_items[latest])
         except Exception as e:
             pass
 
@@ -4901,9 +3702,15 @@ class MultiPlatformImageDownloader(ctk.CTk):
     def safe_set_progress(self, p):
         if hasattr(self, 'batch_progress_bar') and self.batch_progress_bar.winfo_exists():
             self.batch_progress_bar.set(p)
-    def safe_set_progress_label(self, p, i, total_rows):
+    def safe_set_progress_label(self, p, i, total_rows, extra=""):
         if hasattr(self, 'batch_progress_label') and self.batch_progress_label.winfo_exists():
-            self.batch_progress_label.configure(text=f"已完成 {int(p * 100)}% ({i + 1}/{total_rows})")
+            text = f"已完成 {int(p * 100)}% ({i + 1}/{total_rows})"
+            if extra:
+                text += f"  {extra}"
+            self.batch_progress_label.configure(text=text)
+    def safe_set_batch_stats(self, text):
+        if hasattr(self, 'batch_stats_label') and self.batch_stats_label.winfo_exists():
+            self.batch_stats_label.configure(text=text)
     def safe_enable_batch_start(self):
         if hasattr(self, 'batch_start_button') and self.batch_start_button.winfo_exists():
             self.batch_start_button.configure(state="normal")
@@ -4912,32 +3719,37 @@ class MultiPlatformImageDownloader(ctk.CTk):
             self.batch_pause_button.configure(state="disabled")
 
     def save_batch_results(self):
+        """把 batch_df 整体写回Excel（暂停/完成时调用），成功后压缩进度日志"""
+        with self.batch_save_lock:
+            return self._save_batch_results_locked()
+
+    def _save_batch_results_locked(self):
         try:
-            if self.batch_df is None:
-                return
-            current_sheet = self.batch_sheet_combo.get()
-            from openpyxl import load_workbook
-            from openpyxl.styles import Font
+            if self.batch_df is None or not self.batch_sheet_name:
+                return False
+            current_sheet = self.batch_sheet_name
+            self.batch_save_text = ""
+            # 记录快照时的日志位置，保存成功后只删除快照之前的日志记录
+            journal_offset = self.batch_journal.offset() if self.batch_journal is not None else 0
+            df = self.batch_df.copy()
+            start_time = time.perf_counter()
             try:
-                with pd.ExcelWriter(self.excel_file_path, mode='a', if_sheet_exists='replace', engine='openpyxl') as writer:
-                    self.batch_df.to_excel(writer, sheet_name=current_sheet, index=False)
+                # 只写回结果列，标题不一致的行在同一遍中标红
+                write_excel_results(self.excel_file_path, current_sheet, df, self.batch_excel_rows, BATCH_RESULT_COLUMNS)
             except PermissionError:
-                messagebox.showerror("保存失败", "无法保存Excel文件，请关闭该文件后重试！")
-                return
-            wb = load_workbook(self.excel_file_path)
-            ws = wb[current_sheet]
-            for index, row in self.batch_df.iterrows():
-                title_mismatch = row.get("标题不一致", False)
-                if title_mismatch and pd.notna(title_mismatch) and title_mismatch:
-                    excel_row = index + 2
-                    for col_num in range(1, len(self.batch_df.columns) + 1):
-                        cell = ws.cell(row=excel_row, column=col_num)
-                        cell.font = Font(color="FF0000", bold=True)
-            wb.save(self.excel_file_path)
-            wb.close()
-            print(f"批量结果已保存到原文件: {self.excel_file_path} (Sheet: {current_sheet})")
+                self.after(0, lambda: messagebox.showerror("保存失败", "无法保存Excel文件，请关闭该文件后重试！\n处理进度已记录在进度日志中，不会丢失。"))
+                return False
+            save_seconds = time.perf_counter() - start_time
+            self.record_batch_stage("保存Excel", save_seconds)
+            if self.batch_journal is not None:
+                self.batch_journal.compact(journal_offset)
+            self.batch_save_text = f"Excel保存用时 {save_seconds:.2f} 秒"
+            self.after(0, lambda: self.update_status(f"批量结果已保存到Excel，{self.batch_save_text}"))
+            print(f"批量结果已保存到原文件: {self.excel_file_path} (Sheet: {current_sheet})，用时 {save_seconds:.2f} 秒")
+            return True
         except Exception as e:
             print(f"保存批量结果失败: {e}")
+            return False
 
     def ask_open_excel_file(self):
         """询问是否打开Excel文件"""
@@ -4984,8 +3796,7 @@ class MultiPlatformImageDownloader(ctk.CTk):
     def load_delete_excel_sheets(self):
         """加载删除页面的Excel工作表"""
         try:
-            excel_file = pd.ExcelFile(self.delete_excel_file_path)
-            sheet_names = excel_file.sheet_names
+            sheet_names = list_excel_sheets(self.delete_excel_file_path)
             self.delete_sheet_combo.configure(values=sheet_names)
             if sheet_names:
                 # 优先选择默认存储sheet，支持多种可能的默认sheet名称
@@ -5015,10 +3826,14 @@ class MultiPlatformImageDownloader(ctk.CTk):
     def load_delete_excel_preview(self, sheet_name):
         """加载删除页面Excel预览"""
         try:
-            self.delete_df = pd.read_excel(self.delete_excel_file_path, sheet_name=sheet_name)
+            start_time = time.perf_counter()
+            self.delete_df, _ = read_excel_sheet(self.delete_excel_file_path, sheet_name)
+            load_seconds = time.perf_counter() - start_time
             self.update_delete_table()
 
-            print(f"已加载删除页面Excel数据: {len(self.delete_df)} 行")
+            self.delete_status_label.configure(
+                text=f"已加载 {len(self.delete_df)} 行，读取用时 {load_seconds:.2f} 秒")
+            print(f"已加载删除页面Excel数据: {len(self.delete_df)} 行，用时 {load_seconds:.2f} 秒")
         except Exception as e:
 
             print(f"读取工作表失败: {str(e)}")
@@ -5151,11 +3966,12 @@ class MultiPlatformImageDownloader(ctk.CTk):
             messagebox.showwarning("警告", "请先设置横图和竖图路径")
             return
         
-        # 获取要删除的文件名
+        # 获取要删除的文件名（一次性建立 表格项 -> 行号 映射，避免每项调用 index()）
+        positions = {item: i for i, item in enumerate(self.delete_table.get_children())}
         delete_files = []
         for item in selected_items:
             # 获取行在DataFrame中的索引
-            item_index = self.delete_table.index(item)
+            item_index = positions.get(item, len(self.delete_df))
             if item_index < len(self.delete_df):
                 row_data = self.delete_df.iloc[item_index]
                 key_value = str(row_data.get(self.selected_delete_key_column, "")).strip()
@@ -5166,54 +3982,62 @@ class MultiPlatformImageDownloader(ctk.CTk):
             messagebox.showwarning("警告", "没有找到有效的删除文件名")
             return
         
-        result = messagebox.askyesno("确认删除", 
-                                   f"确定要删除选中的 {len(selected_items)} 个项目对应的文件吗？\n"
-                                   f"删除标准列: {self.selected_delete_key_column}\n"
-                                   f"将在横图和竖图文件夹中查找对应文件进行删除")
-        
-        if result:
-            self.perform_file_deletion(delete_files, h_dir, v_dir)
+        # 先试运行：扫描目录生成删除计划，确认后再删除
+        self.perform_file_deletion(delete_files, h_dir, v_dir)
 
     def perform_file_deletion(self, delete_files, h_dir, v_dir):
-        """执行实际的文件删除操作"""
-        import os
-        import threading
+        """在后台扫描横图/竖图目录并生成删除计划（不删除文件），完成后弹出试运行报告"""
+        self.delete_selected_button.configure(state="disabled")
+        self.delete_status_label.configure(text=f"正在扫描文件夹，匹配 {len(delete_files)} 个文件名...")
+        key_column = self.selected_delete_key_column
+        
+        def plan_worker():
+            try:
+                plan = self.plan_file_deletion(delete_files, {"横图": h_dir, "竖图": v_dir})
+            except Exception as e:
+                msg = f"扫描文件夹失败: {e}"
+                self.after(0, lambda msg=msg: messagebox.showerror("错误", msg))
+                self.after(0, lambda: self.delete_selected_button.configure(state="normal"))
+                return
+            self.after(0, lambda: self.confirm_file_deletion(plan, key_column))
+        
+        threading.Thread(target=plan_worker, daemon=True).start()
+
+    def confirm_file_deletion(self, plan, key_column):
+        """显示试运行报告，确认后分批并行删除计划中的文件"""
+        files = plan["files"]
+        h_count = sum(1 for label, _, _ in files if label == "横图")
+        v_count = len(files) - h_count
+        missing = plan["missing"]
+        for label, name in missing:
+            print(f"未找到{label}文件: {name}")
+        for label, _, path in files:
+            print(f"[试运行] 将删除{label}文件: {path}")
+        self.delete_status_label.configure(
+            text=f"试运行: 可删除横图 {h_count} 个、竖图 {v_count} 个，未找到 {len(missing)} 个（扫描用时 {plan['scan_seconds']:.2f} 秒）")
+        
+        if not files:
+            self.delete_selected_button.configure(state="normal")
+            messagebox.showinfo("试运行结果", f"在横图和竖图文件夹中没有找到要删除的文件\n删除标准列: {key_column}")
+            return
+        
+        missing_info = "\n".join(f"{label}-{name}" for label, name in missing[:10])
+        if len(missing) > 10:
+            missing_info += f"\n... 还有 {len(missing) - 10} 个"
+        report = (f"删除标准列: {key_column}\n"
+                  f"将删除横图 {h_count} 个、竖图 {v_count} 个文件\n"
+                  f"未找到 {len(missing)} 个文件")
+        if missing_info:
+            report += f"\n\n未找到的文件:\n{missing_info}"
+        if not messagebox.askyesno("确认删除（试运行报告）", f"{report}\n\n确定要删除这些文件吗？"):
+            self.delete_selected_button.configure(state="normal")
+            self.delete_status_label.configure(text="已取消删除")
+            return
+        
+        self.delete_status_label.configure(text=f"正在删除 {len(files)} 个文件...")
         
         def delete_worker():
-            deleted_count = 0
-            failed_files = []
-            
-            for filename in delete_files:
-                # 清理文件名
-                clean_filename = self.sanitize_filename(filename)
-                
-                # 常见的图片扩展名
-                extensions = ['.jpg', '.jpeg', '.png', '.bmp', '.gif', '.webp']
-                
-                # 在横图文件夹中查找并删除
-                for ext in extensions:
-                    file_path = os.path.join(h_dir, clean_filename + ext)
-                    if os.path.exists(file_path):
-                        try:
-                            os.remove(file_path)
-                            deleted_count += 1
-                            print(f"已删除横图文件: {file_path}")
-                            break
-                        except Exception as e:
-                            failed_files.append(f"横图-{clean_filename + ext}: {str(e)}")
-                
-                # 在竖图文件夹中查找并删除
-                for ext in extensions:
-                    file_path = os.path.join(v_dir, clean_filename + ext)
-                    if os.path.exists(file_path):
-                        try:
-                            os.remove(file_path)
-                            deleted_count += 1
-                            print(f"已删除竖图文件: {file_path}")
-                            break
-                        except Exception as e:
-                            failed_files.append(f"竖图-{clean_filename + ext}: {str(e)}")
-            
+            deleted_count, failed_files = self.delete_planned_files(files)
             # 在主线程中显示结果
             self.after(0, lambda: self.show_delete_result(deleted_count, failed_files))
         
@@ -5223,6 +4047,8 @@ class MultiPlatformImageDownloader(ctk.CTk):
 
     def show_delete_result(self, deleted_count, failed_files):
         """显示删除结果"""
+        self.delete_selected_button.configure(state="normal")
+        self.delete_status_label.configure(text=f"删除完成: 成功 {deleted_count} 个，失败 {len(failed_files)} 个")
         if failed_files:
             failed_info = "\n".join(failed_files[:10])  # 最多显示10个失败的文件
             if len(failed_files) > 10:
@@ -5485,8 +4311,8 @@ class MultiPlatformImageDownloader(ctk.CTk):
                  messagebox.showwarning("格式错误", "文件名格式不能为空，已重置为默认值。")
                  return
 
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(settings_to_save, f, ensure_ascii=False, indent=4)
+            # 与已有配置合并，保留界面上没有的配置项（如并发数、平台限速），并刷新设置缓存
+            self.save_settings_file(settings_to_save)
 
             # --- Apply changes immediately to the running application ---
             new_default_platform = settings_to_save["default_platform"]
@@ -5699,14 +4525,19 @@ class MultiPlatformImageDownloader(ctk.CTk):
     def toggle_batch_pause(self):
         """切换暂停/继续状态"""
         if self.batch_paused:
-            # 继续
-            self.batch_paused = False
+            # 继续（与协调线程的退出判断共用锁，避免线程刚退出时无人接手）
+            with self.batch_state_lock:
+                self.batch_paused = False
+                restart = not self.is_batch_processing
+                if restart:
+                    self.is_batch_processing = True
             if hasattr(self, 'batch_pause_button') and self.batch_pause_button.winfo_exists():
                 self.batch_pause_button.configure(text="暂停爬取")
             # 重新启动线程
-            if not self.is_batch_processing:
-                self.is_batch_processing = True
-                self.batch_thread = threading.Thread(target=self.batch_crawling_worker, daemon=True)
+            if restart:
+                if hasattr(self, 'batch_start_button') and self.batch_start_button.winfo_exists():
+                    self.batch_start_button.configure(state="disabled")
+                self.batch_thread = threading.Thread(target=self.batch_crawling_worker, args=(self.batch_options,), daemon=True)
                 self.batch_thread.start()
             if hasattr(self, 'status_label') and self.status_label.winfo_exists():
                 self.status_label.configure(text="批量爬取已继续...")
@@ -5717,36 +4548,19 @@ class MultiPlatformImageDownloader(ctk.CTk):
                 self.batch_pause_button.configure(text="继续爬取")
             if hasattr(self, 'status_label') and self.status_label.winfo_exists():
                 self.status_label.configure(text="正在暂停批量爬取...")
-            # 保存当前进度
-            self.save_batch_results()
+            # 保存当前进度（运行中的协调线程会在在途行处理完后自行保存）
+            if not self.is_batch_processing:
+                self.save_batch_results()
 
     def get_cid_column(self):
-        # 自动查找CID列名，兼容大小写和空格
-        for col in self.batch_df.columns:
-            if str(col).strip().lower() == "cid":
-                return col
-        raise ValueError('Excel表格中未找到"CID"列，请检查表头是否为"CID"或有无多余空格！')
+        return find_cid_column(self.batch_df.columns)
 
     def get_movie_name_column(self):
-        """自动查找影片名称列名，会尝试查找'影片名称'、'标题'等，如果找不到则返回第一列的列名。"""
-        possible_names = ["影片名称", "标题", "title", "name"]
-        # 获取清理后的小写列名列表，用于不区分大小写的匹配
-        df_columns_lower = [str(c).strip().lower() for c in self.batch_df.columns]
-        
-        for name in possible_names:
-            if name in df_columns_lower:
-                # 找到匹配项，返回原始大小写的列名
-                original_col_name = self.batch_df.columns[df_columns_lower.index(name)]
-                return original_col_name
-
-        # 如果关键词都没有找到，默认使用第一列作为影片名称列
-        if len(self.batch_df.columns) > 0:
-            return self.batch_df.columns[0]
-        
-        # 如果表格没有列，则抛出异常
-        raise ValueError("Excel表格中未找到可作为影片名称的列，且表格为空！")
+        """自动查找影片名称列名，找不到时使用第一列（见 find_movie_name_column）"""
+        return find_movie_name_column(self.batch_df.columns)
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # 打包为exe后编码子进程需要
     # Ensure PIL uses modern resampling if available
     if not hasattr(Image, 'Resampling'):
         Image.Resampling = Image # Patch for older PIL versions
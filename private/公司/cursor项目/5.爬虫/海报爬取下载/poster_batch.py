@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+海报批量下载命令行工具 - 无界面运行批量爬取
+
+读取 xlsx/csv 表格（需要 CID 列和影片名称列），按搜索优先级在各平台搜索海报，
+下载到横图/竖图目录，文件名使用 CID。只依赖 poster_engine，不需要 customtkinter 和显示器，
+可以在服务器或定时任务中运行；大表可以用 --shard 拆给多个进程并行处理，
+每个分片写自己的结果文件和进度日志，互不影响。
+
+使用方法：
+    python poster_batch.py 片单.xlsx --sheet Sheet1 --preset 基础尺寸
+    python poster_batch.py 片单.csv --priority 优酷视频-精确搜索 爱奇艺-普通搜索 --type 竖图
+    python poster_batch.py 片单.xlsx --shard 1/4      # 4个进程分别运行 1/4 2/4 3/4 4/4
+
+未指定的参数使用 config.json 中的批量设置。中断（Ctrl+C）后重新运行同样的命令，
+会跳过进度日志中已完成的行。
+"""
+
+import os
+import sys
+import time
+import signal
+import argparse
+import threading
+import multiprocessing
+
+import pandas as pd
+
+from poster_engine import (
+    PosterEngine, BatchJournal, SIZE_PRESETS, ENCODE_FORMATS,
+    find_cid_column, find_movie_name_column,
+)
+
+RESULT_COLUMNS = (("获取图片标题", ""), ("处理状态", ""), ("标题不一致", False))
+
+
+def parse_shard(text):
+    """解析 "第几片/共几片"，如 "2/4" -> (2, 4)"""
+    try:
+        index, count = (int(part) for part in text.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError("分片格式应为 序号/总数，如 2/4")
+    if count < 1 or not 1 <= index <= count:
+        raise argparse.ArgumentTypeError("分片序号应在 1 到总数之间")
+    return index, count
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="poster-batch", description="海报批量下载（无界面）")
+    parser.add_argument("input", help="影片表格（.xlsx/.xls/.csv），需要 CID 列和影片名称列")
+    parser.add_argument("--sheet", help="Excel 工作表名，默认第一个")
+    parser.add_argument("--preset", choices=list(SIZE_PRESETS), help="尺寸预设，默认使用设置中的批量默认尺寸")
+    parser.add_argument("--v-size", help="自定义竖图尺寸，如 412x600（--preset 自定义尺寸 时使用）")
+    parser.add_argument("--h-size", help="自定义横图尺寸，如 528x296（--preset 自定义尺寸 时使用）")
+    parser.add_argument("--type", dest="download_type", choices=["全部", "竖图", "横图"], default="全部", help="下载类型")
+    parser.add_argument("--priority", nargs="+", help="搜索优先级，如 优酷视频-精确搜索 爱奇艺-普通搜索")
+    parser.add_argument("--h-dir", help="横图保存目录，默认使用设置中的批量横图路径")
+    parser.add_argument("--v-dir", help="竖图保存目录，默认使用设置中的批量竖图路径")
+    parser.add_argument("--concurrency", type=int, help="每个阶段的并发线程数")
+    parser.add_argument("--format", choices=list(ENCODE_FORMATS), help="输出格式")
+    parser.add_argument("--shard", type=parse_shard, default=(1, 1), help="只处理其中一个分片，如 2/4")
+    parser.add_argument("--output", help="结果文件（.csv/.xlsx），默认在输入文件旁生成")
+    parser.add_argument("--config", default="config.json", help="配置文件路径")
+    return parser.parse_args(argv)
+
+
+def load_table(path, sheet=None):
+    """读取表格，所有列按文本读取，避免 CID 被转成数字"""
+    if path.lower().endswith(".csv"):
+        return pd.read_csv(path, dtype=str, encoding="utf-8-sig")
+    return pd.read_excel(path, sheet_name=sheet or 0, dtype=str)
+
+
+def save_table(df, path):
+    if path.lower().endswith((".xlsx", ".xls")):
+        df.to_excel(path, index=False)
+    else:
+        df.to_csv(path, index=False, encoding="utf-8-sig")
+
+
+def default_output_path(input_path, shard):
+    base = os.path.splitext(input_path)[0]
+    index, count = shard
+    if count == 1:
+        return f"{base}_结果.csv"
+    return f"{base}_结果_分片{index}of{count}.csv"
+
+
+def build_options(engine, settings, args):
+    """按命令行参数（未指定时用设置）生成批量下载参数"""
+    preset = args.preset or settings.get("batch_default_size", "原尺寸")
+    custom_sizes = (
+        args.v_size or settings.get("batch_default_vertical_size", "412x600"),
+        args.h_size or settings.get("batch_default_horizontal_size", "528x296"),
+    )
+    h_dir = args.h_dir or settings.get("batch_horizontal_path")
+    v_dir = args.v_dir or settings.get("batch_vertical_path")
+    os.makedirs(h_dir, exist_ok=True)
+    os.makedirs(v_dir, exist_ok=True)
+    return engine.build_batch_options(settings, preset, h_dir, v_dir, args.download_type, custom_sizes=custom_sizes)
+
+
+def restore_progress(journal, df, cid_col, shard_rows):
+    """用进度日志恢复本分片已完成的行，返回已完成的行号集合"""
+    done = set()
+    for index, record in journal.load().items():
+        if index not in shard_rows:
+            continue
+        cid = df.at[index, cid_col]
+        if (str(cid) if pd.notna(cid) else "") != str(record.get("cid", "")):
+            continue  # 表格行顺序已变化，不套用这条记录
+        status = record.get("status", "")
+        if not status or status == "处理中...":
+            continue
+        df.at[index, "处理状态"] = status
+        df.at[index, "获取图片标题"] = record.get("title", "")
+        df.at[index, "标题不一致"] = bool(record.get("mismatch", False))
+        done.add(index)
+    return done
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    overrides = {}
+    if args.priority:
+        overrides["batch_search_priority"] = args.priority
+    if args.concurrency:
+        overrides["batch_concurrency"] = args.concurrency
+    if args.format:
+        overrides["batch_encode_format"] = args.format
+
+    engine = PosterEngine(args.config, overrides=overrides)
+    settings = engine.load_settings()
+    try:
+        options = build_options(engine, settings, args)
+        df = load_table(args.input, args.sheet)
+        cid_col = find_cid_column(df.columns)
+        name_col = find_movie_name_column(df.columns)
+    except (OSError, ValueError) as e:
+        print(f"错误: {e}", file=sys.stderr)
+        return 2
+    for col, default in RESULT_COLUMNS:
+        if col not in df.columns:
+            df[col] = default
+
+    # 按行号取模分片，各分片的行均匀分布在整张表中
+    shard_index, shard_count = args.shard
+    shard_rows = [i for i in range(len(df)) if i % shard_count == shard_index - 1]
+    output_path = args.output or default_output_path(args.input, args.shard)
+    journal = BatchJournal(output_path + ".progress.jsonl")
+    done = restore_progress(journal, df, cid_col, set(shard_rows))
+    pending = [i for i in shard_rows if i not in done]
+    print(f"分片 {shard_index}/{shard_count}: 共 {len(shard_rows)} 行，已完成 {len(done)} 行，待处理 {len(pending)} 行")
+    priority_text = ", ".join(f"{platform}-{'精确搜索' if precise else '普通搜索'}"
+                              for platform, precise in options["search_configs"])
+    print(f"搜索优先级: {priority_text}")
+
+    # 第一次 Ctrl+C 只停止投喂新行，等在途的行处理完；再按一次强制退出
+    stop_event = threading.Event()
+
+    def request_stop(signum, frame):
+        print("\n正在停止，等待处理中的行完成（再按一次 Ctrl+C 强制退出）...")
+        stop_event.set()
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+
+    signal.signal(signal.SIGINT, request_stop)
+
+    def iter_rows():
+        for i in pending:
+            movie_name = df.at[i, name_col]
+            cid = df.at[i, cid_col]
+            yield i, str(movie_name) if pd.notna(movie_name) else "", str(cid) if pd.notna(cid) else ""
+
+    counts = {}
+    start_time = time.time()
+
+    def on_row(index, cid, status, obtained_title, mismatch):
+        df.at[index, "处理状态"] = status
+        if obtained_title is not None:
+            df.at[index, "获取图片标题"] = obtained_title
+            df.at[index, "标题不一致"] = mismatch
+        journal.append({
+            "row": int(index),
+            "cid": cid,
+            "status": status,
+            "title": obtained_title or "",
+            "mismatch": bool(mismatch),
+            "time": time.time(),
+        })
+        counts[status] = counts.get(status, 0) + 1
+        processed = sum(counts.values())
+        print(f"[{processed}/{len(pending)}] {df.at[index, name_col]} ({cid}): {status}", flush=True)
+
+    try:
+        engine.run_batch(iter_rows(), options, stop_event=stop_event, on_row=on_row)
+    except KeyboardInterrupt:
+        print("已强制退出，已完成的行保存在进度日志中")
+    finished = not stop_event.is_set() and sum(counts.values()) == len(pending)
+
+    try:
+        save_start = time.perf_counter()
+        save_table(df.iloc[shard_rows], output_path)
+        engine.record_batch_stage("保存结果", time.perf_counter() - save_start)
+    except OSError as e:
+        print(f"保存结果失败（进度已记录在 {journal.path}）: {e}", file=sys.stderr)
+        journal.close()
+        return 1
+    if finished:
+        journal.compact(journal.offset())  # 结果已完整写入，删除进度日志
+    else:
+        journal.close()
+
+    elapsed = time.time() - start_time
+    summary = "，".join(f"{status} {count}" for status, count in sorted(counts.items()))
+    print(f"{'完成' if finished else '已停止'}: 本次处理 {sum(counts.values())} 行，用时 {elapsed:.1f} 秒  {summary}")
+    stats_text = "  ".join(t for t in (
+        engine.get_search_cache_stats_text(),
+        engine.get_transfer_stats_text(),
+        engine.get_connection_stats_text(),
+    ) if t)
+    if stats_text:
+        print(stats_text)
+    if engine.batch_stats is not None:
+        print(engine.batch_stats.summary_text())
+        try:
+            # 分阶段耗时报告：<结果文件>.stats.json / .stats.csv
+            json_path, csv_path = engine.batch_stats.write_report(output_path + ".stats")
+            print(f"统计报告已保存: {json_path}, {csv_path}")
+        except OSError as e:
+            print(f"统计报告保存失败: {e}", file=sys.stderr)
+    print(f"结果已保存: {output_path}")
+    engine.http.close()
+    return 0 if finished else 130
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()  # 打包为exe后编码子进程需要
+    sys.exit(main())
@@ -0,0 +1,3009 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+海报下载核心引擎 - 不依赖界面库的搜索、下载、缩放与批量流水线
+
+图形界面 mainPro.py 中的 MultiPlatformImageDownloader 继承 PosterEngine，
+命令行工具 poster_batch.py 直接使用 PosterEngine，可以在没有显示器的服务器、
+定时任务或多个进程（分片处理同一张大表）中运行批量下载。
+
+使用示例：
+    from poster_engine import PosterEngine
+    engine = PosterEngine("config.json")
+    result, platform = engine.search_with_priority("流浪地球")
+"""
+
+import os
+import re
+import json
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import urllib.parse
+import difflib
+from bs4 import BeautifulSoup
+from PIL import Image
+from io import BytesIO
+import traceback
+import threading
+import time
+import queue
+import sqlite3
+import functools
+import unicodedata
+import hashlib
+import math
+import shutil
+import csv
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Future, wait, as_completed, FIRST_COMPLETED
+import tempfile
+from types import MappingProxyType
+
+
+PLATFORMS = ("爱奇艺", "腾讯视频", "优酷视频")
+
+# 删除页面查找海报文件时认可的扩展名（按优先级排列，同名多个文件时删除排在前面的）
+DELETE_IMAGE_EXTS = ('.jpg', '.jpeg', '.png', '.bmp', '.gif', '.webp')
+
+# VIP检测结果中各平台使用的显示名称
+VIP_RESULT_KEYS = {"爱奇艺": "爱奇艺", "腾讯视频": "腾讯视频", "优酷视频": "优酷"}
+
+# 海报尺寸预设 (宽, 高)
+SIZE_PRESETS = {
+    "原尺寸": {"vertical": (-1, -1), "horizontal": (-1, -1)}, # -1,-1 signifies original size
+    "基础尺寸": {"vertical": (412, 600), "horizontal": (528, 296)}, # Renamed
+    "河南尺寸": {"vertical": (525, 750), "horizontal": (257, 145)},
+    "甘肃尺寸": {"vertical": (375, 562), "horizontal": (562, 375)},
+    "陕西尺寸": {"vertical": (245, 350), "horizontal": (384, 216)},
+    "云南尺寸": {"vertical": (262, 360), "horizontal": (412, 230)}, # Added Yunnan
+    "自定义尺寸": {"vertical": (0, 0), "horizontal": (0, 0)} # 0,0 signifies custom input needed
+}
+
+
+class TokenBucket:
+    """线程安全的令牌桶，用于限制单个平台的请求速率"""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = float(rate)  # 每秒补充的令牌数，<=0 表示不限速
+        self.capacity = max(1.0, float(capacity))
+        self.tokens = self.capacity
+        self.timestamp = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, tokens=1, stop_event=None):
+        """阻塞直到拿到令牌；stop_event 被置位时放弃并返回 False"""
+        if self.rate <= 0:
+            return True
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.timestamp) * self.rate)
+                self.timestamp = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return True
+                wait_time = (tokens - self.tokens) / self.rate
+            if stop_event is not None and stop_event.is_set():
+                return False
+            time.sleep(min(wait_time, 0.5))
+
+
+class SearchCancelled(Exception):
+    """等待平台令牌时 stop_event 被置位，放弃本次搜索（不写入缓存）"""
+
+
+# 当前线程搜索的 stop_event，由 _search_one_priority / _search_vip_limited 设置，
+# cached_search 在缓存未命中、等待令牌时使用
+SEARCH_CONTEXT = threading.local()
+
+try:
+    RESAMPLE_LANCZOS = Image.Resampling.LANCZOS
+except AttributeError:
+    RESAMPLE_LANCZOS = Image.LANCZOS
+
+
+def cover_resize_and_crop(img, target_width, target_height):
+    """等比例缩放到恰好覆盖目标尺寸后中心裁剪，一次 resize 完成。
+
+    通过 resize 的 box 参数只对最终保留的源区域重采样，不再先整图缩放再裁剪。
+    """
+    original_width, original_height = img.size
+    # 选择最大的缩放比例（修改幅度最小的边作为基准）
+    scale_ratio = max(target_width / original_width, target_height / original_height)
+    # 浮点误差可能让裁剪区域略大于原图，限制在原图范围内
+    crop_w = min(original_width, target_width / scale_ratio)
+    crop_h = min(original_height, target_height / scale_ratio)
+    left = (original_width - crop_w) / 2
+    top = (original_height - crop_h) / 2
+    return img.resize((target_width, target_height), RESAMPLE_LANCZOS,
+                      box=(left, top, left + crop_w, top + crop_h), reducing_gap=3.0)
+
+
+def decode_for_targets(raw_bytes, targets):
+    """解码一次源图，供多个目标尺寸共用。
+
+    targets 为 [(宽, 高), ...]，宽高 <=0 表示保留原尺寸。
+    只有所有目标都比原图小很多时才启用 JPEG draft（按 1/2、1/4、1/8 缩小解码），
+    且保证缩小后的尺寸仍不小于任何目标的覆盖尺寸。
+    """
+    # 既可以是图片字节，也可以是磁盘上的图片路径（大图不必读入内存再传给子进程）
+    img = Image.open(BytesIO(raw_bytes) if isinstance(raw_bytes, (bytes, bytearray)) else raw_bytes)
+    original_width, original_height = img.size
+    sized = [(w, h) for w, h in targets if w > 0 and h > 0]
+    if sized and len(sized) == len(targets) and original_width and original_height:
+        need_w = need_h = 0
+        for w, h in sized:
+            scale = max(w / original_width, h / original_height)
+            need_w = max(need_w, math.ceil(original_width * scale))
+            need_h = max(need_h, math.ceil(original_height * scale))
+        if need_w < original_width and need_h < original_height:
+            img.draft("RGB", (need_w, need_h))
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    else:
+        img.load()
+    return img
+
+
+def render_poster_variants(raw_bytes, targets):
+    """解码一次源图，一次性生成所有目标尺寸的图片（宽高 <=0 的目标返回原图）"""
+    img = decode_for_targets(raw_bytes, targets)
+    return [cover_resize_and_crop(img, w, h) if w > 0 and h > 0 else img for w, h in targets]
+
+
+# 批量编码支持的输出格式及对应扩展名
+ENCODE_FORMATS = {"JPEG": ".jpg", "WEBP": ".webp", "PNG": ".png"}
+
+
+def encode_image_within(img, target_filesize_kb, quality=95, size_check_name="自动压缩", image_format="JPEG"):
+    """把图片编码为指定格式；有损格式超过目标大小时逐步降低质量（85起，每次-5，最低10）"""
+    output_buffer = BytesIO()
+    if image_format == "PNG":
+        img.save(output_buffer, format='PNG', optimize=True)
+        return output_buffer.getvalue()  # 无损格式不做质量压缩
+    img.save(output_buffer, format=image_format, quality=quality)
+    save_content = output_buffer.getvalue()
+
+    current_size_kb = len(save_content) / 1024
+    print(f"  {size_check_name}检查: 当前图片大小 {current_size_kb:.2f} KB (目标 <= {target_filesize_kb} KB)")
+    if current_size_kb <= target_filesize_kb:
+        return save_content
+
+    print(f"  {size_check_name}警告: 图片大小超过 {target_filesize_kb} KB，尝试压缩...")
+    try:
+        quality = min(85, quality)
+        step = 5
+        min_quality = 10
+        new_size_kb = current_size_kb
+        while quality >= min_quality:
+            output_buffer = BytesIO()
+            img.save(output_buffer, format=image_format, quality=quality)
+            new_size_kb = len(output_buffer.getvalue()) / 1024
+            if new_size_kb <= target_filesize_kb:
+                print(f"  压缩成功！最终大小 {new_size_kb:.2f} KB (质量 {quality})")
+                return output_buffer.getvalue()
+            quality -= step
+        print(f"  警告: 压缩至最低质量 {min_quality} 后，大小仍为 {new_size_kb:.2f} KB，超过目标。将使用此最低质量图片。")
+        return output_buffer.getvalue()
+    except Exception as compress_err:
+        print(f"错误：压缩{size_check_name}图片时出错: {compress_err}")
+        print(traceback.format_exc())
+        print("警告：压缩失败，将保存压缩前的图片。")
+        return save_content
+
+
+def timed_call(func, *args):
+    """调用 func(*args)，返回 (耗时秒数, 返回值)；可提交给进程池，在子进程内计时"""
+    start_time = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start_time, result
+
+
+def encode_poster_variants(raw_bytes, targets, target_filesize_kb=300, size_check_name="自动压缩",
+                           quality=95, image_format="JPEG"):
+    """原始图片字节 -> 每个目标尺寸的编码后字节（默认JPG）。
+
+    纯函数，可直接提交给 ProcessPoolExecutor 在子进程中执行。
+    返回与 targets 一一对应的 [(True, 图片字节) 或 (False, 失败原因)]。
+    """
+    try:
+        images = render_poster_variants(raw_bytes, targets)
+    except Exception as e:
+        print(f"错误：智能缩放裁剪失败: {e}")
+        print("警告：缩放裁剪失败，将保存原始下载的图片...")
+        try:
+            images = [decode_for_targets(raw_bytes, [(0, 0)])] * len(targets)
+        except Exception as open_err:
+            return [(False, f"PIL无法打开图片:{open_err}")] * len(targets)
+    results = []
+    for img in images:
+        try:
+            results.append((True, encode_image_within(img, target_filesize_kb, quality, size_check_name, image_format)))
+        except Exception as e:
+            results.append((False, f"PIL强制{image_format}失败:{e}"))
+    return results
+
+
+class SearchCache:
+    """基于SQLite的搜索结果缓存，按 (平台, 类型, 精确搜索, 规范化标题) 索引，超过有效期自动失效"""
+
+    def __init__(self, db_path, ttl_seconds=24 * 3600):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS search_cache ("
+            " platform TEXT, kind TEXT, precise INTEGER, title TEXT,"
+            " results TEXT, created REAL,"
+            " PRIMARY KEY (platform, kind, precise, title))"
+        )
+        self.conn.commit()
+
+    @staticmethod
+    def normalize_title(title):
+        """缓存键用的标题：全半角统一、去掉首尾及多余空白、英文小写"""
+        title = unicodedata.normalize("NFKC", str(title or ""))
+        return re.sub(r"\s+", " ", title).strip().lower()
+
+    def get(self, platform, kind, precise, title):
+        """命中且未过期时返回结果列表，否则返回 None"""
+        key = (platform, kind, int(bool(precise)), self.normalize_title(title))
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT results, created FROM search_cache"
+                " WHERE platform=? AND kind=? AND precise=? AND title=?", key
+            ).fetchone()
+            if row is None or time.time() - row[1] > self.ttl_seconds:
+                self.misses += 1
+                return None
+            self.hits += 1
+        results = json.loads(row[0])
+        # JSON 会把元组变成列表，这里还原成搜索函数原本返回的元组
+        return [tuple(item) if isinstance(item, list) else item for item in results]
+
+    def put(self, platform, kind, precise, title, results):
+        key = (platform, kind, int(bool(precise)), self.normalize_title(title))
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO search_cache VALUES (?, ?, ?, ?, ?, ?)",
+                key + (json.dumps(results, ensure_ascii=False), time.time())
+            )
+            self.conn.commit()
+
+    def purge_expired(self):
+        """删除已过期的缓存记录"""
+        with self.lock:
+            self.conn.execute("DELETE FROM search_cache WHERE created < ?", (time.time() - self.ttl_seconds,))
+            self.conn.commit()
+
+    def clear(self):
+        with self.lock:
+            self.conn.execute("DELETE FROM search_cache")
+            self.conn.commit()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        """返回命中/未命中次数"""
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+
+class DownloadTooLarge(ValueError):
+    """图片超过允许的最大字节数"""
+
+
+def stream_download(url, headers, dest_path, timeout=30, max_bytes=None, chunk_size=64 * 1024, http=None):
+    """流式下载到 dest_path.part，完成后原子重命名为 dest_path。
+
+    .part 文件已存在时用 Range 续传（带 If-Range 校验，服务器内容变了会返回完整内容）。
+    中途网络异常时保留 .part 供下次续传；超过 max_bytes 时删除 .part 并抛出 DownloadTooLarge。
+    返回 (状态码, 响应头, 本次下载字节数)；状态码非 200/206 时不写文件。
+    """
+    part_path = dest_path + ".part"
+    validator_path = part_path + ".json"
+    request_headers = dict(headers or {})
+    resume_from = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    validator = None
+    if resume_from and os.path.exists(validator_path):
+        try:
+            with open(validator_path, "r", encoding="utf-8") as f:
+                validator = json.load(f).get("validator")
+        except (OSError, ValueError):
+            validator = None
+    conditional = "If-None-Match" in request_headers or "If-Modified-Since" in request_headers
+    if resume_from and validator and not conditional:
+        request_headers["Range"] = f"bytes={resume_from}-"
+        request_headers["If-Range"] = validator
+    else:
+        resume_from = 0
+
+    with (http or requests).get(url, headers=request_headers, timeout=timeout, stream=True) as response:
+        if response.status_code == 416:
+            # 续传范围无效（通常是 .part 已经完整或已过期），删掉重新下载
+            os.remove(part_path)
+            return stream_download(url, headers, dest_path, timeout, max_bytes, chunk_size, http)
+        if response.status_code not in (200, 206):
+            return response.status_code, dict(response.headers), 0
+
+        appending = response.status_code == 206
+        if not appending:
+            resume_from = 0
+        content_length = response.headers.get("Content-Length")
+        if max_bytes and content_length and content_length.isdigit() and resume_from + int(content_length) > max_bytes:
+            raise DownloadTooLarge(f"图片过大({(resume_from + int(content_length)) / 1024 / 1024:.1f}MB)")
+
+        if not appending:
+            # 记录本次内容的校验值，中断后续传时用 If-Range 确认服务器上的图片没有变化
+            new_validator = response.headers.get("ETag") or response.headers.get("Last-Modified")
+            try:
+                if new_validator:
+                    with open(validator_path, "w", encoding="utf-8") as f:
+                        json.dump({"validator": new_validator}, f)
+                elif os.path.exists(validator_path):
+                    os.remove(validator_path)
+            except OSError:
+                pass
+
+        downloaded = 0
+        with open(part_path, "ab" if appending else "wb") as f:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                if not chunk:
+                    continue
+                downloaded += len(chunk)
+                if max_bytes and resume_from + downloaded > max_bytes:
+                    f.close()
+                    for p in (part_path, validator_path):
+                        if os.path.exists(p):
+                            os.remove(p)
+                    raise DownloadTooLarge(f"图片超过 {max_bytes / 1024 / 1024:.0f}MB 上限")
+                f.write(chunk)
+        os.replace(part_path, dest_path)
+        if os.path.exists(validator_path):
+            os.remove(validator_path)
+        result_headers = dict(response.headers)
+        if appending and not (result_headers.get("ETag") or result_headers.get("Last-Modified")):
+            # 206 响应可能不带校验头，沿用续传前记录的校验值，便于之后做条件请求
+            key = "ETag" if validator.startswith(('"', 'W/')) else "Last-Modified"
+            result_headers[key] = validator
+        return 200, result_headers, downloaded
+
+
+class CachedImageResponse:
+    """图片缓存返回的简化响应，提供调用方用到的 status_code / content / headers。
+
+    大图只保存在磁盘上，content 在首次访问时才从 path 读取；
+    downloaded / elapsed 是本次网络传输的字节数和耗时（命中缓存时为0）。
+    """
+
+    def __init__(self, status_code, content=None, headers=None, from_cache=False, path=None,
+                 downloaded=0, elapsed=0.0):
+        self.status_code = status_code
+        self._content = content
+        self.headers = headers or {}
+        self.from_cache = from_cache
+        self.path = path
+        self.downloaded = downloaded
+        self.elapsed = elapsed
+
+    @property
+    def content(self):
+        if self._content is None:
+            if self.path and os.path.exists(self.path):
+                with open(self.path, "rb") as f:
+                    self._content = f.read()
+            else:
+                self._content = b""
+        return self._content
+
+
+class ImageCache:
+    """按URL索引的图片缓存：内存LRU + 磁盘目录，两者都有容量上限。
+
+    缓存过了新鲜期后用 ETag / Last-Modified 发条件请求，服务器返回304时直接复用本地文件。
+    图片流式写入磁盘（支持断点续传和大小上限），只有较小的图片才放进内存LRU。
+    预览、放大查看和下载共用同一份缓存，同一张海报只需下载一次。
+    """
+
+    def __init__(self, cache_dir, max_memory_bytes=64 * 1024 * 1024, max_disk_bytes=512 * 1024 * 1024,
+                 fresh_seconds=30 * 60, max_image_bytes=30 * 1024 * 1024, http=None):
+        self.cache_dir = cache_dir
+        self.max_memory_bytes = max_memory_bytes
+        self.max_memory_item = max(1, max_memory_bytes // 16)  # 超过该大小的图片不进内存
+        self.max_disk_bytes = max_disk_bytes
+        self.fresh_seconds = fresh_seconds
+        self.max_image_bytes = max_image_bytes
+        self.http = http  # SessionManager，为 None 时直接用 requests
+        self.memory = OrderedDict()  # url -> (content, meta)
+        self.memory_bytes = 0
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.url_locks = [threading.Lock() for _ in range(64)]  # 按URL分段加锁，同一URL不会被并发写入
+        self.pinned = {}  # bin路径 -> 引用计数，正在被编码任务读取的文件不参与淘汰
+        os.makedirs(cache_dir, exist_ok=True)
+        self.disk_bytes = sum(
+            entry.stat().st_size for entry in os.scandir(cache_dir)
+            if entry.is_file() and entry.name.endswith((".bin", ".part"))
+        )
+
+    def _paths(self, url):
+        digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.cache_dir, digest)
+        return base + ".bin", base + ".json"
+
+    def _remember(self, url, content, meta):
+        """放入内存LRU，超出容量时淘汰最久未使用的条目（调用方持有锁）"""
+        old = self.memory.pop(url, None)
+        if old is not None:
+            self.memory_bytes -= len(old[0])
+        if content is None or len(content) > self.max_memory_item:
+            return
+        self.memory[url] = (content, meta)
+        self.memory_bytes += len(content)
+        while self.memory_bytes > self.max_memory_bytes and len(self.memory) > 1:
+            _, (evicted, _) = self.memory.popitem(last=False)
+            self.memory_bytes -= len(evicted)
+
+    def _lookup(self, url):
+        """先查内存再查磁盘，返回 (content或None, meta) 或 None；大图 content 为 None，按路径读取"""
+        with self.lock:
+            entry = self.memory.get(url)
+            if entry is not None:
+                self.memory.move_to_end(url)
+                return entry
+        bin_path, meta_path = self._paths(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            size = os.path.getsize(bin_path)
+            os.utime(bin_path)  # 以修改时间作为磁盘LRU的最近使用时间
+        except (OSError, ValueError):
+            return None
+        content = None
+        if size <= self.max_memory_item:
+            try:
+                with open(bin_path, "rb") as f:
+                    content = f.read()
+            except OSError:
+                return None
+            with self.lock:
+                self._remember(url, content, meta)
+        return content, meta
+
+    def _write_meta(self, url, meta):
+        _, meta_path = self._paths(url)
+        try:
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+        except OSError:
+            pass
+
+    def pin(self, path):
+        """标记缓存文件正在使用，淘汰时跳过；与 unpin 成对调用"""
+        with self.lock:
+            self.pinned[path] = self.pinned.get(path, 0) + 1
+
+    def unpin(self, path):
+        with self.lock:
+            count = self.pinned.get(path, 0) - 1
+            if count > 0:
+                self.pinned[path] = count
+            else:
+                self.pinned.pop(path, None)
+
+    def _evict_disk(self):
+        """磁盘缓存超限时按最近使用时间淘汰，直到降到上限的90%。
+
+        下载中的 .part 文件计入总量但不删除；被 pin 住的文件也跳过。
+        """
+        entries = []
+        total = 0
+        for entry in os.scandir(self.cache_dir):
+            if not entry.is_file():
+                continue
+            if entry.name.endswith(".part"):
+                total += entry.stat().st_size
+            elif entry.name.endswith(".bin"):
+                stat = entry.stat()
+                total += stat.st_size
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        entries.sort()
+        with self.lock:
+            pinned = set(self.pinned)
+        target = self.max_disk_bytes * 0.9
+        for _, size, path in entries:
+            if total <= target:
+                break
+            if path in pinned:
+                continue
+            for p in (path, path[:-4] + ".json"):
+                try:
+                    os.remove(p)
+                except OSError:
+                    pass
+            total -= size
+        with self.lock:
+            self.disk_bytes = total
+
+    def fetch(self, url, headers=None, timeout=20, pin=False):
+        """获取图片，返回 CachedImageResponse；网络异常照常抛出，由调用方处理。
+
+        pin=True 时返回的 path 已被 pin 住，用完后调用方需 unpin(path)；
+        文件不在磁盘上（只命中内存）时 path 为 None，此时直接用 content。
+        """
+        digest = hashlib.sha256(url.encode("utf-8")).digest()
+        bin_path, _ = self._paths(url)
+        with self.url_locks[digest[0] % len(self.url_locks)]:
+            if not pin:
+                return self._fetch_locked(url, headers, timeout)
+            # 先 pin 再查找/下载，避免其他线程的淘汰在返回前删掉这个文件
+            self.pin(bin_path)
+            try:
+                response = self._fetch_locked(url, headers, timeout)
+            except BaseException:
+                self.unpin(bin_path)
+                raise
+            if response.status_code != 200 or not os.path.exists(bin_path):
+                self.unpin(bin_path)
+                response.path = None  # 只命中内存时 content 已在内存里
+            return response
+
+    def _fetch_locked(self, url, headers, timeout):
+        bin_path, _ = self._paths(url)
+        cached = self._lookup(url)
+        if cached is not None:
+            content, meta = cached
+            if time.time() - meta.get("fetched", 0) < self.fresh_seconds:
+                with self.lock:
+                    self.hits += 1
+                return CachedImageResponse(200, content, meta.get("headers"), from_cache=True, path=bin_path)
+
+        request_headers = dict(headers or {})
+        if cached is not None:
+            if cached[1].get("etag"):
+                request_headers["If-None-Match"] = cached[1]["etag"]
+            if cached[1].get("last_modified"):
+                request_headers["If-Modified-Since"] = cached[1]["last_modified"]
+
+        old_size = os.path.getsize(bin_path) if os.path.exists(bin_path) else 0
+        start = time.monotonic()
+        status_code, response_headers, downloaded = stream_download(
+            url, request_headers, bin_path, timeout=timeout, max_bytes=self.max_image_bytes, http=self.http
+        )
+        elapsed = time.monotonic() - start
+
+        if status_code == 304 and cached is not None:
+            content, meta = cached
+            meta = {**meta, "fetched": time.time()}
+            with self.lock:
+                self.revalidated += 1
+                self._remember(url, content, meta)
+            self._write_meta(url, meta)
+            return CachedImageResponse(200, content, meta.get("headers"), from_cache=True, path=bin_path,
+                                       elapsed=elapsed)
+
+        with self.lock:
+            self.misses += 1
+        if status_code != 200:
+            return CachedImageResponse(status_code, b"", response_headers, elapsed=elapsed)
+
+        meta = {
+            "url": url,
+            "etag": response_headers.get("ETag"),
+            "last_modified": response_headers.get("Last-Modified"),
+            "headers": {"Content-Type": response_headers.get("Content-Type", "")},
+            "fetched": time.time(),
+        }
+        self._write_meta(url, meta)
+        size = os.path.getsize(bin_path)
+        content = None
+        if size <= self.max_memory_item:
+            with open(bin_path, "rb") as f:
+                content = f.read()
+        with self.lock:
+            self.disk_bytes += size - old_size
+            self._remember(url, content, meta)
+        if self.disk_bytes > self.max_disk_bytes:
+            self._evict_disk()
+        return CachedImageResponse(200, content, meta["headers"], path=bin_path,
+                                   downloaded=downloaded, elapsed=elapsed)
+
+    def stats(self):
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "revalidated": self.revalidated,
+                "misses": self.misses,
+                "memory_bytes": self.memory_bytes,
+                "disk_bytes": self.disk_bytes,
+            }
+
+
+def make_search_item(title, horz_url, vert_url, vip_identifier=None, source="item"):
+    """统一的搜索结果条目：标题、横图/竖图URL、VIP标识，以及条目在接口响应中的来源。
+
+    海报搜索和VIP检测都从同一份条目列表派生结果，source 用来区分精确/宽泛结果等。
+    """
+    def full_url(url):
+        if isinstance(url, str) and url.startswith('//'):
+            return 'https:' + url
+        return url
+    return {
+        "title": title,
+        "horz_url": full_url(horz_url),
+        "vert_url": full_url(vert_url),
+        "vip_identifier": vip_identifier,
+        "source": source,
+    }
+
+
+JS_DATE_RE = re.compile(r'new\s+Date\s*\(\s*"(.*?)"\s*\)')
+JS_UNDEFINED_RE = re.compile(r'undefined(?=\s*[,}\]])')
+_JSON_DECODER = json.JSONDecoder()
+
+
+def extract_initial_data(html, marker="window.__INITIAL_DATA__"):
+    """取出页面源码中 `window.__INITIAL_DATA__ = {...};` 的 JSON 对象。
+
+    从对象起点用 raw_decode 原地解析，到对象结尾即停止，不再用正则截取、复制整段脚本；
+    只有脚本里含 new Date("...")、undefined 等 JS 写法时，才截出这段脚本替换后再解析。
+    找不到或无法解析时抛出 ValueError。
+    """
+    start = html.find(marker)
+    if start >= 0:
+        start = html.find('{', start + len(marker))
+    if start < 0:
+        raise ValueError(f"页面源码中找不到 `{marker} = {{...}};` 结构")
+    end = html.find('</script>', start)
+    if end < 0:
+        end = len(html)
+    if html.find('undefined', start, end) < 0 and html.find('new Date', start, end) < 0:
+        return _JSON_DECODER.raw_decode(html, start)[0]
+    script = JS_DATE_RE.sub(r'"\1"', html[start:end])
+    script = JS_UNDEFINED_RE.sub('null', script)
+    return _JSON_DECODER.raw_decode(script)[0]
+
+
+def iter_youku_video_nodes(node_list):
+    """按深度优先顺序逐个产出优酷 __INITIAL_DATA__ 节点树中影视节点的 data 字典。
+
+    用显式栈代替递归，不构建中间列表；调用方取够需要的数量后停止迭代即可结束遍历。
+    同一节点先遍历 nodes 下的子节点，再遍历 data.nodes 下的子节点。
+    """
+    if not isinstance(node_list, list):
+        return
+    end = object()
+    stack = [iter(node_list)]
+    while stack:
+        node = next(stack[-1], end)
+        if node is end:
+            stack.pop()
+            continue
+        if not isinstance(node, dict):
+            continue
+        node_data = node.get('data')
+        if isinstance(node_data, dict):
+            poster = node_data.get('posterDTO')
+            if 'titleDTO' in node_data and isinstance(poster, dict) and \
+                    ('thumbUrl' in node_data or poster.get('vThumbUrl')):
+                yield node_data
+            children = node_data.get('nodes')
+            if isinstance(children, list) and children:
+                stack.append(iter(children))
+        children = node.get('nodes')
+        if isinstance(children, list) and children:
+            stack.append(iter(children))
+
+
+# 正在请求中的搜索：(id(引擎), 平台, 规范化标题) -> Future，并发的相同搜索只由第一个调用方请求接口
+_INFLIGHT_SEARCHES = {}
+_INFLIGHT_LOCK = threading.Lock()
+
+
+def cached_search(platform):
+    """平台搜索函数装饰器：先查 self.search_cache，未命中再按平台令牌桶限速后请求接口并写入缓存。
+
+    被装饰的函数签名为 (search_term)，返回 make_search_item() 条目列表；
+    同一平台同一标题的海报搜索（精确/宽泛）和VIP检测共用这一份结果，只请求一次接口。
+    缓存未命中时同一标题只有第一个线程去请求，并发的其他线程等待它的结果（即使没有启用缓存）。
+    命中缓存时不消耗令牌；请求失败时抛出异常，不会写入缓存，等待的线程收到同样的异常。
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, search_term):
+            cache = getattr(self, "search_cache", None)
+            key = (id(self), platform, SearchCache.normalize_title(search_term))
+            while True:
+                if cache is not None:
+                    cached = cache.get(platform, "items", False, search_term)
+                    if cached is not None:
+                        return cached
+                with _INFLIGHT_LOCK:
+                    future = _INFLIGHT_SEARCHES.get(key)
+                    owner = future is None
+                    if owner:
+                        future = _INFLIGHT_SEARCHES[key] = Future()
+                if owner:
+                    break
+                try:
+                    # 每个调用方拿到各自的条目副本，和读缓存时一样
+                    return [dict(item) for item in future.result()]
+                except SearchCancelled:
+                    # 请求方被它自己的 stop_event 取消了，本线程重新检查缓存后自己请求
+                    continue
+            try:
+                limiter = (getattr(self, "platform_limiters", None) or {}).get(platform)
+                if limiter is not None and not limiter.acquire(stop_event=getattr(SEARCH_CONTEXT, "stop_event", None)):
+                    raise SearchCancelled(platform)
+                items = func(self, search_term)
+                if cache is not None:
+                    cache.put(platform, "items", False, search_term, items)
+            except BaseException as e:
+                future.set_exception(e)
+                raise
+            else:
+                future.set_result(items)
+                return items
+            finally:
+                with _INFLIGHT_LOCK:
+                    _INFLIGHT_SEARCHES.pop(key, None)
+        return wrapper
+    return decorator
+
+
+class BatchJournal:
+    """批量爬取进度日志：每处理完一行追加一条 JSON 记录（JSONL）。
+
+    Excel 只在暂停/完成时整体保存一次，保存成功后用 compact() 去掉已写入 Excel 的记录；
+    程序异常退出后重新加载同一个 Sheet 时，用 load() 恢复处理状态和获取的标题。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self._file = None
+
+    def append(self, record):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self.lock:
+            if self._file is None:
+                # 上次异常退出可能留下写了一半的行，先补换行避免和新记录粘在一起
+                broken_tail = False
+                if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+                    with open(self.path, "rb") as f:
+                        f.seek(-1, os.SEEK_END)
+                        broken_tail = f.read(1) != b"\n"
+                self._file = open(self.path, "a", encoding="utf-8")
+                if broken_tail:
+                    self._file.write("\n")
+            self._file.write(line)
+            self._file.flush()
+
+    def offset(self):
+        """当前日志长度（字节），compact 时只删除这个位置之前的记录"""
+        with self.lock:
+            if self._file is not None:
+                self._file.flush()
+            return os.path.getsize(self.path) if os.path.exists(self.path) else 0
+
+    def load(self):
+        """读取日志，返回 {行号: 最后一条记录}；最后一行写了一半时忽略"""
+        records = {}
+        with self.lock:
+            if not os.path.exists(self.path):
+                return records
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        records[int(record["row"])] = record
+                    except (ValueError, KeyError, TypeError):
+                        continue
+        return records
+
+    def compact(self, upto):
+        """删除 upto 字节之前（已保存进 Excel）的记录，只保留之后新追加的"""
+        with self.lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            if not os.path.exists(self.path):
+                return
+            with open(self.path, "rb") as f:
+                f.seek(upto)
+                tail = f.read()
+            if tail:
+                tmp_path = self.path + ".tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(tail)
+                os.replace(tmp_path, self.path)
+            else:
+                os.remove(self.path)
+
+    def close(self):
+        with self.lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class BatchStats:
+    """批量任务的分阶段耗时统计（线程安全）：各阶段 p50/p95 耗时、成功率，以及每分钟处理行数。
+
+    阶段如 "搜索:爱奇艺"、"图片下载"、"缩放编码"、"写盘"、"保存Excel"；每个阶段只保留最近
+    max_samples 个耗时样本计算分位数，次数、成功数和总耗时为全程累计。
+    暂停后继续沿用同一个对象（pause()/resume()），用时和每分钟行数只计运行中的时间。
+    """
+
+    REPORT_FIELDS = ("stage", "count", "success_rate", "p50_ms", "p95_ms", "avg_ms", "total_s")
+
+    def __init__(self, max_samples=5000):
+        self.lock = threading.Lock()
+        self.max_samples = max_samples
+        self.started_at = time.time()
+        self.start_time = time.monotonic()  # 当前运行段的开始时间，暂停时为 None
+        self.paused_elapsed = 0.0  # 之前各运行段的累计用时
+        self.stages = OrderedDict()  # 阶段 -> [次数, 成功数, 总耗时, 最近的耗时样本]
+        self.rows = 0
+        self.rows_ok = 0
+
+    def record(self, stage, seconds, ok=True):
+        with self.lock:
+            entry = self.stages.get(stage)
+            if entry is None:
+                entry = self.stages[stage] = [0, 0, 0.0, deque(maxlen=self.max_samples)]
+            entry[0] += 1
+            entry[1] += 1 if ok else 0
+            entry[2] += seconds
+            entry[3].append(seconds)
+
+    def pause(self):
+        """结束当前运行段（暂停），之后的 summary() 用时不再增长"""
+        with self.lock:
+            if self.start_time is not None:
+                self.paused_elapsed += time.monotonic() - self.start_time
+                self.start_time = None
+
+    def resume(self):
+        """开始新的运行段（暂停后继续）"""
+        with self.lock:
+            if self.start_time is None:
+                self.start_time = time.monotonic()
+
+    def elapsed(self):
+        with self.lock:
+            running = time.monotonic() - self.start_time if self.start_time is not None else 0.0
+            return self.paused_elapsed + running
+
+    def record_row(self, ok):
+        """记录处理完的一行（包括跳过的行），ok 表示下载成功"""
+        with self.lock:
+            self.rows += 1
+            self.rows_ok += 1 if ok else 0
+
+    def summary(self):
+        """返回统计快照：{"started_at", "elapsed_s", "rows", "rows_ok", "rows_per_minute", "stages": [...]}"""
+        with self.lock:
+            stages = [(name, count, ok, total, sorted(samples))
+                      for name, (count, ok, total, samples) in self.stages.items()]
+            rows, rows_ok = self.rows, self.rows_ok
+        elapsed = self.elapsed()
+
+        def percentile(values, q):
+            return values[min(len(values) - 1, int(round(q * (len(values) - 1))))] if values else 0.0
+
+        return {
+            "started_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.started_at)),
+            "elapsed_s": round(elapsed, 2),
+            "rows": rows,
+            "rows_ok": rows_ok,
+            "rows_per_minute": round(rows / elapsed * 60, 1) if elapsed > 0 else 0.0,
+            "stages": [
+                {
+                    "stage": name,
+                    "count": count,
+                    "success_rate": round(ok / count, 4) if count else 0.0,
+                    "p50_ms": round(percentile(values, 0.5) * 1000, 1),
+                    "p95_ms": round(percentile(values, 0.95) * 1000, 1),
+                    "avg_ms": round(total / count * 1000, 1) if count else 0.0,
+                    "total_s": round(total, 2),
+                }
+                for name, count, ok, total, values in stages
+            ],
+        }
+
+    def summary_text(self):
+        """多行文本，用于界面实时显示和命令行输出"""
+        summary = self.summary()
+        lines = [f"{summary['rows']} 行（成功 {summary['rows_ok']}），{summary['rows_per_minute']} 行/分钟，"
+                 f"用时 {summary['elapsed_s']:.0f} 秒"]
+        for stage in summary["stages"]:
+            lines.append(f"{stage['stage']}: {stage['count']} 次  成功率 {stage['success_rate']:.0%}  "
+                         f"p50 {stage['p50_ms']:.0f}ms  p95 {stage['p95_ms']:.0f}ms")
+        return "\n".join(lines)
+
+    def write_report(self, base_path):
+        """把统计写成 <base_path>.json 和 <base_path>.csv，返回两个文件路径"""
+        summary = self.summary()
+        json_path = base_path + ".json"
+        csv_path = base_path + ".csv"
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        with open(csv_path, "w", encoding="utf-8-sig", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=self.REPORT_FIELDS)
+            writer.writeheader()
+            writer.writerows(summary["stages"])
+            writer.writerow({
+                "stage": "整行",
+                "count": summary["rows"],
+                "success_rate": round(summary["rows_ok"] / summary["rows"], 4) if summary["rows"] else 0.0,
+                "total_s": summary["elapsed_s"],
+            })
+        return json_path, csv_path
+
+
+# 各平台接口与图片CDN的域名后缀，用于把请求归到对应平台的连接池
+PLATFORM_HOST_SUFFIXES = {
+    "爱奇艺": ("iqiyi.com", "iqiyipic.com", "qiyipic.com"),
+    "腾讯视频": ("qq.com", "gtimg.cn", "gtimg.com", "qpic.cn"),
+    "优酷视频": ("youku.com", "ykimg.com", "alicdn.com", "tudou.com"),
+}
+
+
+class SessionManager:
+    """按平台复用的 requests 会话：连接池保持长连接，5xx/超时按指数退避自动重试。
+
+    超时可以按域名在 config.json 的 http_timeouts 中配置（精确域名或域名后缀），
+    未配置的域名使用调用处给出的超时。
+    """
+
+    def __init__(self, pool_size=10, retries=3, backoff_factor=0.5, host_timeouts=None):
+        self.pool_size = max(1, int(pool_size))
+        self.retries = int(retries)
+        self.backoff_factor = float(backoff_factor)
+        self.host_timeouts = dict(host_timeouts or {})
+        self.sessions = {}
+        self.lock = threading.Lock()
+
+    def _new_session(self):
+        retry = Retry(
+            total=self.retries, connect=self.retries, read=self.retries, status=self.retries,
+            backoff_factor=self.backoff_factor,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=frozenset(["GET", "POST", "HEAD"]),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=self.pool_size, max_retries=retry)
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    @staticmethod
+    def platform_for_url(url):
+        host = urllib.parse.urlsplit(url).hostname or ""
+        for platform, suffixes in PLATFORM_HOST_SUFFIXES.items():
+            if any(host == suffix or host.endswith("." + suffix) for suffix in suffixes):
+                return platform
+        return "其他"
+
+    def session_for(self, platform):
+        with self.lock:
+            session = self.sessions.get(platform)
+            if session is None:
+                session = self.sessions[platform] = self._new_session()
+            return session
+
+    def timeout_for(self, url, default):
+        host = urllib.parse.urlsplit(url).hostname or ""
+        if host in self.host_timeouts:
+            return self.host_timeouts[host]
+        for pattern, timeout in self.host_timeouts.items():
+            if pattern != "default" and host.endswith("." + pattern.lstrip(".")):
+                return timeout
+        if default is None:
+            return self.host_timeouts.get("default", 20)
+        return default
+
+    def request(self, method, url, platform=None, timeout=None, **kwargs):
+        if platform is None:
+            platform = self.platform_for_url(url)
+        session = self.session_for(platform)
+        return session.request(method, url, timeout=self.timeout_for(url, timeout), **kwargs)
+
+    def get(self, url, platform=None, **kwargs):
+        return self.request("GET", url, platform=platform, **kwargs)
+
+    def post(self, url, platform=None, **kwargs):
+        return self.request("POST", url, platform=platform, **kwargs)
+
+    def stats(self):
+        """各平台的请求数、新建连接数和连接复用率"""
+        result = {}
+        with self.lock:
+            sessions = list(self.sessions.items())
+        for platform, session in sessions:
+            requests_made = connections = 0
+            for adapter in set(session.adapters.values()):
+                pools = adapter.poolmanager.pools
+                for key in list(pools.keys()):
+                    pool = pools.get(key)
+                    if pool is None:
+                        continue
+                    requests_made += pool.num_requests
+                    connections += pool.num_connections
+            reuse = 1 - connections / requests_made if requests_made else 0.0
+            result[platform] = {"requests": requests_made, "connections": connections, "reuse": reuse}
+        return result
+
+    def close(self):
+        with self.lock:
+            for session in self.sessions.values():
+                session.close()
+            self.sessions = {}
+
+
+def find_cid_column(columns):
+    """自动查找CID列名，兼容大小写和空格"""
+    for col in columns:
+        if str(col).strip().lower() == "cid":
+            return col
+    raise ValueError('Excel表格中未找到"CID"列，请检查表头是否为"CID"或有无多余空格！')
+
+
+def find_movie_name_column(columns):
+    """自动查找影片名称列名，会尝试查找'影片名称'、'标题'等，如果找不到则返回第一列的列名。"""
+    columns = list(columns)
+    possible_names = ["影片名称", "标题", "title", "name"]
+    # 获取清理后的小写列名列表，用于不区分大小写的匹配
+    columns_lower = [str(c).strip().lower() for c in columns]
+
+    for name in possible_names:
+        if name in columns_lower:
+            # 找到匹配项，返回原始大小写的列名
+            return columns[columns_lower.index(name)]
+
+    # 如果关键词都没有找到，默认使用第一列作为影片名称列
+    if columns:
+        return columns[0]
+
+    # 如果表格没有列，则抛出异常
+    raise ValueError("Excel表格中未找到可作为影片名称的列，且表格为空！")
+
+
+def list_excel_sheets(path):
+    """只读方式读取工作簿中的Sheet名称，不解析单元格"""
+    if not path.lower().endswith(".xlsx"):
+        import pandas as pd
+        return pd.ExcelFile(path).sheet_names
+    from openpyxl import load_workbook
+    wb = load_workbook(path, read_only=True)
+    try:
+        return list(wb.sheetnames)
+    finally:
+        wb.close()
+
+
+def read_excel_sheet(path, sheet_name=None, select=None):
+    """以只读流式（iter_rows）读取一个Sheet，返回 (DataFrame, Excel行号列表)
+
+    select(表头列表) 返回需要保留的列名，未指定时保留全部列；只有被选中的列会进入 DataFrame。
+    空单元格与 pd.read_excel 一样读为 NaN；空行不进入 DataFrame，
+    Excel行号列表记录每一行在工作表中的行号，供写回结果时定位。
+    """
+    import pandas as pd
+    if not path.lower().endswith(".xlsx"):
+        df = pd.read_excel(path, sheet_name=sheet_name or 0)
+        if select is not None:
+            df = df[list(select(list(df.columns)))]
+        return df, [i + 2 for i in range(len(df))]
+
+    from openpyxl import load_workbook
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb[sheet_name] if sheet_name else wb.worksheets[0]
+        rows = ws.iter_rows(values_only=True)
+        header = list(next(rows, ()))
+        while header and header[-1] is None:
+            header.pop()
+        header = [str(h) if h is not None else f"Unnamed: {i}" for i, h in enumerate(header)]
+        columns = list(select(header)) if select is not None else header
+        indexes = [header.index(col) for col in columns]
+        data = []
+        excel_rows = []
+        for excel_row, row in enumerate(rows, start=2):
+            values = [row[i] if i < len(row) and row[i] is not None else math.nan for i in indexes]
+            if all(is_missing_value(v) or (isinstance(v, str) and not v.strip()) for v in values):
+                continue
+            data.append(values)
+            excel_rows.append(excel_row)
+    finally:
+        wb.close()
+    return pd.DataFrame(data, columns=columns), excel_rows
+
+
+def write_excel_results(path, sheet_name, df, excel_rows, result_columns, mismatch_column="标题不一致"):
+    """把 df 中的结果列写回工作簿指定Sheet的对应行，其它列保持不变
+
+    标题不一致的行在同一遍写入时整行标红加粗，不再单独打开工作簿着色。
+    """
+    from openpyxl import load_workbook
+    from openpyxl.styles import Font
+    wb = load_workbook(path)
+    try:
+        ws = wb[sheet_name]
+        header = [cell.value for cell in next(ws.iter_rows(min_row=1, max_row=1))]
+        column_numbers = {}
+        for col in result_columns:
+            if col in header:
+                column_numbers[col] = header.index(col) + 1
+            else:
+                header.append(col)
+                column_numbers[col] = len(header)
+                ws.cell(row=1, column=len(header), value=col)
+        max_column = ws.max_column
+        red_font = Font(color="FF0000", bold=True)
+        plain_font = Font()
+        # 先按列取出 Python 值（numpy 标量转为原生类型，布尔值才会写成 TRUE/FALSE）
+        column_values = [
+            (column_number, [None if is_missing_value(v) else (v.item() if hasattr(v, "item") else v)
+                             for v in df[col].tolist()])
+            for col, column_number in column_numbers.items()
+        ]
+        mismatch_values = df[mismatch_column].tolist() if mismatch_column in df.columns else None
+        for i, excel_row in enumerate(excel_rows):
+            for column_number, values in column_values:
+                ws.cell(row=excel_row, column=column_number, value=values[i])
+            if mismatch_values is None:
+                continue
+            mismatch = mismatch_values[i]
+            if mismatch and not is_missing_value(mismatch):
+                for column_number in range(1, max_column + 1):
+                    ws.cell(row=excel_row, column=column_number).font = red_font
+            elif ws.cell(row=excel_row, column=1).font.color is not None and \
+                    ws.cell(row=excel_row, column=1).font.color.rgb == red_font.color.rgb:
+                # 之前标红、现在已一致的行恢复默认字体
+                for column_number in range(1, max_column + 1):
+                    ws.cell(row=excel_row, column=column_number).font = plain_font
+        wb.save(path)
+    finally:
+        wb.close()
+
+
+def index_image_folder(folder, extensions=DELETE_IMAGE_EXTS):
+    """用 os.scandir 扫描一次目录，返回 {文件名(不含扩展名): [路径, ...]}，路径按扩展名优先级排序
+
+    键经过 os.path.normcase，在 Windows 上与文件系统一样不区分大小写。
+    """
+    index = {}
+    priority = {ext: i for i, ext in enumerate(extensions)}
+    try:
+        entries = os.scandir(folder)
+    except OSError:
+        return index
+    with entries:
+        for entry in entries:
+            stem, ext = os.path.splitext(entry.name)
+            rank = priority.get(ext.lower())
+            if rank is None or not entry.is_file():
+                continue
+            index.setdefault(os.path.normcase(stem), []).append((rank, entry.path))
+    return {stem: [path for _, path in sorted(paths)] for stem, paths in index.items()}
+
+
+def is_missing_value(value):
+    """判断单元格值是否为空（None / NaN），不依赖 pandas"""
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+class PosterEngine:
+    """海报搜索/下载/缩放核心，不读写任何界面控件，可在任意线程和进程中使用。
+
+    overrides 中的键会覆盖 config.json 中的同名设置（不写回文件），
+    命令行工具用它传入搜索优先级、并发数等参数。
+    """
+
+    def __init__(self, config_file="config.json", overrides=None):
+        self.config_file = config_file
+        self.settings_overrides = dict(overrides or {})
+        self.settings_cache = None
+        self.init_engine(self.load_settings())
+
+    def init_engine(self, settings):
+        """根据设置创建网络会话、缓存、限速器和各平台请求头"""
+        self.filename_format = settings.get("filename_format", "{标题}_{类型}_{图片尺寸}")
+        self.default_precise = bool(settings.get("default_precise", False))
+        self.size_presets = {name: dict(sizes) for name, sizes in SIZE_PRESETS.items()}
+        self.batch_state_lock = threading.Lock()
+        self.platform_limiters = {}
+        self.search_executor = None  # 并行搜索线程池，首次使用时创建
+        self.search_cache = self.create_search_cache(settings)
+        self.http = self.create_session_manager(settings)
+        self.max_image_bytes = self.get_max_image_bytes(settings)
+        self.download_locks = [threading.Lock() for _ in range(64)]  # 未启用缓存时按URL分段加锁
+        self.image_cache = self.create_image_cache(settings)
+        self.transfer_stats = {}  # 平台 -> [下载字节数, 下载耗时秒]
+        self.transfer_stats_lock = threading.Lock()
+        self.batch_stats = None  # 当前/最近一次批量的分阶段统计（BatchStats）
+
+        # 设置爱奇艺请求头 (Load cookie from settings)
+        self.iqiyi_headers = {
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+            "Referer": "https://www.iqiyi.com/",
+            "Accept": "application/json, text/plain, */*",
+            "Cookie": settings.get("iqiyi_cookie", "") # Load from settings
+        }
+
+        # 腾讯视频请求头 (Load cookie from settings)
+        self.tencent_headers = {
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/117.0.0.0 Safari/537.36",
+            "Content-Type": "application/json",
+            "Referer": "https://v.qq.com/",
+            "Origin": "https://v.qq.com",
+            "Cookie": settings.get("tencent_cookie", "") # Load from settings
+        }
+
+        # 优酷视频请求头 (Load cookie from settings)
+        self.youku_headers = {
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Safari/537.36 Edg/135.0.0.0",
+            "Referer": "https://www.youku.com/",
+            "Cookie": settings.get("youku_cookie", "") # Load from settings
+        }
+
+    def get_default_precise(self):
+        """precise 参数为 None 时使用的精确搜索开关（界面中由精确搜索复选框决定）"""
+        return self.default_precise
+
+    # === 设置、缓存与网络 ===
+
+    def get_default_settings(self):
+        """Returns a dictionary with default settings."""
+        return {
+            "default_platform": "爱奇艺",
+            "default_precise": False,
+            "default_download_type": "全部",
+            "default_path": os.path.join(os.path.expanduser("~"), "Desktop"),
+            "default_poster_size": "原尺寸",  # 更新为原尺寸，与UI配色优化后的默认值一致
+            "default_vertical_size": "412x600",
+            "default_horizontal_size": "528x296",
+            "filename_format": "{标题}_{类型}_{图片尺寸}",
+            "batch_search_priority": [
+                "优酷视频-精确搜索", "爱奇艺-精确搜索", "爱奇艺-普通搜索"
+            ],
+            "batch_horizontal_path": os.path.join(os.path.expanduser("~"), "Desktop", "横图"),
+            "batch_vertical_path": os.path.join(os.path.expanduser("~"), "Desktop", "竖图"),
+            "delete_horizontal_path": os.path.join(os.path.expanduser("~"), "Desktop", "横图"),  # 添加删除路径配置
+            "delete_vertical_path": os.path.join(os.path.expanduser("~"), "Desktop", "竖图"),    # 添加删除路径配置
+            "batch_default_size": "原尺寸",  # 更新为原尺寸
+            "batch_default_vertical_size": "412x600",
+            "batch_default_horizontal_size": "528x296",
+            "iqiyi_cookie": "", # Start empty
+            "tencent_cookie": "",
+            "youku_cookie": "",
+            "batch_concurrency": 4,  # 批量爬取每个阶段的并发线程数
+            "batch_speculative_search": True,  # 同时搜索所有优先级平台，取优先级最高的命中结果
+            "search_cache_enabled": True,  # 搜索结果缓存（search_cache.db）
+            "search_cache_ttl_hours": 24,  # 搜索缓存有效期（小时）
+            "image_cache_enabled": True,  # 图片缓存（image_cache 目录），预览/放大/下载共用
+            "image_cache_memory_mb": 64,  # 图片缓存内存上限（MB）
+            "image_cache_disk_mb": 512,  # 图片缓存磁盘上限（MB）
+            "image_cache_fresh_minutes": 30,  # 超过该时间后用 ETag/Last-Modified 重新校验
+            "image_max_mb": 30,  # 单张图片下载大小上限（MB），超过则放弃
+            "http_pool_size": 0,  # 每个平台的连接池大小，0=按批量并发数自动计算
+            "http_retries": 3,  # 5xx/超时/连接失败的重试次数
+            "http_backoff_factor": 0.5,  # 重试退避系数（0.5 -> 0.5s, 1s, 2s ...）
+            "http_timeouts": {  # 按域名（或域名后缀）设置超时秒数，default 用于调用处未指定时
+                "default": 20,
+                "mesh.if.iqiyi.com": 20,
+                "pbaccess.video.qq.com": 20,
+                "so.youku.com": 20
+            },
+            "preview_workers": 6,  # 预览图加载线程数
+            "batch_encode_workers": 0,  # 批量编码子进程数：0=自动(CPU核数-1)，1=不使用子进程
+            "batch_encode_quality": 95,  # 批量编码初始质量（超过目标大小时自动降低）
+            "batch_encode_format": "JPEG",  # 批量输出格式：JPEG / WEBP / PNG
+            "platform_rate_limits": {  # 每个平台的令牌桶限速：rate=每秒请求数，burst=突发上限
+                "爱奇艺": {"rate": 1.0, "burst": 2},
+                "腾讯视频": {"rate": 1.0, "burst": 2},
+                "优酷视频": {"rate": 1.0, "burst": 2}
+            }
+        }
+
+    def read_settings_file(self):
+        """Reads config.json merged with defaults, returning defaults if file not found or invalid."""
+        defaults = self.get_default_settings()
+        try:
+            if os.path.exists(self.config_file):
+                with open(self.config_file, 'r', encoding='utf-8') as f:
+                    loaded_settings = json.load(f)
+                # Ensure all keys exist by merging with defaults
+                return {**defaults, **loaded_settings}
+        except (json.JSONDecodeError, IOError) as e:
+            pass
+        return defaults
+
+    def load_settings(self):
+        """返回当前设置（config.json + 临时覆盖项）。
+
+        config.json 只在首次调用时读取并缓存，之后只有 save_settings_file() / reload_settings()
+        会重新读取；每次返回新的字典，调用方修改不会影响缓存。
+        """
+        if self.settings_cache is None:
+            self.settings_cache = self.read_settings_file()
+        # 命令行参数等临时覆盖项（不写回 config.json）
+        return {**self.settings_cache, **self.settings_overrides}
+
+    def reload_settings(self):
+        """丢弃缓存，重新读取 config.json"""
+        self.settings_cache = None
+        return self.load_settings()
+
+    def save_settings_file(self, updates):
+        """把 updates 合并写入 config.json 并刷新缓存，保留文件中其它配置项（如并发数、平台限速）"""
+        settings = {**self.read_settings_file(), **updates}
+        with open(self.config_file, 'w', encoding='utf-8') as f:
+            json.dump(settings, f, ensure_ascii=False, indent=4)
+        self.settings_cache = settings
+        return self.load_settings()
+
+    def create_search_cache(self, settings):
+        """在配置文件所在目录创建搜索结果缓存，关闭或创建失败时返回 None"""
+        if not settings.get("search_cache_enabled", True):
+            return None
+        try:
+            db_path = os.path.join(os.path.dirname(os.path.abspath(self.config_file)), "search_cache.db")
+            cache = SearchCache(db_path, ttl_seconds=float(settings.get("search_cache_ttl_hours", 24)) * 3600)
+            cache.purge_expired()
+            return cache
+        except Exception as e:
+            print(f"搜索缓存初始化失败，将不使用缓存: {e}")
+            return None
+
+    def create_session_manager(self, settings):
+        """按设置创建各平台共用的HTTP会话管理器，连接池大小默认随批量并发数调整"""
+        pool_size = int(settings.get("http_pool_size", 0))
+        if pool_size <= 0:
+            pool_size = max(1, int(settings.get("batch_concurrency", 4))) * 2 + 4
+        return SessionManager(
+            pool_size=pool_size,
+            retries=settings.get("http_retries", 3),
+            backoff_factor=settings.get("http_backoff_factor", 0.5),
+            host_timeouts=settings.get("http_timeouts", {}),
+        )
+
+    def get_connection_stats_text(self):
+        """各平台连接复用情况，如：爱奇艺 请求42/连接3(复用93%)"""
+        parts = []
+        for platform, stats in self.http.stats().items():
+            if stats["requests"]:
+                parts.append(f"{platform} 请求{stats['requests']}/连接{stats['connections']}(复用{stats['reuse']:.0%})")
+        return "  ".join(parts)
+
+    def create_image_cache(self, settings):
+        """在配置文件所在目录创建图片缓存，关闭或创建失败时返回 None"""
+        if not settings.get("image_cache_enabled", True):
+            return None
+        try:
+            cache_dir = os.path.join(os.path.dirname(os.path.abspath(self.config_file)), "image_cache")
+            return ImageCache(
+                cache_dir,
+                max_memory_bytes=int(float(settings.get("image_cache_memory_mb", 64)) * 1024 * 1024),
+                max_disk_bytes=int(float(settings.get("image_cache_disk_mb", 512)) * 1024 * 1024),
+                fresh_seconds=float(settings.get("image_cache_fresh_minutes", 30)) * 60,
+                max_image_bytes=self.get_max_image_bytes(settings),
+                http=self.http,
+            )
+        except Exception as e:
+            print(f"图片缓存初始化失败，将不使用缓存: {e}")
+            return None
+
+    def get_max_image_bytes(self, settings):
+        """单张图片允许下载的最大字节数（image_max_mb）"""
+        return int(float(settings.get("image_max_mb", 30)) * 1024 * 1024)
+
+    def fetch_image(self, url, headers, timeout=20, pin=False):
+        """下载图片，优先走图片缓存；返回值带 status_code、content，以及本次下载的字节数和耗时。
+        未启用缓存时同样流式写入临时文件（支持续传和大小上限），读出后删除。
+        pin=True 时返回的缓存文件不会被淘汰，用完后需调用 image_cache.unpin(response.path)。
+        """
+        if self.image_cache is not None:
+            return self.image_cache.fetch(url, headers=headers, timeout=timeout, pin=pin)
+        tmp_dir = os.path.join(tempfile.gettempdir(), "poster_downloader")
+        os.makedirs(tmp_dir, exist_ok=True)
+        digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        dest_path = os.path.join(tmp_dir, digest)
+        with self.download_locks[int(digest[:8], 16) % len(self.download_locks)]:
+            start = time.monotonic()
+            status_code, response_headers, downloaded = stream_download(
+                url, headers, dest_path, timeout=timeout, max_bytes=self.max_image_bytes, http=self.http
+            )
+            elapsed = time.monotonic() - start
+            content = b""
+            if status_code == 200:
+                with open(dest_path, "rb") as f:
+                    content = f.read()
+                os.remove(dest_path)
+        return CachedImageResponse(status_code, content, response_headers, downloaded=downloaded, elapsed=elapsed)
+
+    def record_transfer(self, platform, response):
+        """累计各平台的下载字节数和耗时，用于计算下载速度"""
+        downloaded = getattr(response, "downloaded", 0)
+        elapsed = getattr(response, "elapsed", 0)
+        if not downloaded or not isinstance(elapsed, (int, float)):
+            return
+        with self.transfer_stats_lock:
+            stats = self.transfer_stats.setdefault(platform, [0, 0.0])
+            stats[0] += downloaded
+            stats[1] += elapsed
+
+    def get_transfer_stats_text(self):
+        """各平台平均下载速度，如：爱奇艺 1.2MB/s  优酷视频 0.8MB/s"""
+        with self.transfer_stats_lock:
+            items = [(p, b, t) for p, (b, t) in self.transfer_stats.items() if t > 0]
+        return "  ".join(f"{p} {b / t / 1024 / 1024:.2f}MB/s" for p, b, t in items)
+
+    def record_batch_stage(self, stage, seconds, ok=True):
+        """记录批量流水线某个阶段一次处理的耗时，未运行过批量时忽略"""
+        stats = getattr(self, "batch_stats", None)
+        if stats is not None:
+            stats.record(stage, seconds, ok)
+
+    def get_search_cache_stats_text(self):
+        """搜索缓存命中情况，用于状态栏显示"""
+        if self.search_cache is None:
+            return ""
+        stats = self.search_cache.stats()
+        return f"搜索缓存 命中 {stats['hits']} / 未命中 {stats['misses']}"
+
+    # === 海报搜索 ===
+
+    @cached_search("爱奇艺")
+    def fetch_iqiyi_items(self, search_term):
+        """请求一次爱奇艺搜索接口，返回统一结构的结果条目（见 make_search_item）。
+        source: top_album=第一个模板的 albumInfo（精确结果），album=其他模板的 albumInfo，
+        intent=第一个模板的 intentAlbumInfos（宽泛结果）
+        """
+        # 构建API URL
+        encoded_term = urllib.parse.quote(search_term)
+        api_url = f"https://mesh.if.iqiyi.com/portal/lw/search/homePageV3?key={encoded_term}&current_page=1&pageNum=1&pageSize=25"
+
+        # 发送请求
+        response = self.http.get(api_url, platform="爱奇艺", headers=self.iqiyi_headers, timeout=20)
+        if response.status_code != 200:
+            raise requests.RequestException(f"爱奇艺API请求失败，状态码: {response.status_code}，可能是Cookie过期")
+
+        # 解析JSON响应
+        data_dict = response.json()
+        items = []
+        try:
+            templates = data_dict.get('data', {}).get('templates', []) or []
+            for index, template in enumerate(templates):
+                # albumInfo：影片本身，带VIP标识
+                album_info = template.get('albumInfo')
+                if album_info:
+                    title = album_info.get('title')
+                    img_url = album_info.get('img') or album_info.get('imgH')
+                    if title and img_url:
+                        items.append(make_search_item(
+                            title, img_url, img_url,
+                            self.extract_iqiyi_vip_identifier_from_album(album_info),
+                            "top_album" if index == 0 else "album"
+                        ))
+            if templates:
+                # intentAlbumInfos：宽泛搜索的候选列表
+                for info in templates[0].get('intentAlbumInfos', []) or []:
+                    title = info.get('title')
+                    img_url = info.get('img')
+                    if title and img_url:
+                        items.append(make_search_item(
+                            title, img_url, img_url, self.extract_iqiyi_vip_identifier_from_album(info), "intent"
+                        ))
+        except (AttributeError, TypeError) as e:
+            raise ValueError(f"爱奇艺返回结构异常: {e}") from e
+        return items
+
+    def search_iqiyi(self, search_term, precise=None):
+        """执行爱奇艺搜索 (precise 为 None 时使用默认的精确搜索开关)，返回 [(标题, 图片URL), ...]"""
+        if precise is None:
+            precise = self.get_default_precise()
+        source = "top_album" if precise else "intent"
+        return [
+            (item["title"], item["vert_url"])
+            for item in self.fetch_iqiyi_items(search_term)
+            if item["source"] == source
+        ]
+
+    @cached_search("腾讯视频")
+    def fetch_tencent_items(self, search_term):
+        """请求一次腾讯视频搜索接口，返回统一结构的结果条目（腾讯只有竖图，source=item）。
+        请求失败或接口返回错误时抛出 requests.RequestException，返回结构异常时抛出 ValueError。
+        """
+        # 构建API URL
+        api_url = "https://pbaccess.video.qq.com/trpc.videosearch.mobile_search.MultiTerminalSearch/MbSearch?vplatform=2"
+
+        # 构建POST请求的JSON负载
+        payload = {
+            "version": "25031901",
+            "clientType": 1,
+            "filterValue": "",
+            "uuid": "75D75495-4CF1-4C67-9F10-B0B313C1C999",  # 可能需要生成或使用通用值
+            "retry": 0,
+            "query": search_term,
+            "pagenum": 0,  # 第一页
+            "isPrefetch": True,
+            "pagesize": 30,
+            "queryFrom": 0,
+            "searchDatakey": "",
+            "transInfo": "",
+            "isneedQc": True,
+            "preQid": "",
+            "adClientInfo": "",
+            "extraInfo": {
+                "isNewMarkLabel": "1",
+                "multi_terminal_pc": "1",
+                "themeType": "1",
+                "sugRelatedIds": "{}",
+                "appVersion": ""
+            }
+        }
+
+        # 创建一个干净的headers字典，只保留必要的ASCII字段
+        clean_headers = {
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/117.0.0.0 Safari/537.36",
+            "Content-Type": "application/json",
+            "Referer": "https://v.qq.com/",
+            "Origin": "https://v.qq.com"
+        }
+
+        # 如果有Cookie，确保它是ASCII兼容的
+        if self.tencent_headers.get("Cookie") and self.tencent_headers["Cookie"] != "":
+            clean_headers["Cookie"] = self.tencent_headers["Cookie"]
+
+        # 发送POST请求
+        response = self.http.post(api_url, platform="腾讯视频", headers=clean_headers, json=payload, timeout=20)
+        if response.status_code != 200:
+            raise requests.RequestException(f"腾讯视频API请求失败，状态码: {response.status_code}")
+
+        # 解析JSON响应
+        data_dict = response.json()
+
+        # 保存调试文件
+        try:
+            with open("debug_tencent_response.json", "w", encoding="utf-8") as f:
+                json.dump(data_dict, f, ensure_ascii=False, indent=4)
+        except Exception as e_save:
+            pass
+
+        # 检查API返回是否包含错误
+        ret_code = data_dict.get('ret')
+        if ret_code != 0 and ret_code is not None:
+            # 尝试简化的payload；仍然失败时抛出异常，避免把临时错误当作"未找到"写入缓存
+            simple_payload = {"query": search_term}
+            simple_response = self.http.post(api_url, platform="腾讯视频", headers=clean_headers, json=simple_payload, timeout=20)
+            if simple_response.status_code != 200:
+                raise requests.RequestException(f"腾讯视频API请求失败，状态码: {simple_response.status_code}")
+            data_dict = simple_response.json()
+            if data_dict.get('ret') != 0:
+                raise requests.RequestException(f"腾讯视频API返回错误: ret={data_dict.get('ret')}")
+
+        items = []
+        try:
+            # areaBoxList 第一个区域最相关，遍历其 itemList 中每个项目的 videoInfo
+            area_box_list = data_dict.get('data', {}).get('areaBoxList', [])
+            if area_box_list:
+                for item in area_box_list[0].get('itemList', []):
+                    video_info = item.get('videoInfo')
+                    if video_info:
+                        title = video_info.get('title')
+                        img_url = video_info.get('imgUrl')  # 注意键名是 imgUrl
+                        if title and img_url:
+                            items.append(make_search_item(
+                                title, None, img_url, self.extract_tencent_vip_identifier(item)
+                            ))
+        except (AttributeError, IndexError, TypeError, KeyError) as e:
+            raise ValueError(f"腾讯视频返回结构异常: {e}") from e
+        return items
+
+    def search_tencent(self, search_term, precise=None):
+        """执行腾讯视频搜索 (precise 为 None 时使用默认的精确搜索开关)，返回 [(标题, 图片URL), ...]"""
+        if precise is None:
+            precise = self.get_default_precise()
+        full_results_list = [(item["title"], item["vert_url"]) for item in self.fetch_tencent_items(search_term)]
+        # 根据精确搜索开关决定是否过滤结果
+        if precise:
+            return self.filter_tencent_results(full_results_list, search_term)
+        return full_results_list
+
+    def find_youku_video_nodes(self, node_list, limit=100):
+        """从优酷节点树中提取影视结果条目（见 make_search_item），找到 limit 个后立即停止遍历"""
+        found_results = []
+        for node_data in iter_youku_video_nodes(node_list):
+            title_dto = node_data.get('titleDTO')
+            title = (title_dto.get('displayName') if isinstance(title_dto, dict) else None) or node_data.get('tempTitle')
+            vert_url = node_data['posterDTO'].get('vThumbUrl')
+            horz_url = node_data.get('thumbUrl') or vert_url
+            vert_url = vert_url or horz_url
+            if not (title and horz_url):
+                continue
+            found_results.append(make_search_item(
+                title, horz_url, vert_url, self.extract_youku_vip_identifier_from_json(node_data), "node"
+            ))
+            if len(found_results) >= limit:
+                break
+        return found_results
+
+    @cached_search("优酷视频")
+    def fetch_youku_items(self, search_term):
+        """请求一次优酷搜索页，返回统一结构的结果条目，不触碰任何界面控件。
+        从内嵌 __INITIAL_DATA__ JSON 中解析出的影视节点 source=node；JSON 中没有影视节点时，
+        退回解析 HTML 卡片，得到 source=html 的条目（只用于VIP检测）。
+        网络错误抛出 requests.RequestException，页面结构异常抛出 ValueError。
+        """
+        print(f"开始优酷搜索: {search_term}")
+        encoded_term = urllib.parse.quote(search_term)
+        search_url = f"https://so.youku.com/search/q_{encoded_term}"
+        response = self.http.get(search_url, platform="优酷视频", headers=self.youku_headers, timeout=20)
+
+        if response.status_code != 200:
+            raise requests.RequestException(f"访问优酷搜索页失败，状态码: {response.status_code}")
+
+        html_content = response.text
+        data_dict = extract_initial_data(html_content)
+
+        try:
+            items = self.find_youku_video_nodes(data_dict.get('data', {}).get('nodes', []), limit=50)
+            node_error = None
+        except Exception as e:
+            items = []
+            node_error = e
+
+        if not items:
+            # 回退到HTML解析
+            soup = BeautifulSoup(html_content, 'html.parser')
+            for card in soup.find_all('div', class_=re.compile(r'.*video.*|.*card.*'))[:10]:
+                title_elem = card.find(['h3', 'h4', 'a'], class_=re.compile(r'.*title.*'))
+                title = title_elem.get_text(strip=True) if title_elem else ''
+                img_elem = card.find('img')
+                img_url = img_elem.get('src', '') if img_elem else ''
+                if title and img_url:
+                    items.append(make_search_item(
+                        title, img_url, img_url, self.extract_youku_vip_identifier_from_html(card), "html"
+                    ))
+            if not items and node_error is not None:
+                # 节点解析出错且HTML也没有结果：抛出异常，不把空结果写入缓存
+                raise ValueError(f"优酷页面结构异常: {node_error}") from node_error
+        return items
+
+    def fetch_youku_results(self, search_term, precise):
+        """优酷海报搜索结果 [(标题, 横图URL, 竖图URL), ...]，可在后台线程中调用"""
+        results = [
+            (item["title"], item["horz_url"], item["vert_url"])
+            for item in self.fetch_youku_items(search_term)
+            if item["source"] == "node"
+        ]
+        # --- 精确搜索过滤 (客户端) ---
+        if precise and results:
+            return self.filter_results_by_title_similarity(results, search_term, top_n=3)
+        return results
+
+    def normalize_text(self, text):
+        """标准化文本，用于匹配比较"""
+        # 转小写，替换罗马数字，移除空格
+        text = text.lower()
+        text = text.replace('ii', '2').replace('iii', '3').replace('iv', '4').replace('v', '5')\
+               .replace('vi', '6').replace('vii', '7').replace('viii', '8')
+        text = text.replace('第一季', '1').replace('第二季', '2').replace('第三季', '3')\
+               .replace('第四季', '4').replace('第五季', '5').replace('第六季', '6')
+        text = re.sub(r'\s+', '', text)  # 移除空格
+        return text
+
+    def calculate_match_score(self, title, search_key):
+        """计算匹配分数，分数越低表示匹配度越高"""
+        norm_title = self.normalize_text(title)
+        norm_key = self.normalize_text(search_key)
+
+        # 完全匹配
+        if title == search_key:
+            return 0
+        
+        # 标准化后匹配
+        if norm_title == norm_key:
+            return 1
+        
+        # 第一季检查
+        is_base_key = not any(s in norm_key for s in ['1', '2', '3', '4', '5', '6', '第一季', '第二季'])
+        is_title_s1 = norm_title == norm_key + '1' or norm_title == norm_key + '第一季' or norm_title == norm_key
+        if is_base_key and is_title_s1:
+            return 2
+        
+        # 相似度分数（相似度越高越好，转换为越低的分数）
+        ratio = difflib.SequenceMatcher(None, norm_key, norm_title).ratio()
+        return 3 + (1 - ratio)  # 为较高相似度给较低分数
+
+    def filter_tencent_results(self, results, search_key):
+        """过滤并排序腾讯视频结果，返回前3个最匹配的结果"""
+        if not results or not search_key:
+            return results[:3] if not search_key else results
+
+        scored_results = []
+        for title, img_url in results:
+            # Use the complex scoring function specific to Tencent
+            score = self.calculate_match_score(title, search_key)
+            scored_results.append((score, title, img_url))
+
+        # Sort by score ascending (lower score is better for calculate_match_score)
+        scored_results.sort(key=lambda x: x[0])
+
+        # Return top 3 results as (title, img_url) tuples
+        return [(title, img_url) for score, title, img_url in scored_results[:3]]
+
+    def filter_results_by_title_similarity(self, results, search_key, top_n=3):
+        """根据标题与搜索词的相似度过滤和排序结果 (通用)"""
+        # ... (Implementation remains the same) ...
+        if not results or not search_key:
+            return results[:top_n] if not search_key else results
+
+        scored_results = []
+        norm_key = self.normalize_text(search_key)
+
+        # Adapt to handle different tuple lengths if necessary, but expect (title, url1, url2) for Youku
+        for item in results:
+            title = item[0] # Assume title is always the first element
+            norm_title = self.normalize_text(title)
+            score = difflib.SequenceMatcher(None, norm_key, norm_title).ratio()
+            scored_results.append((score, item)) # Keep the original item tuple
+
+        scored_results.sort(key=lambda x: x[0], reverse=True)
+
+        # Return top N original items
+        return [item for score, item in scored_results[:top_n]]
+
+    # === VIP标识搜索 ===
+
+    def fetch_platform_items(self, platform, search_term):
+        """按平台请求（或从缓存读取）统一结构的搜索结果条目"""
+        if platform == "爱奇艺":
+            return self.fetch_iqiyi_items(search_term)
+        elif platform == "腾讯视频":
+            return self.fetch_tencent_items(search_term)
+        elif platform == "优酷视频":
+            return self.fetch_youku_items(search_term)
+        return []
+
+    def search_vip(self, platform, search_term):
+        """从统一搜索结果中取VIP检测结果 [{'title', 'img_url', 'vip_identifier'}, ...]。
+        与海报搜索共用同一次接口请求；出错时静默处理，返回空列表。
+        """
+        try:
+            items = self.fetch_platform_items(platform, search_term)
+        except Exception as e:
+            return []
+        results = []
+        for item in items:
+            if item["source"] == "intent":
+                continue  # 爱奇艺宽泛候选不参与VIP检测
+            results.append({
+                'title': item["title"],
+                'img_url': item["vert_url"] or item["horz_url"],
+                'vip_identifier': item["vip_identifier"]
+            })
+            # 限制结果数量
+            if len(results) >= 10:
+                break
+        return results
+
+    def _search_vip_limited(self, platform, search_term, stop_event=None):
+        """检测VIP标识，缓存未命中时由 cached_search 按平台令牌桶限速，停止时返回空列表"""
+        SEARCH_CONTEXT.stop_event = stop_event
+        try:
+            return self.search_vip(platform, search_term)
+        finally:
+            SEARCH_CONTEXT.stop_event = None
+
+    def search_vip_all(self, search_term, stop_event=None):
+        """同时在三个平台检测VIP标识，返回 {'爱奇艺': [...], '腾讯视频': [...], '优酷': [...]}
+
+        三个平台的请求并行发出，耗时约等于最慢的单个平台；每个平台仍受各自令牌桶限速。
+        """
+        if not getattr(self, "platform_limiters", None):
+            self.platform_limiters = self.build_platform_limiters(self.load_settings())
+        executor = self.get_search_executor()
+        futures = {
+            VIP_RESULT_KEYS[platform]: executor.submit(self._search_vip_limited, platform, search_term, stop_event)
+            for platform in PLATFORMS
+        }
+        return {key: future.result() for key, future in futures.items()}
+
+    def run_vip_batch(self, titles, stop_event=None, on_result=None, settings=None):
+        """并发检测一批影片的VIP标识
+
+        最多 batch_concurrency 个影片同时检测（每个影片的三个平台再并行），
+        每完成一个影片调用 on_result(序号, 影片名称, 平台结果)，完成顺序不一定与输入顺序一致。
+        设置 stop_event 后不再开始新的影片，等待已开始的影片完成后返回。
+        """
+        settings = settings or self.load_settings()
+        if not getattr(self, "platform_limiters", None):
+            self.platform_limiters = self.build_platform_limiters(settings)
+        workers = max(1, int(settings.get("batch_concurrency", 4)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="vip") as pool:
+            pending = {}
+            for index, title in enumerate(titles):
+                if stop_event is not None and stop_event.is_set():
+                    break
+                # 在途影片数有上限，避免一次性为整张表提交任务
+                while len(pending) >= workers * 2:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self._deliver_vip_result(pending.pop(future), future, on_result)
+                pending[pool.submit(self.search_vip_all, title, stop_event)] = (index, title)
+            for future in as_completed(list(pending)):
+                self._deliver_vip_result(pending.pop(future), future, on_result)
+
+    def _deliver_vip_result(self, job, future, on_result):
+        index, title = job
+        try:
+            results = future.result()
+        except Exception as e:
+            print(f"VIP检测出错: {title}: {e}")
+            results = {key: [] for key in VIP_RESULT_KEYS.values()}
+        if on_result is not None:
+            on_result(index, title, results)
+
+    def search_iqiyi_vip(self, search_term):
+        """搜索爱奇艺VIP标识"""
+        return self.search_vip("爱奇艺", search_term)
+
+    def get_iqiyi_detailed_vip_info(self, qipu_id, item):
+        """获取爱奇艺详细的VIP信息"""
+        try:
+            # 方法1: 从搜索结果中检查payMarkUrl
+            pay_mark_url = item.get('payMarkUrl', '')
+            if pay_mark_url and 'vip' in pay_mark_url.lower():
+                return "VIP"
+            
+            # 方法2: 如果有qipuId，尝试获取详细信息
+            if qipu_id:
+                try:
+                    # 构建详细信息API URL
+                    detail_api_url = f"https://pcw-api.iqiyi.com/video/video/playervideoinfo?tvid={qipu_id}"
+                    response = self.http.get(detail_api_url, platform="爱奇艺", headers=self.iqiyi_headers, timeout=10)
+                    
+                    if response.status_code == 200:
+                        detail_data = response.json()
+                        if detail_data.get('code') == 'A00000':
+                            vip_type = detail_data.get('data', {}).get('vipType', [])
+                            if vip_type:
+                                return f"VIP ({', '.join(vip_type)})"
+                except Exception as e:
+                    pass  # 获取爱奇艺详细信息失败，静默处理
+            
+            return None
+            
+        except Exception as e:
+            pass  # 获取爱奇艺VIP信息时出错，静默处理
+            return None
+
+    def extract_iqiyi_vip_identifier_from_album(self, album_info):
+        """从albumInfo中提取爱奇艺VIP标识"""
+        try:
+            # 检查payMarkUrl字段（最直接的VIP标识）
+            pay_mark_url = album_info.get('payMarkUrl', '')
+            if pay_mark_url and 'vip' in pay_mark_url.lower():
+                return "VIP"
+            
+            # 检查firstVideoIsVip字段
+            first_video_is_vip = album_info.get('firstVideoIsVip')
+            if first_video_is_vip:
+                return "VIP"
+            
+            # 检查vipTips字段
+            vip_tips = album_info.get('vipTips', '')
+            if vip_tips and 'VIP' in vip_tips.upper():
+                return "VIP"
+            
+            # 检查specialTags字段
+            special_tags = album_info.get('specialTags', [])
+            for tag in special_tags:
+                tag_text = tag.get('text', '')
+                if 'VIP' in tag_text.upper():
+                    return tag_text
+            
+            # 检查tags字段
+            tags = album_info.get('tags', [])
+            for tag in tags:
+                tag_text = tag.get('text', '')
+                if 'VIP' in tag_text.upper():
+                    return tag_text
+            
+            return None
+            
+        except Exception as e:
+            pass  # 从albumInfo提取爱奇艺VIP标识时出错，静默处理
+            return None
+
+    def extract_iqiyi_vip_identifier(self, item):
+        """提取爱奇艺VIP标识"""
+        try:
+            # 检查vipType字段（最准确的标识）
+            vip_type = item.get('vipType', [])
+            if vip_type and any('VIP' in str(vt).upper() for vt in vip_type):
+                return "VIP"
+            
+            # 检查payMark字段
+            pay_mark = item.get('payMark')
+            if pay_mark == 1:
+                return "VIP"
+            
+            # 检查payMarkUrl字段
+            pay_mark_url = item.get('payMarkUrl', '')
+            if pay_mark_url and 'vip' in pay_mark_url.lower():
+                return "VIP"
+            
+            # 检查markList字段
+            mark_list = item.get('markList', [])
+            for mark in mark_list:
+                mark_text = mark.get('text', '')
+                if 'VIP' in mark_text.upper():
+                    return mark_text
+            
+            # 检查labelList字段
+            label_list = item.get('labelList', [])
+            for label in label_list:
+                label_text = label.get('text', '')
+                if 'VIP' in label_text.upper():
+                    return label_text
+            
+            return None
+            
+        except Exception as e:
+            pass  # 提取爱奇艺VIP标识时出错，静默处理
+            return None
+
+    def search_tencent_vip(self, search_term):
+        """搜索腾讯视频VIP标识"""
+        return self.search_vip("腾讯视频", search_term)
+
+    def parse_tencent_html_search(self, html_content, search_term):
+        """解析腾讯视频HTML搜索结果"""
+        results = []
+        try:
+            from bs4 import BeautifulSoup
+            import re
+            
+            soup = BeautifulSoup(html_content, 'html.parser')
+            
+            # 查找视频卡片
+            video_cards = soup.find_all(['div', 'li'], class_=re.compile(r'.*video.*|.*card.*|.*item.*'))
+            
+            for card in video_cards[:10]:  # 限制数量
+                # 查找标题
+                title_elem = card.find(['h3', 'h4', 'a', 'span'], class_=re.compile(r'.*title.*|.*name.*'))
+                title = title_elem.get_text(strip=True) if title_elem else ''
+                
+                # 查找图片
+                img_elem = card.find('img')
+                img_url = img_elem.get('src', '') if img_elem else ''
+                
+                # 检查VIP标识
+                vip_identifier = self.extract_tencent_vip_identifier_from_html(card)
+                
+                if title and img_url:
+                    if img_url.startswith('//'):
+                        img_url = 'https:' + img_url
+                    results.append({
+                        'title': title,
+                        'img_url': img_url,
+                        'vip_identifier': vip_identifier
+                    })
+            
+        except Exception as e:
+            pass
+        
+        return results
+
+    def extract_tencent_vip_identifier_from_html(self, card):
+        """从HTML卡片中提取腾讯视频VIP标识"""
+        try:
+            # 查找VIP相关的文本
+            vip_texts = card.find_all(string=re.compile(r'VIP', re.IGNORECASE))
+            if vip_texts:
+                return "VIP"
+            
+            # 查找VIP相关的class
+            vip_classes = card.find_all(class_=re.compile(r'.*vip.*', re.IGNORECASE))
+            if vip_classes:
+                return "VIP"
+            
+            # 查找VIP相关的图片
+            vip_imgs = card.find_all('img', src=re.compile(r'.*vip.*', re.IGNORECASE))
+            if vip_imgs:
+                return "VIP"
+            
+            return None
+            
+        except Exception as e:
+            pass
+            return None
+
+    def extract_tencent_vip_identifier(self, item):
+        """提取腾讯视频VIP标识"""
+        try:
+            video_info = item.get('videoInfo', {})
+            
+            # 检查imgTag字段（主要VIP标识来源）
+            img_tag = video_info.get('imgTag', '')
+            if img_tag:
+                # imgTag是JSON字符串，需要解析
+                try:
+                    import json
+                    img_tag_data = json.loads(img_tag)
+                    
+                    # 遍历所有标签
+                    for tag_key, tag_info in img_tag_data.items():
+                        if isinstance(tag_info, dict):
+                            tag_text = tag_info.get('text', '')
+                            if tag_text and 'VIP' in tag_text.upper():
+                                return tag_text
+                except json.JSONDecodeError:
+                    # 如果JSON解析失败，直接搜索字符串
+                    if 'VIP' in img_tag.upper():
+                        return "VIP"
+            
+            # 检查labelList
+            label_list = video_info.get('labelList', [])
+            for label in label_list:
+                label_text = label.get('text', '')
+                if 'VIP' in label_text.upper():
+                    return label_text
+            
+            # 检查markList
+            mark_list = video_info.get('markList', [])
+            for mark in mark_list:
+                mark_text = mark.get('text', '')
+                if 'VIP' in mark_text.upper():
+                    return mark_text
+            
+            # 检查payStatus字段
+            pay_status = video_info.get('payStatus', '')
+            if pay_status and 'VIP' in pay_status.upper():
+                return pay_status
+            
+            return None
+            
+        except Exception as e:
+            pass
+            return None
+
+    def search_youku_vip(self, search_term):
+        """搜索优酷VIP标识"""
+        return self.search_vip("优酷视频", search_term)
+
+    def extract_youku_vip_identifier_from_json(self, video_data):
+        """从JSON数据中提取优酷VIP标识"""
+        try:
+            # 检查iconCorner字段（最准确的标识）
+            poster_dto = video_data.get('posterDTO', {})
+            icon_corner = poster_dto.get('iconCorner', {})
+            
+            if isinstance(icon_corner, dict):
+                tag_type = icon_corner.get('tagType')
+                tag_text = icon_corner.get('tagText')
+                
+                # tagType=3 且 tagText="VIP" 表示VIP内容
+                if tag_type == 3 and tag_text == "VIP":
+                    return "VIP"
+            
+            # 检查showMediaTag字段
+            show_media_tag = video_data.get('showMediaTag', [])
+            for tag in show_media_tag:
+                if isinstance(tag, dict):
+                    tag_type = tag.get('tagType')
+                    tag_text = tag.get('tagText')
+                    if tag_type == 3 and tag_text == "VIP":
+                        return "VIP"
+            
+            # 检查paid字段
+            paid = video_data.get('paid')
+            if paid == 1:
+                return "VIP"
+            
+            return None
+            
+        except Exception as e:
+            pass
+            return None
+
+    def extract_youku_vip_identifier_from_html(self, card):
+        """从HTML中提取优酷VIP标识"""
+        try:
+            # 查找VIP标识的多种可能位置
+            vip_elements = card.find_all(string=re.compile(r'VIP', re.IGNORECASE))
+            if vip_elements:
+                return "VIP"
+            
+            vip_classes = card.find_all(class_=re.compile(r'.*vip.*', re.IGNORECASE))
+            if vip_classes:
+                return "VIP"
+            
+            vip_imgs = card.find_all('img', src=re.compile(r'.*vip.*', re.IGNORECASE))
+            if vip_imgs:
+                return "VIP"
+            
+            return None
+            
+        except Exception as e:
+            pass
+            return None
+
+    # === 图片下载与缩放 ===
+
+    def sanitize_filename(self, filename):
+        """清理文件名，移除不允许的字符"""
+        return re.sub(r'[\\/*?:"<>|]', "_", filename)
+
+    def smart_resize_and_crop(self, img, target_width, target_height):
+        """智能缩放裁剪：先根据最小修改幅度的边等比例缩放，再中心裁剪多余部分"""
+        try:
+            print(f"  智能缩放裁剪: 原始尺寸 {img.size[0]}x{img.size[1]} -> 目标尺寸 {target_width}x{target_height}")
+            return cover_resize_and_crop(img, target_width, target_height)
+        except Exception as e:
+            print(f"  智能缩放裁剪失败: {e}")
+            print(f"  回退到简单缩放...")
+            # 回退到简单缩放
+            return img.resize((target_width, target_height), RESAMPLE_LANCZOS)
+
+    def build_iqiyi_sized_url(self, original_url, width, height):
+        """构建爱奇艺带尺寸参数的URL (_width_height suffix)"""
+        if not original_url or not width or not height:
+            return original_url
+        try:
+            last_dot_index = original_url.rfind('.')
+            query_start_index = original_url.rfind('?')
+            # Handle cases with or without query parameters
+            end_index = query_start_index if query_start_index != -1 else len(original_url)
+            if last_dot_index == -1 or last_dot_index < original_url.rfind('/'):
+                base_url = original_url[:end_index]
+                extension = ""
+            else:
+                 # Ensure the dot is before any query params
+                 if query_start_index != -1 and last_dot_index > query_start_index:
+                      # Dot is part of query params, treat as no extension
+                      base_url = original_url[:end_index]
+                      extension = "" # No extension part
+                 else:
+                      base_url = original_url[:last_dot_index]
+                      extension = original_url[last_dot_index:end_index] # Include dot
+                 # Remove potential old suffix before adding new one
+                 base_url = re.sub(r'_\d+_\d+$', '', base_url)
+                 # Add query params back if they existed
+                 query_string = original_url[query_start_index:] if query_start_index != -1 else ""
+            
+            sized_url = f"{base_url}_{width}_{height}{extension}{query_string}"
+            return sized_url
+        except Exception as e:
+            return original_url
+
+    def build_youku_vertical_sized_url(self, original_url, width, height):
+        """尝试构建优酷带尺寸参数的竖图URL (基于阿里云OSS规则)"""
+        if not original_url or width <= 0 or height <= 0:
+            return original_url # Return original if params are invalid or no URL
+
+        try:
+            parsed_url = urllib.parse.urlparse(original_url)
+            query_params = urllib.parse.parse_qs(parsed_url.query)
+
+            # OSS process parameter key
+            process_key = 'x-oss-process'
+            new_actions = []
+
+            if process_key in query_params:
+                # Existing process parameter found
+                current_process_val = query_params[process_key][0]
+                # Split actions like 'image/resize,w_412,h_600/quality,q_90'
+                actions = current_process_val.split('/')
+                has_resize = False
+                for action in actions:
+                    if action.startswith('image/resize'):
+                         # Modify existing resize action
+                         # Keep existing options like m_fill etc. if present
+                         parts = action.split(',')
+                         new_parts = [parts[0]] # Keep 'image/resize'
+                         # Add new width/height, replacing old ones
+                         new_parts.append(f'w_{width}')
+                         new_parts.append(f'h_{height}')
+                         # Keep other options if they existed
+                         for part in parts[1:]:
+                              if not part.startswith('w_') and not part.startswith('h_'):
+                                   new_parts.append(part)
+                         new_actions.append(','.join(new_parts))
+                         has_resize = True
+                    elif action.strip(): # Keep other non-empty actions
+                         new_actions.append(action)
+
+                if not has_resize:
+                    # Add new resize action if none existed
+                    new_actions.insert(0, f'image/resize,w_{width},h_{height}') # Add at beginning
+            else:
+                # No existing process parameter, create a new one
+                new_actions.append(f'image/resize,w_{width},h_{height}')
+
+            # Reconstruct the process string
+            new_process_val = '/'.join(new_actions)
+
+            # Update query parameters
+            query_params[process_key] = [new_process_val]
+
+            # Rebuild the query string
+            new_query_string = urllib.parse.urlencode(query_params, doseq=True)
+
+            # Reconstruct the full URL
+            sized_url = urllib.parse.urlunparse((
+                parsed_url.scheme,
+                parsed_url.netloc,
+                parsed_url.path,
+                parsed_url.params,
+                new_query_string,
+                parsed_url.fragment
+            ))
+            return sized_url
+
+        except Exception as e:
+            return original_url # Fallback to original URL on any error
+
+    def resolve_image_request(self, base_img_url, platform, target_width, target_height):
+        """根据平台和目标尺寸决定实际下载URL、请求头以及缩放方式。
+        返回 (下载URL, 请求头, 是否尝试服务端缩放, 是否需要本地缩放)
+        """
+        download_url_to_try = base_img_url
+        attempt_server_side_scaling = False
+        needs_forced_local_scaling = False
+        headers_to_use = self.iqiyi_headers
+
+        is_original_size = target_width == -1 and target_height == -1
+        if platform == "腾讯视频":
+            headers_to_use = self.tencent_headers
+            if target_width > 0 and target_height > 0 and not is_original_size:
+                needs_forced_local_scaling = True
+        elif platform == "优酷视频":
+            headers_to_use = self.youku_headers
+            if target_width > 0 and target_height > 0 and not is_original_size:
+                needs_forced_local_scaling = True
+                download_url_to_try = base_img_url
+        elif platform == "爱奇艺":
+            headers_to_use = self.iqiyi_headers
+            if target_width > 0 and target_height > 0 and not is_original_size:
+                attempted_sized_url = self.build_iqiyi_sized_url(base_img_url, target_width, target_height)
+                if attempted_sized_url != base_img_url:
+                    download_url_to_try = attempted_sized_url
+                    attempt_server_side_scaling = True
+
+        return download_url_to_try, headers_to_use, attempt_server_side_scaling, needs_forced_local_scaling
+
+    def get_compress_target(self, preset_name):
+        """根据尺寸预设返回 (目标文件大小KB, 日志名称)"""
+        if preset_name == "云南尺寸":
+            return 100, "云南尺寸"  # 云南尺寸压缩到100KB
+        return 300, "自动压缩"  # 其他尺寸压缩到300KB
+
+    def encode_poster_image(self, raw_bytes, target_width, target_height, needs_local_scaling,
+                            target_filesize_kb=300, size_check_name="自动压缩", label=""):
+        """把下载到的原始图片字节缩放裁剪、转为JPG并压缩到目标大小。
+        返回 (True, JPG字节) 或 (False, 失败原因)
+        """
+        target = (target_width, target_height) if needs_local_scaling else (0, 0)
+        if needs_local_scaling and target_width > 0 and target_height > 0:
+            print(f"  开始智能缩放裁剪 ({label}): -> {target_width}x{target_height}")
+        return encode_poster_variants(raw_bytes, [target], target_filesize_kb, size_check_name)[0]
+
+    def build_image_file_path(self, title, download_path, suffix=None, size_str=None, platform=None,
+                              target_width=0, target_height=0, img_type="", use_cid_filename=False):
+        """按文件名格式生成保存路径，已存在同名文件时自动追加序号"""
+        ext = ".jpg"
+
+        # 如果提供了suffix，直接使用title + suffix作为文件名
+        if suffix:
+            base_filename = self.sanitize_filename(title + suffix)
+        elif use_cid_filename:
+            base_filename = self.sanitize_filename(title)
+        else:
+            format_data = {
+                "标题": self.sanitize_filename(title),
+                "图片尺寸": f"{target_width}x{target_height}" if target_width > 0 and target_height > 0 and target_width != -1 and target_height != -1 else (size_str if size_str else "原尺寸"),
+                "类型": img_type if img_type else "",
+                "平台": platform if platform else ""
+            }
+            try:
+                base_filename = self.filename_format.format(
+                    **{k: format_data.get(k, '') for k in ['标题', '图片尺寸', '类型', '平台']}
+                )
+                base_filename = re.sub(r'_+', '_', base_filename).strip('_')
+                if not base_filename:
+                    base_filename = self.sanitize_filename(title)
+            except KeyError as e:
+                base_filename = f"{format_data['标题']}_{format_data['类型']}_{format_data['图片尺寸']}"
+                base_filename = re.sub(r'_+', '_', base_filename).strip('_')
+        file_path = os.path.join(download_path, f"{base_filename}{ext}")
+        counter = 1
+        original_path_base = os.path.join(download_path, base_filename)
+        while os.path.exists(file_path):
+            file_path = f"{original_path_base}_{counter}{ext}"
+            counter += 1
+        return file_path
+
+    def download_image(self, base_img_url, title, download_path, suffix=None, size_str=None,
+                     platform=None, target_width=0, target_height=0, img_type="", use_cid_filename=False,
+                     preset_name=""):
+        """下载、缩放并保存一张海报，返回 (是否成功, 错误信息)；preset_name 决定压缩目标（见 get_compress_target）"""
+        if not base_img_url:
+            return False, "无图片URL"
+
+        download_url_to_try, headers_to_use, attempt_server_side_scaling, needs_forced_local_scaling = \
+            self.resolve_image_request(base_img_url, platform, target_width, target_height)
+
+        try:
+            img_response = self.fetch_image(download_url_to_try, headers_to_use, timeout=30)
+
+            if attempt_server_side_scaling and img_response.status_code != 200:
+                return False, f"爱奇艺尺寸URL无效，状态码:{img_response.status_code}"
+
+            if img_response.status_code != 200:
+                return False, f"HTTP状态码:{img_response.status_code}"
+
+            # 根据不同预设设置不同的压缩目标
+            target_filesize_kb, size_check_name = self.get_compress_target(preset_name)
+
+            ok, save_content = self.encode_poster_image(
+                img_response.content, target_width, target_height, needs_forced_local_scaling,
+                target_filesize_kb, size_check_name, label=f"{title} - {img_type}"
+            )
+            if not ok:
+                return False, save_content
+
+            file_path = self.build_image_file_path(
+                title, download_path, suffix=suffix, size_str=size_str, platform=platform,
+                target_width=target_width, target_height=target_height, img_type=img_type,
+                use_cid_filename=use_cid_filename
+            )
+            with open(file_path, 'wb') as f:
+                f.write(save_content)
+            return True, ""
+        except DownloadTooLarge as e:
+            return False, str(e)
+        except requests.exceptions.Timeout:
+            return False, "请求超时"
+        except requests.exceptions.RequestException as e:
+            return False, f"请求异常:{e}"
+        except Exception as e:
+            return False, f"未知异常:{e}"
+
+    def parse_dimension_string(self, dim_str: str) -> tuple[int, int]:
+        """解析 '宽度x高度' 格式的字符串, 返回 (int, int) 或引发 ValueError"""
+        if not dim_str:
+            raise ValueError("尺寸字符串不能为空")
+        try:
+            parts = dim_str.lower().split('x')
+            if len(parts) != 2:
+                raise ValueError("格式应为 '宽度x高度'")
+            width = int(parts[0].strip())
+            height = int(parts[1].strip())
+            if width <= 0 or height <= 0:
+                raise ValueError("宽度和高度必须是正数")
+            return width, height
+        except (ValueError, IndexError) as e:
+            # Reraise with a more specific message if it's not already one of ours
+            if isinstance(e, ValueError) and str(e) in ["尺寸字符串不能为空", "格式应为 '宽度x高度'", "宽度和高度必须是正数"]:
+                 raise e
+            else:
+                 raise ValueError(f"无效的尺寸格式 '{dim_str}'. 错误: {e}")
+
+    # === 文件删除 ===
+
+    def plan_file_deletion(self, names, folders):
+        """根据文件名（如CID）生成删除计划，不删除任何文件（试运行）
+
+        folders 为 {"横图": 目录, "竖图": 目录}，每个目录只用 os.scandir 扫描一次。
+        返回 {"files": [(类型, 文件名, 路径), ...], "missing": [(类型, 文件名), ...], "scan_seconds": 秒}。
+        与原来逐个扩展名探测一致，每个目录中同名文件只删除扩展名优先级最高的一个。
+        """
+        start_time = time.perf_counter()
+        indexes = {label: index_image_folder(folder) for label, folder in folders.items()}
+        plan = {"files": [], "missing": [], "scan_seconds": 0.0}
+        seen = set()
+        for name in names:
+            clean_name = self.sanitize_filename(str(name).strip())
+            key = os.path.normcase(clean_name)
+            if not clean_name or key in seen:
+                continue
+            seen.add(key)
+            for label, index in indexes.items():
+                paths = index.get(key)
+                if paths:
+                    plan["files"].append((label, clean_name, paths[0]))
+                else:
+                    plan["missing"].append((label, clean_name))
+        plan["scan_seconds"] = time.perf_counter() - start_time
+        return plan
+
+    def delete_planned_files(self, planned_files, workers=8, batch_size=200):
+        """按删除计划分批并行删除文件，返回 (删除数量, 失败列表["类型-文件名: 原因", ...])"""
+        batches = [planned_files[i:i + batch_size] for i in range(0, len(planned_files), batch_size)]
+
+        def delete_batch(batch):
+            deleted, failed = 0, []
+            for label, _, path in batch:
+                try:
+                    os.remove(path)
+                    deleted += 1
+                except OSError as e:
+                    failed.append(f"{label}-{os.path.basename(path)}: {e}")
+            return deleted, failed
+
+        deleted_count, failed_files = 0, []
+        if not batches:
+            return deleted_count, failed_files
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(batches))),
+                                thread_name_prefix="delete") as pool:
+            for deleted, failed in pool.map(delete_batch, batches):
+                deleted_count += deleted
+                failed_files.extend(failed)
+        return deleted_count, failed_files
+
+    # === 批量流水线 ===
+
+    def parse_search_priority(self, priority_list):
+        """把设置中的优先级字符串（如"优酷视频-精确搜索"）转换为 (平台, 是否精确) 列表"""
+        search_configs = []
+        for priority_item in priority_list:
+            platform, _, mode = str(priority_item).partition("-")
+            if platform in PLATFORMS and mode in ("精确搜索", "普通搜索"):
+                search_configs.append((platform, mode == "精确搜索"))
+        return search_configs
+
+    def search_platform(self, platform, search_term, precise):
+        """在指定平台搜索，返回结果列表；不修改界面状态，可在工作线程中调用"""
+        if platform == "优酷视频":
+            return self.fetch_youku_results(search_term, precise)
+        elif platform == "爱奇艺":
+            return self.search_iqiyi(search_term, precise=precise)
+        elif platform == "腾讯视频":
+            return self.search_tencent(search_term, precise=precise)
+        return []
+
+    def build_platform_limiters(self, settings):
+        """根据设置中的 platform_rate_limits 为每个平台创建令牌桶"""
+        defaults = self.get_default_settings()["platform_rate_limits"]
+        configured = settings.get("platform_rate_limits", {}) or {}
+        limiters = {}
+        for platform in PLATFORMS:
+            limit = {**defaults.get(platform, {}), **configured.get(platform, {})}
+            limiters[platform] = TokenBucket(limit.get("rate", 1.0), limit.get("burst", 1))
+        return limiters
+
+    def _search_one_priority(self, platform, precise, movie_name, stop_event=None):
+        """执行一次搜索，出错时视为未找到
+
+        请求频率由平台令牌桶控制（代替固定的随机延迟），令牌只在缓存未命中、真正请求接口时
+        才获取（见 cached_search），命中缓存的重复运行不受网络限速影响
+        """
+        SEARCH_CONTEXT.stop_event = stop_event
+        start_time = time.perf_counter()
+        try:
+            results = self.search_platform(platform, movie_name, precise) or []
+        except SearchCancelled:
+            return []
+        except Exception as e:
+            print(f"搜索平台 {platform} 出错: {e}")
+            print(f"错误详情: {traceback.format_exc()}")
+            results = []
+        finally:
+            SEARCH_CONTEXT.stop_event = None
+        self.record_batch_stage(f"搜索:{platform}", time.perf_counter() - start_time, bool(results))
+        return results
+
+    def get_search_executor(self, concurrency=None):
+        """懒加载的搜索线程池，供并行（抢先）搜索使用"""
+        with self.batch_state_lock:
+            if self.search_executor is None:
+                if concurrency is None:
+                    concurrency = self.load_settings().get("batch_concurrency", 4)
+                workers = max(1, int(concurrency)) * len(PLATFORMS)
+                self.search_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="search")
+            return self.search_executor
+
+    def search_with_priority(self, movie_name, stop_event=None, options=None):
+        """按设置中的优先级搜索，返回 (第一个结果, 成功的平台)，都未找到时返回 (None, None)
+
+        开启 batch_speculative_search 时同时向所有配置的平台发起搜索，
+        再按优先级取第一个命中的结果，耗时约等于最慢的单个平台而不是所有平台之和。
+        批量流水线传入 build_batch_options() 生成的参数快照，不再逐行读取设置。
+        """
+        if options is None:
+            options = self.build_search_options(self.load_settings())
+        if not getattr(self, "platform_limiters", None):
+            self.platform_limiters = self.build_platform_limiters(options["settings"])
+        search_configs = options["search_configs"]
+
+        if options["speculative_search"] and len(search_configs) > 1:
+            executor = self.get_search_executor(options["concurrency"])
+            futures = [
+                executor.submit(self._search_one_priority, platform, precise, movie_name, stop_event)
+                for platform, precise in search_configs
+            ]
+            try:
+                # 按优先级依次等待，高优先级命中后其余请求的结果直接丢弃
+                for (platform, precise), future in zip(search_configs, futures):
+                    results = future.result()
+                    if results:
+                        print(f"找到结果: {results[0][0] if results[0] else '无标题'}（{platform}）")
+                        return results[0], platform
+                    print(f"平台 {platform} 未找到结果")
+            finally:
+                for future in futures:
+                    future.cancel()  # 尚未开始的请求直接取消
+        else:
+            for platform, precise in search_configs:
+                results = self._search_one_priority(platform, precise, movie_name, stop_event)
+                # 如果找到结果，返回第一个结果和成功的平台
+                if results:
+                    print(f"找到结果: {results[0][0] if results[0] else '无标题'}")
+                    return results[0], platform
+                print(f"平台 {platform} 未找到结果")
+
+        print(f"所有平台都未找到结果: {movie_name}")
+        return None, None
+
+    def plan_batch_downloads(self, result, cid, platform, options, copy_cids=()):
+        """根据搜索结果生成该行需要下载的图片任务（竖图/横图），文件名使用CID。
+        copy_cids 为同名影片其他行的CID，生成的图片再写一份到这些CID的文件名（copy_paths）。
+        """
+        download_type = options["download_type"]
+        want_vert = download_type in ("全部", "竖图")
+        want_horz = download_type in ("全部", "横图")
+        if platform == "优酷视频" and len(result) == 3:
+            title, horz_url, vert_url = result
+        elif len(result) == 2:
+            title, horz_url = result
+            vert_url = horz_url
+            if platform == "腾讯视频":
+                horz_url = None  # 腾讯只有竖图
+        else:
+            return []
+        tasks = []
+        for wanted, url, size, save_dir, img_type in (
+            (want_vert, vert_url, options["v_size"], options["v_dir"], "竖图"),
+            (want_horz, horz_url, options["h_size"], options["h_dir"], "横图"),
+        ):
+            if not (wanted and url):
+                continue
+            file_path = os.path.join(save_dir, self.sanitize_filename(cid) + options["file_ext"])
+            copy_paths = {}
+            for copy_cid in copy_cids:
+                path = os.path.join(save_dir, self.sanitize_filename(copy_cid) + options["file_ext"])
+                if path != file_path:
+                    copy_paths.setdefault(path, copy_cid)
+            tasks.append({
+                "url": url,
+                "platform": platform,
+                "width": size[0],
+                "height": size[1],
+                "img_type": img_type,
+                "file_path": file_path,
+                "copy_paths": [(copy_cid, path) for path, copy_cid in copy_paths.items()],
+            })
+        return tasks
+
+    def group_batch_tasks(self, tasks):
+        """把实际下载URL相同的任务合并成一个下载作业，源图只下载、解码一次"""
+        jobs = {}
+        for task in tasks:
+            url, headers, server_side, needs_scaling = self.resolve_image_request(
+                task["url"], task["platform"], task["width"], task["height"]
+            )
+            job = jobs.setdefault(url, {
+                "url": url,
+                "headers": headers,
+                "server_side": server_side,
+                "platform": task["platform"],
+                "tasks": [],
+            })
+            task["needs_scaling"] = needs_scaling
+            job["tasks"].append(task)
+        return list(jobs.values())
+
+    def group_batch_rows(self, rows):
+        """按标准化后的影片名称（normalize_text）合并重复的行。
+
+        rows 为 (行号, 影片名称, CID) 的可迭代对象，返回 [(行号, 影片名称, CID, followers)]，
+        顺序与各名称首次出现的顺序一致。每个名称只保留首次出现的行去搜索、下载，
+        后续同名的行以 (行号, 影片名称, CID) 放进 followers，生成的图片复制到它们的CID文件名；
+        名称或CID为空的行原样保留（followers 为空），由调用方跳过。
+        """
+        groups = []
+        leaders = {}
+        for index, movie_name, cid in rows:
+            if not movie_name or not cid:
+                groups.append((index, movie_name, cid, []))
+                continue
+            key = self.normalize_text(movie_name)
+            if key in leaders:
+                leaders[key].append((index, movie_name, cid))
+            else:
+                leaders[key] = []
+                groups.append((index, movie_name, cid, leaders[key]))
+        return groups
+
+    def _new_batch_row_state(self, index, movie_name, cid, followers=()):
+        """创建一行在流水线中流转的状态，followers 为同名影片的其他行（见 group_batch_rows）"""
+        return {
+            "index": index,
+            "movie_name": movie_name,
+            "cid": cid,
+            "followers": list(followers),
+            "copy_failures": {},
+            "result": None,
+            "platform": None,
+            "pending": 0,
+            "success_count": 0,
+            "fail_reason": "",
+            "lock": threading.Lock(),
+        }
+
+    def _finish_batch_task(self, state, ok, reason, result_q):
+        """某一行的一张图片处理结束；该行所有图片都结束时交回协调线程"""
+        with state["lock"]:
+            if ok:
+                state["success_count"] += 1
+            elif reason:
+                state["fail_reason"] = reason
+            state["pending"] -= 1
+            done = state["pending"] <= 0
+        if done:
+            result_q.put(state)
+
+    def _copy_batch_outputs(self, state, task, content=None):
+        """把一张图片写到同名影片其他行的CID文件名；content 为空时从本行已保存的文件复制"""
+        for copy_cid, path in task["copy_paths"]:
+            if os.path.exists(path):
+                continue
+            try:
+                if content is None:
+                    shutil.copyfile(task["file_path"], path)
+                else:
+                    with open(path, 'wb') as f:
+                        f.write(content)
+            except OSError as e:
+                with state["lock"]:
+                    state["copy_failures"][copy_cid] = f"写入文件失败:{e}"
+
+    def _batch_search_stage(self, search_q, fetch_q, result_q, options, stop_event):
+        """搜索阶段：按优先级搜索，命中后拆分为图片下载任务（同一源图的多个尺寸合并为一个下载）"""
+        while True:
+            state = search_q.get()
+            if state is None:
+                return
+            try:
+                result, platform = self.search_with_priority(state["movie_name"], stop_event=stop_event, options=options)
+                if not result:
+                    result_q.put(state)
+                    continue
+                print(f"搜索成功，开始下载图片: {state['movie_name']}，成功平台: {platform}")
+                state["result"] = result
+                state["platform"] = platform
+                tasks = self.plan_batch_downloads(result, state["cid"], platform, options,
+                                                  [cid for _, _, cid in state["followers"]])
+                if not tasks:
+                    state["fail_reason"] = "无可下载图片"
+                    result_q.put(state)
+                    continue
+                state["pending"] = len(tasks)
+                for job in self.group_batch_tasks(tasks):
+                    fetch_q.put((state, job))
+            except Exception as e:
+                print(f"[batch_search_stage] 处理异常: {e}\n{traceback.format_exc()}")
+                state["fail_reason"] = f"✘失败:{e}"
+                state["result"] = None
+                result_q.put(state)
+
+    def _batch_fetch_stage(self, fetch_q, encode_q, result_q, stop_event):
+        """图片下载阶段：已存在的文件直接跳过，其余下载原始字节"""
+        while True:
+            item = fetch_q.get()
+            if item is None:
+                return
+            state, job = item
+            tasks = []
+            for task in job["tasks"]:
+                if os.path.exists(task["file_path"]):
+                    print(f"[batch_fetch_stage] 文件已存在，跳过: {task['file_path']}")
+                    self._copy_batch_outputs(state, task)
+                    self._finish_batch_task(state, True, "", result_q)
+                else:
+                    tasks.append(task)
+            if not tasks:
+                continue
+            reason = None
+            try:
+                if stop_event.is_set():
+                    reason = "已停止"
+                else:
+                    # 图片走CDN，不占用平台搜索接口的令牌，并发由下载线程数限制
+                    start_time = time.perf_counter()
+                    # 缓存文件交给编码任务按路径读取，编码完成前不能被淘汰
+                    response = self.fetch_image(job["url"], job["headers"], timeout=30, pin=True)
+                    self.record_batch_stage("图片下载", time.perf_counter() - start_time, response.status_code == 200)
+                    self.record_transfer(job["platform"], response)
+                    if response.status_code != 200:
+                        if job["server_side"]:
+                            reason = f"爱奇艺尺寸URL无效，状态码:{response.status_code}"
+                        else:
+                            reason = f"HTTP状态码:{response.status_code}"
+                    else:
+                        encode_q.put((state, tasks, response.path or response.content))
+            except DownloadTooLarge as e:
+                reason = str(e)
+            except requests.exceptions.Timeout:
+                reason = "请求超时"
+            except requests.exceptions.RequestException as e:
+                reason = f"请求异常:{e}"
+            except Exception as e:
+                reason = f"未知异常:{e}"
+            if reason is not None:
+                for task in tasks:
+                    self._finish_batch_task(state, False, reason, result_q)
+
+    def create_encode_pool(self, settings):
+        """按设置创建编码进程池，返回 (进程池或None, 编码线程数)。
+
+        batch_encode_workers 为 0 时自动取 CPU 核数-1，为 1 时不启用子进程，在线程中编码。
+        """
+        workers = int(settings.get("batch_encode_workers", 0))
+        if workers <= 0:
+            workers = max(1, (os.cpu_count() or 2) - 1)
+        if workers == 1:
+            return None, 1
+        try:
+            return ProcessPoolExecutor(max_workers=workers), workers
+        except Exception as e:
+            print(f"编码进程池创建失败，改为线程内编码: {e}")
+            return None, 2
+
+    def _batch_encode_stage(self, encode_q, write_q, result_q, options, encode_pool=None):
+        """缩放编码阶段：源图解码一次，生成该源图需要的所有尺寸并编码压缩。
+        有进程池时把原始字节交给子进程处理，避开GIL；本线程只负责等待和转发结果。
+        """
+        target_kb, size_check_name = options["compress_target"]
+        while True:
+            item = encode_q.get()
+            if item is None:
+                return
+            state, tasks, raw_bytes = item
+            try:
+                targets = [(t["width"], t["height"]) if t["needs_scaling"] else (0, 0) for t in tasks]
+                args = (raw_bytes, targets, target_kb, size_check_name,
+                        options["encode_quality"], options["encode_format"])
+                # 在执行编码的进程/线程内计时，不含进程池排队等待的时间
+                if encode_pool is not None:
+                    seconds, encoded = encode_pool.submit(timed_call, encode_poster_variants, *args).result()
+                else:
+                    seconds, encoded = timed_call(encode_poster_variants, *args)
+                self.record_batch_stage("缩放编码", seconds, all(ok for ok, _ in encoded))
+            except Exception as e:
+                encoded = [(False, f"未知异常:{e}")] * len(tasks)
+            for task, (ok, content) in zip(tasks, encoded):
+                if ok:
+                    write_q.put((state, task, content))
+                else:
+                    self._finish_batch_task(state, False, content, result_q)
+            if isinstance(raw_bytes, str) and self.image_cache is not None:
+                self.image_cache.unpin(raw_bytes)
+
+    def _batch_write_stage(self, write_q, result_q):
+        """写盘阶段：单线程顺序写文件，避免同名文件竞争；同名影片其他行的CID文件也在这里写"""
+        while True:
+            item = write_q.get()
+            if item is None:
+                return
+            state, task, content = item
+            start_time = time.perf_counter()
+            try:
+                file_path = task["file_path"]
+                if not os.path.exists(file_path):
+                    with open(file_path, 'wb') as f:
+                        f.write(content)
+                self._copy_batch_outputs(state, task, content)
+                self.record_batch_stage("写盘", time.perf_counter() - start_time)
+                self._finish_batch_task(state, True, "", result_q)
+            except Exception as e:
+                self.record_batch_stage("写盘", time.perf_counter() - start_time, False)
+                self._finish_batch_task(state, False, f"写入文件失败:{e}", result_q)
+
+    def build_search_options(self, settings):
+        """校验并预先解析搜索相关设置：优先级 (平台, 是否精确) 列表、抢先搜索开关、并发数"""
+        priority_list = settings.get("batch_search_priority") or self.get_default_settings()["batch_search_priority"]
+        search_configs = tuple(self.parse_search_priority(priority_list))
+        if not search_configs:
+            raise ValueError(f"搜索优先级设置无效: {priority_list}，应为\"平台-精确搜索\"或\"平台-普通搜索\"")
+        return {
+            "settings": MappingProxyType(dict(settings)),
+            "search_configs": search_configs,
+            "speculative_search": bool(settings.get("batch_speculative_search", True)),
+            "concurrency": max(1, int(settings.get("batch_concurrency", 4))),
+        }
+
+    def build_batch_options(self, settings, preset_name, h_dir, v_dir, download_type="全部", custom_sizes=None):
+        """生成批量任务的只读参数快照：搜索优先级、输出尺寸、保存目录、下载类型和编码设置。
+
+        批量开始时生成一次，经流水线各阶段传递，运行期间修改设置不影响本次批量。
+        custom_sizes 为 ("竖图宽x高", "横图宽x高")，预设为"自定义尺寸"时使用（未指定时取设置中的批量默认尺寸）。
+        设置或尺寸无效时抛出 ValueError。
+        """
+        options = self.build_search_options(settings)
+        image_format = str(settings.get("batch_encode_format", "JPEG")).upper()
+        if image_format == "JPG":
+            image_format = "JPEG"
+        if image_format not in ENCODE_FORMATS:
+            print(f"不支持的编码格式 {image_format}，改用JPEG")
+            image_format = "JPEG"
+        if preset_name == "原尺寸":
+            v_size = (-1, -1)
+            h_size = (-1, -1)
+        elif preset_name == "自定义尺寸":
+            v_text, h_text = custom_sizes or (settings.get("batch_default_vertical_size", "412x600"),
+                                              settings.get("batch_default_horizontal_size", "528x296"))
+            v_size = self.parse_dimension_string(v_text)
+            h_size = self.parse_dimension_string(h_text)
+        elif preset_name in self.size_presets:
+            v_size = tuple(self.size_presets[preset_name]["vertical"])
+            h_size = tuple(self.size_presets[preset_name]["horizontal"])
+        else:
+            raise ValueError(f"未知的尺寸预设: {preset_name}")
+        if download_type not in ("全部", "竖图", "横图"):
+            raise ValueError(f"未知的下载类型: {download_type}")
+        options.update({
+            "v_size": v_size,
+            "h_size": h_size,
+            "h_dir": h_dir,
+            "v_dir": v_dir,
+            "download_type": download_type,
+            "compress_target": self.get_compress_target(preset_name),
+            "encode_quality": min(100, max(1, int(settings.get("batch_encode_quality", 95)))),
+            "encode_format": image_format,
+            "file_ext": ENCODE_FORMATS[image_format],
+        })
+        return MappingProxyType(options)
+
+    def start_batch_pipeline(self, options, stop_event, stats=None):
+        """启动批量流水线，返回流水线字典。
+
+        流水线分为 搜索 -> 图片下载 -> 缩放编码 -> 写盘 四个阶段，各阶段之间用有界队列连接，
+        每个平台的请求由各自的令牌桶限速，某个平台慢不会拖住其他平台。
+        调用方往 search_q 投入 _new_batch_row_state() 创建的行状态，从 result_q 取回处理完的行，
+        结束时调用 stop_batch_pipeline()。各阶段耗时记录在 self.batch_stats（BatchStats）中：
+        传入 stats（暂停后继续的同一批量）时接着累计，否则新建。
+        """
+        settings = options["settings"]
+        concurrency = options["concurrency"]
+        self.platform_limiters = self.build_platform_limiters(settings)
+        with self.transfer_stats_lock:
+            self.transfer_stats = {}
+        if stats is None:
+            stats = BatchStats()
+        else:
+            stats.resume()
+        self.batch_stats = stats
+        encode_pool, encode_workers = self.create_encode_pool(settings)
+
+        search_q = queue.Queue()
+        fetch_q = queue.Queue(maxsize=concurrency * 4)
+        encode_q = queue.Queue(maxsize=concurrency * 2)
+        write_q = queue.Queue(maxsize=concurrency * 2)
+        result_q = queue.Queue()
+
+        stages = (
+            [(self._batch_search_stage, search_q, (search_q, fetch_q, result_q, options, stop_event))] * concurrency +
+            [(self._batch_fetch_stage, fetch_q, (fetch_q, encode_q, result_q, stop_event))] * concurrency +
+            [(self._batch_encode_stage, encode_q, (encode_q, write_q, result_q, options, encode_pool))] * encode_workers +
+            [(self._batch_write_stage, write_q, (write_q, result_q))]
+        )
+        threads = []
+        for target, input_q, args in stages:
+            t = threading.Thread(target=target, args=args, daemon=True)
+            t.start()
+            threads.append((t, input_q))
+        return {
+            "search_q": search_q,
+            "result_q": result_q,
+            "threads": threads,
+            "encode_pool": encode_pool,
+            "stop_event": stop_event,
+            "max_in_flight": concurrency * 2,
+        }
+
+    def stop_batch_pipeline(self, pipeline):
+        """通知流水线各阶段线程退出，并关闭编码进程池"""
+        pipeline["stop_event"].set()
+        if self.batch_stats is not None:
+            self.batch_stats.pause()
+        for t, input_q in pipeline["threads"]:
+            input_q.put(None)
+        if pipeline["encode_pool"] is not None:
+            pipeline["encode_pool"].shutdown(wait=False)
+
+    def summarize_batch_row(self, state):
+        """把流水线交回的行状态整理为 (处理状态, 获取图片标题, 标题不一致)，未下载成功时后两项为 None"""
+        result = state["result"]
+        if not result:
+            return state["fail_reason"] or "✘失败:未搜索到结果", None, None
+        if state["success_count"] > 0:
+            obtained_title = result[0]
+            mismatch = self.normalize_text(state["movie_name"]) != self.normalize_text(obtained_title)
+            return "✔成功", obtained_title, mismatch
+        return f"✘失败:{state['fail_reason'] or '未知原因'}", None, None
+
+    def summarize_batch_rows(self, state):
+        """整理一个影片对应的所有行（首行和同名的后续行）的结果，
+        返回 [(行号, CID, 处理状态, 获取图片标题, 标题不一致)]；后续行沿用首行的结果，复制文件失败的行记为失败
+        """
+        status, obtained_title, mismatch = self.summarize_batch_row(state)
+        rows = [(state["index"], state["cid"], status, obtained_title, mismatch)]
+        for index, movie_name, cid in state["followers"]:
+            reason = state["copy_failures"].get(cid)
+            if reason and obtained_title is not None:
+                rows.append((index, cid, f"✘失败:{reason}", None, None))
+            else:
+                rows.append((index, cid, status, obtained_title, mismatch))
+        return rows
+
+    def run_batch(self, rows, options, stop_event=None, on_row=None):
+        """无界面批量处理，返回处理完的行数。
+
+        rows 为 (行号, 影片名称, CID) 的可迭代对象，开始时一次读完并按影片名称合并（group_batch_rows），
+        同名影片只搜索、下载一次；每处理完一行调用
+        on_row(行号, CID, 处理状态, 获取图片标题, 标题不一致)（在调用线程中执行）。
+        stop_event 被设置后不再投入新影片，等在途的影片处理完再返回。
+        """
+        if stop_event is None:
+            stop_event = threading.Event()
+        # 流水线用自己的停止信号：外部停止只是不再投喂，在途的行照常完成，不会被记为失败
+        pipeline = self.start_batch_pipeline(options, threading.Event())
+        groups = iter(self.group_batch_rows(rows))
+        exhausted = False
+        in_flight = 0
+        processed = 0
+        try:
+            while True:
+                while not exhausted and not stop_event.is_set() and in_flight < pipeline["max_in_flight"]:
+                    try:
+                        index, movie_name, cid, followers = next(groups)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    if not movie_name or not cid:
+                        processed += 1
+                        self.batch_stats.record_row(False)
+                        if on_row is not None:
+                            on_row(index, cid, "跳过", None, None)
+                        continue
+                    pipeline["search_q"].put(self._new_batch_row_state(index, movie_name, cid, followers))
+                    in_flight += 1
+
+                if in_flight == 0 and (exhausted or stop_event.is_set()):
+                    return processed
+
+                try:
+                    state = pipeline["result_q"].get(timeout=0.2)
+                except queue.Empty:
+                    continue
+                in_flight -= 1
+                for row in self.summarize_batch_rows(state):
+                    processed += 1
+                    self.batch_stats.record_row(row[2] == "✔成功")
+                    if on_row is not None:
+                        on_row(*row)
+        finally:
+            self.stop_batch_pipeline(pipeline)
@@ -119,7 +119,34 @@ def create_default_config():
         "batch_default_horizontal_size": "528x296",
         "iqiyi_cookie": "",  # 爱奇艺Cookie设置
         "tencent_cookie": "", # 腾讯视频Cookie设置
-        "youku_cookie": ""   # 优酷视频Cookie设置
+        "youku_cookie": "",   # 优酷视频Cookie设置
+        "batch_concurrency": 4,  # 批量爬取每个阶段的并发线程数
+        "batch_speculative_search": True,  # 同时搜索所有优先级平台，取优先级最高的命中结果
+        "search_cache_enabled": True,  # 搜索结果缓存（search_cache.db）
+        "search_cache_ttl_hours": 24,  # 搜索缓存有效期（小时）
+        "image_cache_enabled": True,  # 图片缓存（image_cache 目录），预览/放大/下载共用
+        "image_cache_memory_mb": 64,  # 图片缓存内存上限（MB）
+        "image_cache_disk_mb": 512,  # 图片缓存磁盘上限（MB）
+        "image_cache_fresh_minutes": 30,  # 超过该时间后用 ETag/Last-Modified 重新校验
+        "image_max_mb": 30,  # 单张图片下载大小上限（MB），超过则放弃
+        "http_pool_size": 0,  # 每个平台的连接池大小，0=按批量并发数自动计算
+        "http_retries": 3,  # 5xx/超时/连接失败的重试次数
+        "http_backoff_factor": 0.5,  # 重试退避系数（0.5 -> 0.5s, 1s, 2s ...）
+        "http_timeouts": {  # 按域名（或域名后缀）设置超时秒数，default 用于调用处未指定时
+            "default": 20,
+            "mesh.if.iqiyi.com": 20,
+            "pbaccess.video.qq.com": 20,
+            "so.youku.com": 20
+        },
+        "preview_workers": 6,  # 预览图加载线程数
+        "batch_encode_workers": 0,  # 批量编码子进程数：0=自动(CPU核数-1)，1=不使用子进程
+        "batch_encode_quality": 95,  # 批量编码初始质量（超过目标大小时自动降低）
+        "batch_encode_format": "JPEG",  # 批量输出格式：JPEG / WEBP / PNG
+        "platform_rate_limits": {  # 每个平台的令牌桶限速：rate=每秒请求数，burst=突发上限
+            "爱奇艺": {"rate": 1.0, "burst": 2},
+            "腾讯视频": {"rate": 1.0, "burst": 2},
+            "优酷视频": {"rate": 1.0, "burst": 2}
+        }
     }
 
 def create_project_structure():
@@ -150,6 +177,23 @@ def create_project_structure():
         else:
             print_status("未找到主程序文件 (mainPro.py 或 main.py)", "WARNING")
         
+        # 复制核心引擎和命令行批量工具（主程序依赖 poster_engine.py）
+        for module_file in ("poster_engine.py", "poster_batch.py"):
+            if os.path.exists(module_file):
+                shutil.copy2(module_file, os.path.join(project_root, module_file))
+                print_status(f"模块已复制: {module_file}", "SUCCESS")
+            else:
+                print_status(f"未找到模块文件: {module_file}", "WARNING")
+        
+        # 创建 poster-batch 命令（Windows 批处理 + Linux/macOS 脚本）
+        with open(os.path.join(project_root, "poster-batch.bat"), 'w', encoding='utf-8') as f:
+            f.write('@echo off\r\npython "%~dp0poster_batch.py" %*\r\n')
+        launcher_path = os.path.join(project_root, "poster-batch")
+        with open(launcher_path, 'w', encoding='utf-8', newline='\n') as f:
+            f.write('#!/bin/sh\nexec python3 "$(dirname "$0")/poster_batch.py" "$@"\n')
+        os.chmod(launcher_path, 0o755)
+        print_status("命令行工具已创建: poster-batch", "SUCCESS")
+        
         # 创建配置文件
         config_path = os.path.join(project_root, "setting", "config.json")
         config = create_default_config()
@@ -190,6 +234,9 @@ def create_project_structure():
         print(f"""
 {project_root}/
 ├── poster_downloader.py      # 海报爬取下载器主程序
+├── poster_engine.py          # 搜索/下载核心引擎（无界面）
+├── poster_batch.py           # 命令行批量下载工具
+├── poster-batch(.bat)        # 命令行批量下载启动脚本
 ├── 海报爬取下载器文档.md        # 项目文档
 ├── setup.py                  # 环境配置脚本
 ├── README.md                 # 使用说明
@@ -355,6 +402,13 @@ python poster_downloader.py
 3. 设置保存路径
 4. 点击搜索并下载
 
+### 4. 命令行批量下载（无界面）
+```bash
+poster-batch 片单.xlsx --sheet Sheet1 --preset 基础尺寸
+poster-batch 片单.xlsx --shard 1/4   # 大表拆成4个进程并行：1/4 2/4 3/4 4/4
+```
+未指定的参数使用 config.json 中的批量设置（可用 --config 指定），中断后重新运行会跳过已完成的行。
+
 ## 主要功能
 - 🎯 多平台海报下载（爱奇艺/优酷/腾讯）
 - 🎨 **新增**: 优化UI配色，文字清晰易读
@@ -369,6 +423,8 @@ python poster_downloader.py
 ```
 海报爬取下载器/
 ├── poster_downloader.py      # 主程序
+├── poster_engine.py          # 核心引擎（无界面）
+├── poster_batch.py           # 命令行批量下载
 ├── 海报爬取下载器文档.md        # 详细文档
 ├── setup.py                  # 环境配置
 ├── setting/config.json       # 配置文件
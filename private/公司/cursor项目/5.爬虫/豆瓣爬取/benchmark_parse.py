@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+豆瓣详情页解析性能对比脚本
+
+对比两种从详情页提取字段的方式：
+1. 旧方式：BeautifulSoup 构建整棵文档树，再由 14 个 get_* 方法分别查找
+2. 新方式：parse_subject_page 单遍解析，不构建文档树，字段取齐后停止
+
+使用方法：
+    python benchmark_parse.py 详情页目录                 # 目录中保存的 subject 页面 .html
+    python benchmark_parse.py 页面1.html 页面2.html --rounds 5
+    python benchmark_parse.py                           # 不指定页面时生成模拟页面
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+
+from bs4 import BeautifulSoup
+
+from main import DoubanCrawler, parse_subject_page
+
+FIELD_NAMES = ("电影名称", "导演", "编剧", "主演", "类型", "制片国家/地区", "语言", "上映日期",
+               "片长", "又名", "IMDb", "剧情简介", "豆瓣评分", "评价人数", "海报URL")
+
+
+def legacy_parse(crawler, html):
+    """原 crawl_movie_info_with_anti_crawler_detection 中的解析方式"""
+    soup = BeautifulSoup(html, 'html.parser')
+    director = crawler.get_director(soup)
+    rating, votes = crawler.get_rating(soup)
+    values = (
+        crawler.get_name(soup), director, crawler.get_writer(soup), crawler.get_actors(soup, director),
+        crawler.get_type(soup), crawler.get_place(soup), crawler.get_language(soup),
+        crawler.get_release_date(soup), crawler.get_runtime(soup), crawler.get_sb_name(soup),
+        crawler.get_imdb(soup), crawler.get_summary(soup), rating, votes, crawler.get_poster_url(soup),
+    )
+    return dict(zip(FIELD_NAMES, values))
+
+
+def make_page(index, comments=200):
+    """生成模拟的豆瓣详情页，结构与真实页面一致，并轮换几种页面差异"""
+    variant = index % 4
+    poster = f"https://img1.doubanio.com/view/photo/s_ratio_poster/public/p{index}.{'webp' if variant == 1 else 'jpg'}"
+    writer_label = "编剧:" if variant == 2 else "编剧"
+    imdb = f'<a href="https://www.imdb.com/title/tt{index:07d}">tt{index:07d}</a>' if variant == 3 else f" tt{index:07d}"
+    summary = "" if variant == 3 else (
+        '<span property="v:summary" class="">\n    ' + f"第{index}部影片的剧情简介。" * 30 + "\n</span>")
+    comment_items = "".join(
+        f'<div class="comment-item"><span class="comment-info"><a href="/people/{c}/">用户{c}</a>'
+        f'<span class="allstar40 rating" title="推荐"></span></span>'
+        f'<p class="comment-content"><span class="short">短评内容{c}' + "很好看。" * 20 + '</span></p></div>'
+        for c in range(comments)
+    )
+    return f"""<!DOCTYPE html>
+<html lang="zh-CN"><head>
+<meta property="og:image" content="https://img1.doubanio.com/og/p{index}.jpg" />
+<title>模拟影片{index} (豆瓣)</title>
+<script>var _CONFIG = {{}}; if (a < b) {{ c = "<span>" }}</script>
+</head><body>
+<div id="wrapper"><div id="content">
+<h1><span property="v:itemreviewed">模拟影片{index} The Movie</span><span class="year">(2020)</span></h1>
+<div class="grid-16-8 clearfix"><div class="article">
+<div class="indent clearfix"><div class="subjectwrap clearfix"><div class="subject clearfix">
+<div id="mainpic" class="">
+    <a class="nbgnbg" href="/subject/{index}/photos" title="点击看更多海报">
+        <img src="{poster}" title="点击看更多海报" alt="模拟影片{index}" rel="v:image" />
+   </a>
+</div>
+<div id="info">
+        <span ><span class='pl'>导演</span>: <span class='attrs'><a href="/celebrity/1/" rel="v:directedBy">导演 甲</a></span></span><br/>
+        <span ><span class='pl'>{writer_label}</span> <span class='attrs'><a href="/celebrity/2/">编剧乙</a> / <a href="/celebrity/3/">编剧丙</a></span></span><br/>
+        <span class="actor"><span class='pl'>主演</span>: <span class='attrs'><a href="/celebrity/4/" rel="v:starring">演员丁</a> / <a href="/celebrity/1/" rel="v:starring">导演 甲</a> / <a href="/celebrity/5/" rel="v:starring">演员戊</a></span></span><br/>
+        <span class="pl">类型:</span> <span property="v:genre">剧情</span> / <span property="v:genre">犯罪</span><br/>
+        <span class="pl">制片国家/地区:</span> 中国大陆 / 美国<br/>
+        <span class="pl">语言:</span> 汉语普通话 / 英语<br/>
+        <span class="pl">上映日期:</span> <span property="v:initialReleaseDate" content="2020-01-01(中国大陆)">2020-01-01(中国大陆)</span> / <span property="v:initialReleaseDate" content="2019-09-10(多伦多电影节)">2019-09-10(多伦多电影节)</span><br/>
+        <span class="pl">片长:</span> <span property="v:runtime" content="{90 + index % 60}">{90 + index % 60}分钟</span><br/>
+        <span class="pl">又名:</span> 模拟别名{index} / Another Name &amp; More<br/>
+        <span class="pl">IMDb:</span>{imdb}<br>
+</div>
+</div>
+<div id="interest_sectl"><div class="rating_wrap clearbox" rel="v:rating">
+    <strong class="ll rating_num" property="v:average">{index % 10}.{index % 7}</strong>
+    <div class="rating_right "><div class="rating_sum"><a href="comments" class="rating_people"><span property="v:votes">{1000 + index}</span>人评价</a></div></div>
+</div></div>
+</div></div></div>
+<div class="related-info"><h2><i class="">模拟影片{index}的剧情简介</i></h2>
+<div class="indent" id="link-report-intra">{summary}
+<span class="all hidden">{"完整的剧情简介内容，" * 12}</span>
+</div></div>
+<div id="comments-section"><div class="mod-hd"><h2><i class="">短评</i><span class="pl">(<a href="comments">全部 {comments} 条</a>)</span></h2></div>
+{comment_items}
+</div>
+<div class="recommendations-bd">{"<dl><dt><a href='/subject/1/'><img src='x.jpg' /></a></dt><dd><a>推荐影片</a></dd></dl>" * 10}</div>
+</div></div></div></div>
+</body></html>"""
+
+
+def load_pages(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, name) for name in sorted(os.listdir(path))
+                         if name.lower().endswith(('.html', '.htm')))
+        else:
+            files.append(path)
+    pages = []
+    for file_path in files:
+        with open(file_path, encoding='utf-8', errors='replace') as f:
+            pages.append(f.read())
+    return pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="豆瓣详情页解析性能对比")
+    parser.add_argument("pages", nargs="*", help="保存的详情页（.html 文件或目录），不填则生成模拟页面")
+    parser.add_argument("--rounds", type=int, default=3, help="重复轮数")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)  # 不把解析过程的日志写进 douban_crawler.log
+    crawler = DoubanCrawler(store_path=None)  # 只用 get_* 方法，不打开本地条目库
+    pages = load_pages(args.pages) if args.pages else [make_page(i) for i in range(40)]
+    if not pages:
+        print("没有找到页面文件")
+        return 1
+    total_mb = sum(len(page.encode('utf-8')) for page in pages) / 1024 / 1024
+    print(f"页面数量: {len(pages)}，共 {total_mb:.1f} MB")
+
+    timings = {}
+    outputs = {}
+    for label, func in (("旧方式(BeautifulSoup+逐字段查找)", lambda html: legacy_parse(crawler, html)),
+                        ("新方式(单遍解析)", parse_subject_page)):
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            outputs[label] = [func(page) for page in pages]
+        elapsed = time.perf_counter() - start
+        timings[label] = elapsed
+        print(f"{label}: {elapsed:.2f} 秒，每页 {elapsed / len(pages) / args.rounds * 1000:.1f} 毫秒")
+
+    legacy, engine = outputs.values()
+    mismatches = [(i, name, old[name], new[name])
+                  for i, (old, new) in enumerate(zip(legacy, engine))
+                  for name in FIELD_NAMES if old[name] != new[name]]
+    if mismatches:
+        print(f"提取结果不一致: {len(mismatches)} 个字段")
+        for i, name, old_value, new_value in mismatches[:20]:
+            print(f"  第{i + 1}页 {name}: 旧={old_value!r} 新={new_value!r}")
+    else:
+        print(f"提取结果一致（{len(pages)} 页 × {len(FIELD_NAMES)} 个字段）")
+    legacy_time, engine_time = timings.values()
+    print(f"加速比: {legacy_time / engine_time:.2f}x")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,13 +12,20 @@ import json
 import time
 import random
 import string  # 新增：用于生成随机Cookie
+import asyncio
+import zlib
+import sqlite3
 import logging
 import threading
 import traceback
+import shutil
+import tempfile
 import urllib.parse
-from queue import Queue
+from queue import Queue, Empty
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from difflib import SequenceMatcher  # 新增：用于字符串相似度匹配
+from html.parser import HTMLParser
 
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
@@ -62,11 +69,412 @@ COLUMN_HEADERS = [
     "剧情简介", "豆瓣评分", "评价人数", "海报URL", "豆瓣ID", "缓存URL"
 ]
 
+# 详情页 #info 中取 span.pl 标签后面文本的字段：标签文字 -> 表头
+INFO_SIBLING_LABELS = {"制片国家/地区:": "制片国家/地区", "语言:": "语言", "又名:": "又名"}
+
+# 没有结束标签的HTML元素
+VOID_TAGS = frozenset(("area", "base", "br", "col", "embed", "hr", "img", "input",
+                       "link", "meta", "param", "source", "track", "wbr"))
+
+
+class SubjectPageParser(HTMLParser):
+    """豆瓣详情页单遍解析器：基于标准库 HTMLParser 顺序处理标签和文本，不构建文档树
+
+    一次遍历同时收集电影名称到海报URL的全部字段，取值规则与 DoubanCrawler.get_* 方法一致；
+    #info 区块结束且剧情简介、评分、评价人数和海报都已取到后，标记 done，
+    调用方不必再解析后面的短评、推荐等内容
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.stack = []  # 当前打开的元素 (标签名, 属性字典)
+        self.captures = []  # 正在收集文本的元素 [深度, 文本片段, 结束回调]
+        self.watches = []  # 等待 span.pl 之后兄弟节点的规则 {"kind", "depth", "started", ...}
+        self.text_parts = []  # 相邻的文本片段（合并后再处理，与文档树中的一个文本节点对应）
+        self.closed_pl = []  # 本次结束标签关闭的 span.pl (文本, 父元素深度)
+
+        self.name = None
+        self.attrs_texts = []
+        self.genres = []
+        self.release_dates = []
+        self.runtime = None
+        self.summary = None
+        self.all_texts = []
+        self.rating = None
+        self.votes = None
+        self.writer = None
+        self.imdb = None
+        self.sibling_values = {}
+        self.mainpic_depth = None
+        self.nbgnbg_depth = None
+        self.nbgnbg_img = None  # (src,) 第一个 #mainpic .nbgnbg img
+        self.mainpic_img = None  # (src,) 第一个 #mainpic img
+        self.og_image = None  # (content,) 第一个 meta[property=og:image]
+        self.info_depth = None
+        self.info_closed = False
+        self.done = False
+
+    # --- 事件处理 ---
+
+    def handle_starttag(self, tag, attrs):
+        self._flush_text()
+        attrs = {key: value or "" for key, value in attrs}
+        self._sibling_tag(tag)
+        if tag not in VOID_TAGS:
+            self.stack.append((tag, attrs))
+        depth = len(self.stack)
+        classes = attrs.get("class", "").split()
+        prop = attrs.get("property")
+
+        if tag == "span":
+            if prop == "v:itemreviewed" and self.name is None:
+                self.name = ""
+                self._capture(depth, lambda text: setattr(self, "name", text))
+            if "attrs" in classes:
+                self._capture(depth, self.attrs_texts.append)
+            if "pl" in classes:
+                self._capture(depth, lambda text: self.closed_pl.append((text, depth - 1)))
+            if prop == "v:genre":
+                self._capture(depth, self.genres.append)
+            elif prop == "v:initialReleaseDate":
+                self._capture(depth, self.release_dates.append)
+            elif prop == "v:runtime" and self.runtime is None:
+                self.runtime = ""
+                self._capture(depth, lambda text: setattr(self, "runtime", text))
+            elif prop == "v:summary" and self.summary is None:
+                self.summary = ""
+                self._capture(depth, lambda text: setattr(self, "summary", text))
+            elif prop == "v:votes" and self.votes is None:
+                self.votes = ""
+                self._capture(depth, lambda text: setattr(self, "votes", text))
+            if "all" in classes:
+                self._capture(depth, self.all_texts.append)
+        elif tag == "strong":
+            if prop == "v:average" and " ".join(classes) == "ll rating_num" and self.rating is None:
+                self.rating = ""
+                self._capture(depth, lambda text: setattr(self, "rating", text))
+        elif tag == "img":
+            if self.mainpic_depth is not None:
+                if self.mainpic_img is None:
+                    self.mainpic_img = (attrs.get("src"),)
+                if self.nbgnbg_depth is not None and self.nbgnbg_img is None:
+                    self.nbgnbg_img = (attrs.get("src"),)
+        elif tag == "meta":
+            if attrs.get("property") == "og:image" and self.og_image is None:
+                self.og_image = (attrs.get("content"),)
+
+        if tag in VOID_TAGS:
+            return
+        if self.mainpic_depth is not None and self.nbgnbg_depth is None and "nbgnbg" in classes:
+            self.nbgnbg_depth = depth
+        if attrs.get("id") == "mainpic" and self.mainpic_depth is None:
+            self.mainpic_depth = depth
+        if attrs.get("id") == "info" and self.info_depth is None and not self.info_closed:
+            self.info_depth = depth
+
+    def handle_endtag(self, tag):
+        self._flush_text()
+        for index in range(len(self.stack) - 1, -1, -1):
+            if self.stack[index][0] == tag:
+                break
+        else:
+            return  # 没有对应的开始标签，忽略
+        del self.stack[index:]
+        depth = len(self.stack)
+
+        while self.captures and self.captures[-1][0] > depth:
+            _, parts, on_close = self.captures.pop()
+            on_close("".join(parts))
+        # 父元素结束：还在等待第一个兄弟节点的规则作废（继续找下一个 span.pl），编剧收集到此为止
+        for watch in [w for w in self.watches if w["depth"] > depth]:
+            self.watches.remove(watch)
+            if watch["kind"] == "writer" and watch["started"]:
+                self._finish_writer(watch)
+        for text, parent_depth in self.closed_pl:
+            self._watch_pl(text, parent_depth)
+        self.closed_pl = []
+
+        if self.mainpic_depth is not None and depth < self.mainpic_depth:
+            self.mainpic_depth = None
+        if self.nbgnbg_depth is not None and depth < self.nbgnbg_depth:
+            self.nbgnbg_depth = None
+        if self.info_depth is not None and depth < self.info_depth:
+            self.info_depth = None
+            self.info_closed = True
+        self.done = (self.info_closed and not self.watches and not self.captures
+                     and self.name is not None and self.summary is not None
+                     and self.rating is not None and self.votes is not None
+                     and self.nbgnbg_img is not None and bool(self.nbgnbg_img[0]))
+
+    def handle_data(self, data):
+        self.text_parts.append(data)
+
+    def handle_comment(self, data):
+        # 注释也是文档树中的一个字符串节点，但不计入元素文本
+        self._flush_text()
+        self._sibling_text(data)
+
+    def close(self):
+        super().close()
+        self._flush_text()
+
+    # --- 内部方法 ---
+
+    def _flush_text(self):
+        if not self.text_parts:
+            return
+        text = "".join(self.text_parts)
+        self.text_parts = []
+        for capture in self.captures:
+            capture[1].append(text)
+        self._sibling_text(text)
+
+    def _capture(self, depth, on_close):
+        self.captures.append([depth, [], on_close])
+
+    def _watch_pl(self, text, parent_depth):
+        """span.pl 结束：按标签文字决定是否取它后面的兄弟节点（与 get_* 的匹配顺序一致，只取第一个）"""
+        if text.strip() == "编剧:" and self.writer is None:
+            self.watches.append({"kind": "writer", "depth": parent_depth, "started": False, "parts": []})
+        elif text in INFO_SIBLING_LABELS and INFO_SIBLING_LABELS[text] not in self.sibling_values:
+            self.watches.append({"kind": "value", "depth": parent_depth, "label": INFO_SIBLING_LABELS[text]})
+        elif "IMDb" in text and self.imdb is None:
+            self.watches.append({"kind": "imdb", "depth": parent_depth})
+
+    def _sibling_text(self, text):
+        depth = len(self.stack)
+        for watch in [w for w in self.watches if w["depth"] == depth]:
+            if watch["kind"] == "writer":
+                watch["started"] = True
+                text = text.strip()
+                if text and text not in ('/', '更多...'):
+                    watch["parts"].append(text)
+                continue
+            self.watches.remove(watch)
+            if watch["kind"] == "value":
+                self.sibling_values.setdefault(watch["label"], text.strip())
+            elif self.imdb is None:
+                self.imdb = text.strip()
+
+    def _sibling_tag(self, tag):
+        depth = len(self.stack)
+        for watch in [w for w in self.watches if w["depth"] == depth]:
+            if watch["kind"] == "writer":
+                watch["started"] = True
+                if tag == "br":
+                    self.watches.remove(watch)
+                    self._finish_writer(watch)
+                elif tag == "a":
+                    self._capture(depth + 1, lambda text, parts=watch["parts"]: parts.append(text.strip()))
+                continue
+            self.watches.remove(watch)
+            if watch["kind"] == "imdb" and tag == "a" and self.imdb is None:
+                self.imdb = ""
+                self._capture(depth + 1, lambda text: setattr(self, "imdb", text.strip()))
+            elif watch["kind"] == "imdb":
+                self.imdb = self.imdb if self.imdb is not None else "NO FOUND"
+            else:
+                # 兄弟节点是标签而不是文本时 get_* 取值失败
+                self.sibling_values.setdefault(watch["label"], "NO FOUND")
+
+    def _finish_writer(self, watch):
+        if self.writer is None:
+            self.writer = '/'.join([w for w in watch["parts"] if w and w != '/'])
+
+    # --- 结果 ---
+
+    def fields(self):
+        """按表头返回详情页字段（电影名称 ~ 海报URL），未找到的字段为 NO FOUND"""
+        director = self.attrs_texts[0].replace(' ', '') if self.attrs_texts else 'NO FOUND'
+
+        actors = "/".join(text for text in self.attrs_texts if text).replace(' ', '')
+        if director != 'NO FOUND':
+            director_words = set(director.split('/'))
+            actors = "/".join(word for word in actors.split('/') if word not in director_words)
+
+        if self.summary is not None:
+            summary = self.summary.strip()
+        else:
+            summary = next((text.strip() for text in self.all_texts if text and len(text.strip()) > 50), None)
+        if summary is not None and len(summary) > 200:
+            summary = summary[:200] + '...'
+
+        poster_url = 'NO FOUND'
+        if self.nbgnbg_img and self.nbgnbg_img[0]:
+            poster_url = self.nbgnbg_img[0]
+            if 's_ratio_poster' in poster_url:
+                poster_url = poster_url.replace('s_ratio_poster', 'l_ratio_poster')
+            elif 'webp' in poster_url:
+                poster_url = poster_url.replace('.webp', '.jpg')
+        elif self.mainpic_img and self.mainpic_img[0]:
+            poster_url = self.mainpic_img[0]
+        elif self.og_image and self.og_image[0]:
+            poster_url = self.og_image[0]
+
+        def found(value):
+            return value if value is not None else 'NO FOUND'
+
+        return {
+            "电影名称": found(self.name),
+            "导演": director,
+            "编剧": found(self.writer),
+            "主演": actors or 'NO FOUND',
+            "类型": "/".join(self.genres) or 'NO FOUND',
+            "制片国家/地区": self.sibling_values.get("制片国家/地区", 'NO FOUND'),
+            "语言": self.sibling_values.get("语言", 'NO FOUND'),
+            "上映日期": '/'.join(self.release_dates) if self.release_dates else 'NO FOUND',
+            "片长": found(self.runtime),
+            "又名": self.sibling_values.get("又名", 'NO FOUND'),
+            "IMDb": found(self.imdb),
+            "剧情简介": found(summary),
+            "豆瓣评分": found(self.rating),
+            "评价人数": found(self.votes),
+            "海报URL": poster_url,
+        }
+
+
+def parse_subject_page(html, chunk_size=32 * 1024):
+    """单遍解析豆瓣详情页，返回 {表头: 值}（电影名称 ~ 海报URL）
+
+    按块喂给 SubjectPageParser，所需字段都取到后不再解析剩余内容
+    """
+    parser = SubjectPageParser()
+    for start in range(0, len(html), chunk_size):
+        parser.feed(html[start:start + chunk_size])
+        if parser.done:
+            break
+    else:
+        parser.close()
+    return parser.fields()
+
+
+class SubjectStore:
+    """本地豆瓣条目库（SQLite），按豆瓣ID保存解析结果、压缩后的详情页HTML和抓取时间
+
+    另有 爬取名称 -> 豆瓣ID 的索引，再次爬取同一名称时不用搜索；
+    所有方法加锁，可在爬取线程和界面线程中使用
+    """
+
+    def __init__(self, path="douban_subjects.db"):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("""CREATE TABLE IF NOT EXISTS subjects (
+                douban_id TEXT PRIMARY KEY,
+                url TEXT,
+                record TEXT,
+                html BLOB,
+                fetched_at REAL
+            )""")
+            self.conn.execute("""CREATE TABLE IF NOT EXISTS titles (
+                title_key TEXT PRIMARY KEY,
+                douban_id TEXT,
+                matched_title TEXT,
+                updated_at REAL
+            )""")
+
+    @staticmethod
+    def title_key(movie_name):
+        return DoubanCrawler.normalize_name(str(movie_name).strip())
+
+    def lookup_title(self, movie_name):
+        """按爬取名称查豆瓣ID，没有记录时返回 None"""
+        with self.lock:
+            row = self.conn.execute("SELECT douban_id FROM titles WHERE title_key = ?",
+                                    (self.title_key(movie_name),)).fetchone()
+        return row[0] if row else None
+
+    def get(self, douban_id, max_age=None):
+        """返回 (字段字典, 详情页URL, 抓取时间)；没有记录或超过 max_age 秒时返回 None"""
+        with self.lock:
+            row = self.conn.execute("SELECT record, url, fetched_at FROM subjects WHERE douban_id = ?",
+                                    (douban_id,)).fetchone()
+        if not row:
+            return None
+        record, url, fetched_at = row
+        if max_age is not None and time.time() - fetched_at > max_age:
+            return None
+        return json.loads(record), url, fetched_at
+
+    def get_html(self, douban_id):
+        """取出保存的详情页HTML（解析规则更新后可以离线重新解析）"""
+        with self.lock:
+            row = self.conn.execute("SELECT html FROM subjects WHERE douban_id = ?", (douban_id,)).fetchone()
+        return zlib.decompress(row[0]).decode("utf-8") if row and row[0] else None
+
+    def put(self, douban_id, url, fields, html, movie_name=None, matched_title=None):
+        """保存一个条目；给出 movie_name 时同时更新名称索引"""
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO subjects (douban_id, url, record, html, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                (douban_id, url, json.dumps(fields, ensure_ascii=False),
+                 zlib.compress(html.encode("utf-8"), 6), now))
+            if movie_name:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO titles (title_key, douban_id, matched_title, updated_at) VALUES (?, ?, ?, ?)",
+                    (self.title_key(movie_name), douban_id, matched_title, now))
+
+    def count(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM subjects").fetchone()[0]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class CrawlInterrupted(Exception):
+    """停止爬取时，正在等待请求配额的请求抛出此异常"""
+
+
+class RequestBudget:
+    """全局请求配额：按每分钟请求数发放请求时间片，所有线程共用
+
+    取代原来每个请求前的随机 sleep 和成功后的固定延迟：请求前调用 acquire() 领取下一个时间片，
+    失败、反爬时用 defer() 把后续所有请求整体推后
+    """
+
+    def __init__(self, per_minute):
+        self.lock = threading.Lock()
+        self.interrupt_event = threading.Event()
+        self.next_slot = 0.0
+        self.set_rate(per_minute)
+
+    def set_rate(self, per_minute):
+        self.per_minute = max(1, per_minute)
+        self.interval = 60.0 / self.per_minute
+
+    def acquire(self):
+        """阻塞到下一个时间片，返回等待的秒数；调用 interrupt() 后抛出 CrawlInterrupted"""
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            # 间隔随机浮动 ±30%，平均速率不变，避免请求过于规律
+            self.next_slot = slot + self.interval * random.uniform(0.7, 1.3)
+        wait = slot - now
+        if self.interrupt_event.wait(wait) if wait > 0 else self.interrupt_event.is_set():
+            raise CrawlInterrupted("爬取已停止")
+        return wait
+
+    def defer(self, seconds):
+        """把后续所有请求推后 seconds 秒（退避、反爬等待）"""
+        with self.lock:
+            self.next_slot = max(self.next_slot, time.monotonic()) + seconds
+
+    def interrupt(self):
+        self.interrupt_event.set()
+
+    def reset(self):
+        self.interrupt_event.clear()
+
 
 class DoubanCrawler:
     """豆瓣爬虫类，负责数据爬取和解析"""
     
-    def __init__(self):
+    def __init__(self, store_path="douban_subjects.db"):
         self.logger = logging.getLogger(__name__)
         
         # 扩展User-Agent池 - 包含更多真实浏览器
@@ -96,6 +504,14 @@ class DoubanCrawler:
         self.max_delay = 120  # 最大延迟2分钟
         self.emergency_delay = 180  # 紧急延迟3分钟
         
+        # 全局请求配额（每分钟请求数）和同时处理的标题数，见 RequestBudget / crawl_rows_async
+        self.requests_per_minute = 5
+        self.max_concurrent_titles = 2
+        self.request_budget = RequestBudget(self.requests_per_minute)
+        # 计数器（成功/失败、会话请求数、快速模式）由多个标题的线程共用，读写都在 stats_lock 下进行
+        self.stats_lock = threading.RLock()
+        self.session_lock = threading.Lock()
+        
         # 成功失败计数和状态
         self.success_count = 0
         self.fail_count = 0
@@ -128,6 +544,16 @@ class DoubanCrawler:
         self.request_count_in_session = 0
         self.max_requests_per_session = 50  # 每个session最多50个请求（更保守）
         
+        # 本地条目库：有效期内的条目直接使用，不再请求豆瓣（0 表示不使用本地库中的数据）；
+        # store_path=None 时不打开本地库
+        self.store_max_age_days = 30
+        self.subject_store = None
+        if store_path:
+            try:
+                self.subject_store = SubjectStore(store_path)
+            except sqlite3.Error as e:
+                self.logger.error(f"本地条目库打开失败，本次不使用本地库: {e}")
+        
         # 初始化会话
         self.headers = HEADERS.copy()
         self.session = self._create_session()
@@ -201,24 +627,43 @@ class DoubanCrawler:
         # 设置超时和连接池参数
         adapter = requests.adapters.HTTPAdapter(
             pool_connections=1,
-            pool_maxsize=1,
+            pool_maxsize=max(1, self.max_concurrent_titles),
             max_retries=0
         )
         session.mount('http://', adapter)
         session.mount('https://', adapter)
         
-        self.session_create_time = time.time()
-        self.request_count_in_session = 0
+        with self.stats_lock:
+            self.session_create_time = time.time()
+            self.request_count_in_session = 0
         
         self.logger.info(f"创建新会话，User-Agent: {ua[:50]}..., Cookie已设置")
         return session
 
     def _should_rebuild_session(self):
         """判断是否需要重建会话"""
-        age = time.time() - self.session_create_time
-        return (age > self.max_session_age or 
-                self.request_count_in_session > self.max_requests_per_session or
-                self.consecutive_fails >= 3)  # 减少到3次连续失败就重建
+        with self.stats_lock:
+            age = time.time() - self.session_create_time
+            return (age > self.max_session_age or 
+                    self.request_count_in_session > self.max_requests_per_session or
+                    self.consecutive_fails >= 3)  # 减少到3次连续失败就重建
+
+    def recent_fail_count(self):
+        """当前连续失败次数（用于区分反爬失败和查找失败）"""
+        with self.stats_lock:
+            return self.consecutive_fails
+
+    def _rebuild_session(self):
+        """重建会话（多个标题同时爬取时加锁，旧会话上进行中的请求不受影响）"""
+        with self.session_lock:
+            old_session = self.session
+            self.session = self._create_session()
+        old_session.close()
+
+    def set_request_rate(self, per_minute):
+        """设置全局每分钟请求数"""
+        self.requests_per_minute = max(1, int(per_minute))
+        self.request_budget.set_rate(self.requests_per_minute)
 
     def detect_anti_crawler(self, response):
         """增强的反爬检测机制 - 快速检测"""
@@ -272,35 +717,28 @@ class DoubanCrawler:
         return False, "正常"
     
     def enhanced_delay_strategy(self, success=True, fast_mode=False):
-        """优化的双重延迟策略 - 参考成功案例"""
-        # 双重延迟：随机短延迟 + 基础延迟
-        short_delay = random.uniform(0, 1)  # 0-1秒随机延迟，模拟人类操作
-        
+        """失败退避策略：请求间隔由全局请求配额控制，这里只在失败时把后续请求整体推后"""
+        if success:
+            return
         if fast_mode:
-            # 快速模式：刚处理完反爬，使用更短的延迟
-            base_delay = random.uniform(3, 6)  # 3-6秒基础延迟
-            self.logger.info("使用快速延迟模式")
-        elif success:
-            # 成功时使用较短的基础延迟
-            base_delay = random.uniform(8, 12)  # 8-12秒基础延迟
+            # 快速模式：刚处理完反爬，使用更短的退避
+            backoff = random.uniform(3, 6)
         else:
-            # 失败时增加延迟
-            base_delay = random.uniform(15, 25)  # 15-25秒延迟
-        
-        total_delay = short_delay + base_delay
-        
-        # 每10个请求增加一次额外休息（快速模式下跳过）
-        if not fast_mode and self.total_requests % 10 == 0 and self.total_requests > 0:
-            extra_rest = random.uniform(30, 60)
-            total_delay += extra_rest
-            self.logger.info(f"第{self.total_requests}个请求，增加额外休息{extra_rest:.1f}秒")
-        
+            backoff = random.uniform(15, 25)
         mode_text = "快速模式" if fast_mode else "常规模式"
-        self.logger.info(f"延迟策略({mode_text}): 短延迟{short_delay:.1f}s + 基础延迟{base_delay:.1f}s = 总计{total_delay:.1f}s")
-        time.sleep(total_delay)
+        self.logger.info(f"失败退避({mode_text}): 后续请求推后{backoff:.1f}s")
+        self.request_budget.defer(backoff)
 
     def adaptive_delay(self, success=True):
         """自适应延迟调整 - 保持现有逻辑并整合新策略"""
+        with self.stats_lock:
+            use_fast_mode = self._update_request_stats(success)
+        
+        # 使用增强的延迟策略
+        self.enhanced_delay_strategy(success, fast_mode=use_fast_mode)
+    
+    def _update_request_stats(self, success):
+        """更新成功/失败计数和当前延迟，返回是否处于快速模式"""
         self.total_requests += 1
         
         if success:
@@ -331,9 +769,7 @@ class DoubanCrawler:
             if self.fast_mode_count <= 0:
                 self.fast_mode_active = False
                 self.logger.info("快速模式结束，返回常规模式")
-        
-        # 使用增强的延迟策略
-        self.enhanced_delay_strategy(success, fast_mode=use_fast_mode)
+        return use_fast_mode
     
     def switch_proxy(self):
         """切换代理IP"""
@@ -346,8 +782,7 @@ class DoubanCrawler:
         self.logger.warning(f"检测到反爬: {reason}")
         
         # 立即重建会话并生成新Cookie
-        self.session.close()
-        self.session = self._create_session()
+        self._rebuild_session()
         self.logger.info("重建会话并生成新Cookie")
         
         # 切换代理（如果可用）
@@ -355,23 +790,23 @@ class DoubanCrawler:
             self.switch_proxy()
         
         # 分级等待时间 - 更温和的处理
-        if self.consecutive_fails <= 2:
+        consecutive_fails = self.recent_fail_count()
+        if consecutive_fails <= 2:
             wait_time = random.uniform(15, 30)
-        elif self.consecutive_fails <= 4:
+        elif consecutive_fails <= 4:
             wait_time = random.uniform(30, 60)
         else:
             wait_time = random.uniform(60, 120)
         
-        self.logger.info(f"反爬等待时间: {wait_time:.1f}秒 (连续失败:{self.consecutive_fails}次)")
-        time.sleep(wait_time)
+        self.logger.info(f"反爬等待时间: {wait_time:.1f}秒 (连续失败:{consecutive_fails}次)")
+        self.request_budget.defer(wait_time)
     
     def handle_anti_crawler_fast(self, reason):
         """快速反爬处理机制 - 减少等待时间"""
         self.logger.warning(f"快速反爬处理: {reason}")
         
         # 立即重建会话并生成新Cookie
-        self.session.close()
-        self.session = self._create_session()
+        self._rebuild_session()
         self.logger.info("快速重建会话并生成新Cookie")
         
         # 切换代理（如果可用）
@@ -382,11 +817,12 @@ class DoubanCrawler:
         wait_time = random.uniform(2, 5)  # 只等待2-5秒
         
         self.logger.info(f"快速反爬等待: {wait_time:.1f}秒")
-        time.sleep(wait_time)
+        self.request_budget.defer(wait_time)
         
         # 激活快速模式
-        self.fast_mode_active = True
-        self.fast_mode_count = 3  # 接下来3次请求使用快速模式
+        with self.stats_lock:
+            self.fast_mode_active = True
+            self.fast_mode_count = 3  # 接下来3次请求使用快速模式
     
     def request_with_intelligent_retry(self, url, max_retries=5):
         """优化的智能重试机制 - 快速反爬处理"""
@@ -395,8 +831,7 @@ class DoubanCrawler:
         # 检查是否需要重建会话
         if self._should_rebuild_session():
             self.logger.info("会话过期，重建会话")
-            self.session.close()
-            self.session = self._create_session()
+            self._rebuild_session()
         
         anti_crawler_detected = False
         
@@ -406,24 +841,25 @@ class DoubanCrawler:
                 if attempt > 0:
                     if anti_crawler_detected:
                         self.logger.info(f"第{attempt+1}次尝试：上次检测到反爬，立即重建会话")
-                        self.session.close()
-                        self.session = self._create_session()
+                        self._rebuild_session()
                         # 快速反爬处理等待
                         quick_wait = random.uniform(3, 8)
                         self.logger.info(f"快速反爬等待: {quick_wait:.1f}秒")
-                        time.sleep(quick_wait)
+                        self.request_budget.defer(quick_wait)
                     else:
                         # 普通重试间隔
                         retry_delay = min(5 * attempt, 15)
                         self.logger.info(f"普通重试等待: {retry_delay}秒")
-                        time.sleep(retry_delay)
+                        self.request_budget.defer(retry_delay)
                 
-                # 增加请求计数
-                self.request_count_in_session += 1
+                # 领取全局请求配额（代替原来请求前的随机短暂停）
+                waited = self.request_budget.acquire()
+                if waited > 0:
+                    self.logger.debug(f"等待请求配额 {waited:.1f}秒")
                 
-                # 在请求前随机短暂停，模拟人类行为
-                human_delay = random.uniform(0.5, 2)
-                time.sleep(human_delay)
+                # 增加请求计数
+                with self.stats_lock:
+                    self.request_count_in_session += 1
                 
                 # 发送请求
                 response = self.session.get(url, timeout=20, allow_redirects=True)
@@ -466,6 +902,8 @@ class DoubanCrawler:
                     if attempt < max_retries - 1:
                         continue
                     
+            except CrawlInterrupted:
+                raise
             except requests.exceptions.Timeout:
                 self.logger.error(f"请求超时 (尝试 {attempt+1}/{max_retries})")
             except requests.exceptions.ConnectionError as e:
@@ -788,24 +1226,23 @@ class DoubanCrawler:
                 self.logger.error(f"详情页面访问失败: {movie_name}")
                 return None, "详情页面访问失败"
             
-            soup = BeautifulSoup(movie_response.text, 'html.parser')
-            
-            # 提取所有信息
+            # 提取所有信息（单遍解析，见 parse_subject_page）
             self.logger.info(f"开始解析页面内容: {movie_name}")
-            name = self.get_name(soup)
-            director = self.get_director(soup)
-            writer = self.get_writer(soup)
-            actors = self.get_actors(soup, director)
-            movie_type = self.get_type(soup)
-            place = self.get_place(soup)
-            language = self.get_language(soup)
-            release_date = self.get_release_date(soup)
-            runtime = self.get_runtime(soup)
-            sb_name = self.get_sb_name(soup)
-            imdb = self.get_imdb(soup)
-            summary = self.get_summary(soup)
-            rating, votes = self.get_rating(soup)
-            poster_url = self.get_poster_url(soup)
+            fields = parse_subject_page(movie_response.text)
+            name = fields["电影名称"]
+            director = fields["导演"]
+            writer = fields["编剧"]
+            actors = fields["主演"]
+            movie_type = fields["类型"]
+            place = fields["制片国家/地区"]
+            language = fields["语言"]
+            release_date = fields["上映日期"]
+            runtime = fields["片长"]
+            sb_name = fields["又名"]
+            imdb = fields["IMDb"]
+            summary = fields["剧情简介"]
+            rating, votes = fields["豆瓣评分"], fields["评价人数"]
+            poster_url = fields["海报URL"]
             douban_id = self.get_douban_id(href)
             
             # 校验状态判断
@@ -848,68 +1285,114 @@ class DoubanCrawler:
             self.logger.error(traceback.format_exc())
             return None, f"爬取异常: {str(e)}"
     
+    def load_stored_subject(self, movie_name, cached_url=None):
+        """从本地条目库取有效期内的条目：有缓存URL时按其中的豆瓣ID查，否则按爬取名称索引查。
+        返回 (字段字典, 详情页URL, 豆瓣ID)，没有可用记录时返回 None
+        """
+        # 只读取一次 subject_store：close() 之后连接已关闭时按未命中处理（sqlite3.Error），不影响爬取结果
+        store = self.subject_store
+        if store is None or self.store_max_age_days <= 0:
+            return None
+        try:
+            if cached_url and cached_url.strip():
+                douban_id = self.get_douban_id(cached_url.strip())
+            else:
+                douban_id = store.lookup_title(movie_name)
+            if not douban_id or douban_id == 'NO FOUND':
+                return None
+            stored = store.get(douban_id, max_age=self.store_max_age_days * 86400)
+        except (sqlite3.Error, ValueError) as e:
+            self.logger.error(f"读取本地条目库失败: {e}")
+            return None
+        if stored is None:
+            return None
+        fields, url, fetched_at = stored
+        age_days = (time.time() - fetched_at) / 86400
+        self.logger.info(f"使用本地条目库: {movie_name} -> {douban_id} ({age_days:.1f}天前抓取)")
+        return fields, url, douban_id
+
+    def save_stored_subject(self, movie_name, href, fields, html, matched_title=None):
+        """把新抓取的详情页写入本地条目库（未解析出名称的页面不保存）；写入失败只记录日志"""
+        store = self.subject_store
+        if store is None or fields["电影名称"] == 'NO FOUND':
+            return
+        douban_id = self.get_douban_id(href)
+        if douban_id == 'NO FOUND':
+            return
+        try:
+            store.put(douban_id, href, fields, html, movie_name, matched_title)
+        except sqlite3.Error as e:
+            self.logger.error(f"写入本地条目库失败: {e}")
+
     def crawl_movie_info_with_anti_crawler_detection(self, movie_name, cached_url=None):
-        """爬取单个电影信息，区分反爬失败和查找失败，支持URL缓存"""
+        """爬取单个电影信息，区分反爬失败和查找失败，支持URL缓存；
+        本地条目库中有未过期（store_max_age_days 天内）的记录时不再请求豆瓣
+        """
         try:
             self.logger.info(f"===== 开始爬取电影: {movie_name} =====")
             
             href = None
             matched_title = None
+            using_cache = bool(cached_url and cached_url.strip())
             
-            # 检查是否有缓存URL
-            if cached_url and cached_url.strip():
-                self.logger.info(f"使用缓存URL: {cached_url}")
-                href = cached_url.strip()
-                matched_title = "缓存"
-                using_cache = True
+            stored = self.load_stored_subject(movie_name, cached_url)
+            if stored:
+                fields, href, douban_id = stored
+                matched_title = "缓存" if using_cache else fields["电影名称"]
             else:
-                # 搜索电影
-                encoded_name = self.str2urlcode(movie_name)
-                search_url = f"https://search.douban.com/movie/subject_search?search_text={encoded_name}&cat=1002"
-                self.logger.info(f"搜索URL: {search_url}")
+                # 检查是否有缓存URL
+                if using_cache:
+                    self.logger.info(f"使用缓存URL: {cached_url}")
+                    href = cached_url.strip()
+                    matched_title = "缓存"
+                else:
+                    # 搜索电影
+                    encoded_name = self.str2urlcode(movie_name)
+                    search_url = f"https://search.douban.com/movie/subject_search?search_text={encoded_name}&cat=1002"
+                    self.logger.info(f"搜索URL: {search_url}")
+                    
+                    href, matched_title = self.get_href_with_smart_matching(search_url, movie_name)
+                    if not href:
+                        # 区分是反爬失败还是查找失败
+                        if self.recent_fail_count() >= 2:  # 连续失败，可能是反爬
+                            self.logger.error(f"搜索失败(疑似反爬): {movie_name}")
+                            return None, "反爬失败"
+                        else:
+                            self.logger.error(f"搜索失败(未找到): {movie_name}")
+                            return None, "查找失败"
                 
-                href, matched_title = self.get_href_with_smart_matching(search_url, movie_name)
-                using_cache = False
-                if not href:
-                    # 区分是反爬失败还是查找失败
-                    if self.consecutive_fails >= 2:  # 连续失败，可能是反爬
-                        self.logger.error(f"搜索失败(疑似反爬): {movie_name}")
+                # 获取详情页面
+                self.logger.info(f"访问详情页: {href}")
+                movie_response = self.request_with_intelligent_retry(href)
+                if not movie_response:
+                    # 区分是反爬失败还是访问失败
+                    if self.recent_fail_count() >= 2:  # 连续失败，可能是反爬
+                        self.logger.error(f"详情页面访问失败(疑似反爬): {movie_name}")
                         return None, "反爬失败"
                     else:
-                        self.logger.error(f"搜索失败(未找到): {movie_name}")
-                        return None, "查找失败"
-            
-            # 获取详情页面
-            self.logger.info(f"访问详情页: {href}")
-            movie_response = self.request_with_intelligent_retry(href)
-            if not movie_response:
-                # 区分是反爬失败还是访问失败
-                if self.consecutive_fails >= 2:  # 连续失败，可能是反爬
-                    self.logger.error(f"详情页面访问失败(疑似反爬): {movie_name}")
-                    return None, "反爬失败"
-                else:
-                    self.logger.error(f"详情页面访问失败: {movie_name}")
-                    return None, "访问失败"
-            
-            soup = BeautifulSoup(movie_response.text, 'html.parser')
-            
-            # 提取所有信息
-            self.logger.info(f"开始解析页面内容: {movie_name}")
-            name = self.get_name(soup)
-            director = self.get_director(soup)
-            writer = self.get_writer(soup)
-            actors = self.get_actors(soup, director)
-            movie_type = self.get_type(soup)
-            place = self.get_place(soup)
-            language = self.get_language(soup)
-            release_date = self.get_release_date(soup)
-            runtime = self.get_runtime(soup)
-            sb_name = self.get_sb_name(soup)
-            imdb = self.get_imdb(soup)
-            summary = self.get_summary(soup)
-            rating, votes = self.get_rating(soup)
-            poster_url = self.get_poster_url(soup)
-            douban_id = self.get_douban_id(href)
+                        self.logger.error(f"详情页面访问失败: {movie_name}")
+                        return None, "访问失败"
+                
+                # 提取所有信息（单遍解析，见 parse_subject_page），并保存到本地条目库
+                self.logger.info(f"开始解析页面内容: {movie_name}")
+                fields = parse_subject_page(movie_response.text)
+                self.save_stored_subject(movie_name, href, fields, movie_response.text, matched_title)
+                douban_id = self.get_douban_id(href)
+            
+            name = fields["电影名称"]
+            director = fields["导演"]
+            writer = fields["编剧"]
+            actors = fields["主演"]
+            movie_type = fields["类型"]
+            place = fields["制片国家/地区"]
+            language = fields["语言"]
+            release_date = fields["上映日期"]
+            runtime = fields["片长"]
+            sb_name = fields["又名"]
+            imdb = fields["IMDb"]
+            summary = fields["剧情简介"]
+            rating, votes = fields["豆瓣评分"], fields["评价人数"]
+            poster_url = fields["海报URL"]
             
             # 校验状态判断 - 增强版
             if name == 'NO FOUND':
@@ -968,34 +1451,46 @@ class DoubanCrawler:
             
             self.logger.info(f"===== 完成爬取电影: {movie_name} (状态: {validation_status}) =====")
             return result, "成功"
-            
+
+        except CrawlInterrupted:
+            # 停止爬取：交给调用方处理，该行保持未处理状态
+            raise
         except Exception as e:
             self.logger.error(f"爬取 {movie_name} 时出错: {e}")
             self.logger.error(traceback.format_exc())
             # 根据连续失败次数判断是否为反爬
-            if self.consecutive_fails >= 2:
+            if self.recent_fail_count() >= 2:
                 return None, "反爬异常"
             else:
                 return None, f"爬取异常: {str(e)}"
     
+    def close(self):
+        """关闭会话和本地条目库连接（重新应用设置时调用）"""
+        if self.session:
+            self.session.close()
+        if self.subject_store is not None:
+            self.subject_store.close()
+            self.subject_store = None
+    
     def get_crawler_status(self):
         """获取爬虫状态信息"""
         current_ua = self.session.headers.get('User-Agent', '') if self.session else ''
-        session_age = time.time() - self.session_create_time if hasattr(self, 'session_create_time') else 0
-        
-        success_rate = (self.success_count / self.total_requests * 100) if self.total_requests > 0 else 0
-        
-        return {
-            'delay': self.current_delay,
-            'success_count': self.success_count,
-            'fail_count': self.fail_count,
-            'consecutive_fails': self.consecutive_fails,
-            'total_requests': self.total_requests,
-            'success_rate': f"{success_rate:.1f}%",
-            'session_age': f"{session_age/60:.1f}min",
-            'session_requests': self.request_count_in_session,
-            'user_agent': current_ua[:50]
-        }
+        with self.stats_lock:
+            session_age = time.time() - self.session_create_time if hasattr(self, 'session_create_time') else 0
+            
+            success_rate = (self.success_count / self.total_requests * 100) if self.total_requests > 0 else 0
+            
+            return {
+                'delay': self.current_delay,
+                'success_count': self.success_count,
+                'fail_count': self.fail_count,
+                'consecutive_fails': self.consecutive_fails,
+                'total_requests': self.total_requests,
+                'success_rate': f"{success_rate:.1f}%",
+                'session_age': f"{session_age/60:.1f}min",
+                'session_requests': self.request_count_in_session,
+                'user_agent': current_ua[:50]
+            }
     
     @staticmethod
     def normalize_name(name):
@@ -1034,6 +1529,97 @@ class DoubanCrawler:
         return similarity
 
 
+def save_workbook_atomic(workbook, path):
+    """先保存到同目录的临时文件再替换原文件，保存中途崩溃或断电不会损坏原表格；
+    临时文件沿用原文件的权限（mkstemp 创建的文件为 0600）
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=".~", suffix=os.path.splitext(path)[1] or ".xlsx", dir=directory)
+    os.close(fd)
+    try:
+        workbook.save(temp_path)
+        if os.path.exists(path):
+            shutil.copymode(path, temp_path)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+class WorkbookWriter:
+    """工作簿写入线程
+
+    爬取结果经队列交给本线程写入单元格和样式，爬取过程不再等待磁盘；有未保存的修改时
+    每 checkpoint_interval 秒保存一次（save_workbook_atomic），close() 时写完剩余结果并最终保存
+    """
+
+    def __init__(self, workbook, path, write_row, checkpoint_interval=30, notify=None):
+        self.workbook = workbook
+        self.path = path
+        self.write_row = write_row  # write_row(row_num, values, status)，在写入线程中调用
+        self.checkpoint_interval = checkpoint_interval
+        self.notify = notify or (lambda text: None)
+        self.queue = Queue()
+        self.unsaved = 0
+        self.written = 0
+        self.error = None
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def put_row(self, row_num, values, status):
+        """提交一行结果（values 从爬取数据起始列依次写入），立即返回"""
+        self.queue.put((row_num, values, status))
+
+    def close(self):
+        """等待队列写完并最终保存；最终保存失败时抛出异常"""
+        self.queue.put(None)
+        self.thread.join()
+        if self.error:
+            raise self.error
+
+    def _save(self):
+        start = time.perf_counter()
+        save_workbook_atomic(self.workbook, self.path)
+        self.unsaved = 0
+        logging.info(f"工作簿已保存（已写入 {self.written} 行，用时 {time.perf_counter() - start:.1f}秒）")
+
+    def _run(self):
+        last_save = time.monotonic()
+        while True:
+            timeout = max(0.1, self.checkpoint_interval - (time.monotonic() - last_save))
+            try:
+                item = self.queue.get(timeout=timeout)
+            except Empty:
+                item = ()
+            if item is None:
+                break
+            if item:
+                try:
+                    self.write_row(*item)
+                    self.written += 1
+                    self.unsaved += 1
+                except Exception as e:
+                    logging.error(f"写入第{item[0]}行失败: {e}")
+            if self.unsaved and time.monotonic() - last_save >= self.checkpoint_interval:
+                try:
+                    self._save()
+                    self.notify(f"已保存进度（已写入 {self.written} 行）")
+                except Exception as e:
+                    # 文件被占用等情况：保留修改，下个检查点重试
+                    logging.error(f"定时保存失败，稍后重试: {e}")
+                    self.notify(f"保存失败，稍后重试: {e}")
+                last_save = time.monotonic()
+        try:
+            self._save()
+        except Exception as e:
+            logging.error(f"最终保存失败: {e}")
+            self.error = e
+
+
 class DoubanCrawlerApp:
     """主应用程序类"""
     
@@ -1043,6 +1629,7 @@ class DoubanCrawlerApp:
         self.workbook = None
         self.worksheet = None
         self.crawl_thread = None
+        self.active_crawler = None
         self.is_crawling = False
         self.is_paused = False
         self.pause_event = threading.Event()
@@ -1059,6 +1646,13 @@ class DoubanCrawlerApp:
         # 用于停止时保存进度
         self.stop_crawling = False
         
+        # 爬取结果由写入线程写表，有未保存修改时每隔 checkpoint_interval 秒保存一次
+        self.excel_writer = None
+        self.checkpoint_interval = 30
+        
+        # 待处理行索引 [(行号, 爬取名称, 缓存URL)]，加载工作表时建立，爬取后更新
+        self.pending_rows = []
+        
         self.setup_ui()
         self.setup_styles()
         
@@ -1335,82 +1929,50 @@ class DoubanCrawlerApp:
             self.crawler.valid_rows_mapping = {}
             self.crawler.excel_to_ui_mapping = {}
             
-            # 加载数据 - 只显示有效行（非空的爬取名称）
+            # 加载数据 - 只显示有效行（非空的爬取名称），同时建立待处理行索引
             non_empty_count = 0
-            ui_row_index = 0
-            
-            for row_num in range(2, self.worksheet.max_row + 1):
-                # 获取原始爬取名称
-                original_crawl_name = self.worksheet.cell(row=row_num, column=self.crawl_name_col).value
-                original_name_str = str(original_crawl_name).strip() if original_crawl_name is not None else ""
+            processed_count = 0
+            self.pending_rows = []
+            expected_length = len(["原始爬取名称"] + COLUMN_HEADERS)
+            
+            for row_num, original_name_str, crawl_values in self.scan_crawl_rows():
+                # 建立映射关系
+                self.crawler.valid_rows_mapping[non_empty_count] = row_num
+                self.crawler.excel_to_ui_mapping[row_num] = non_empty_count
+                non_empty_count += 1
                 
-                # 只处理非空的爬取名称
-                if original_name_str:
-                    non_empty_count += 1
-                    
-                    # 建立映射关系
-                    self.crawler.valid_rows_mapping[ui_row_index] = row_num
-                    self.crawler.excel_to_ui_mapping[row_num] = ui_row_index
-                    
-                    # 构建完整的行数据：原始爬取名称 + 所有爬取数据字段
-                    row_values = []
-                    
-                    # 第一列：原始爬取名称
-                    row_values.append(original_name_str)
-                    
-                    # 后续列：所有爬取数据字段
-                    for col_offset, header in enumerate(COLUMN_HEADERS):
-                        col_num = self.crawl_data_start_col + col_offset
-                        cell_value = self.worksheet.cell(row=row_num, column=col_num).value
-                        
-                        if cell_value is not None:
-                            cell_str = str(cell_value).strip()
-                            # 限制显示长度，避免界面过宽
-                            if len(cell_str) > 50:
-                                cell_str = cell_str[:47] + "..."
-                            row_values.append(cell_str)
-                        else:
-                            row_values.append("")
-                    
-                    # 根据校验状态设置标签（校验状态是爬取数据的第二列，即row_values[2]）
-                    validation_status = row_values[2] if len(row_values) > 2 else ""  # 校验状态列
-                    if validation_status == "fault":
-                        tag = "fault"
-                    elif validation_status == "check":
-                        tag = "check"
-                    elif validation_status == "true":
-                        tag = "true"
-                    elif validation_status == "warn":
-                        tag = "warn"
-                    elif validation_status == "cached":
-                        tag = "cached"
+                # 构建完整的行数据：原始爬取名称 + 所有爬取数据字段
+                row_values = [original_name_str]
+                for cell_value in crawl_values:
+                    if cell_value is not None:
+                        cell_str = str(cell_value).strip()
+                        # 限制显示长度，避免界面过宽
+                        if len(cell_str) > 50:
+                            cell_str = cell_str[:47] + "..."
+                        row_values.append(cell_str)
                     else:
-                        tag = ""
-                    
-                    # 确保数组长度与列数匹配
-                    expected_length = len(["原始爬取名称"] + COLUMN_HEADERS)
-                    while len(row_values) < expected_length:
                         row_values.append("")
-                    
-                    self.tree.insert('', 'end', values=row_values, tags=(tag,))
-                    ui_row_index += 1
-            
-            # 统计已处理的数据
-            processed_count = 0
-            for row_num in range(2, self.worksheet.max_row + 1):
-                original_crawl_name = self.worksheet.cell(row=row_num, column=self.crawl_name_col).value
-                original_name_str = str(original_crawl_name).strip() if original_crawl_name is not None else ""
                 
-                if original_name_str:  # 只统计有效行
-                    validation_status = self.worksheet.cell(row=row_num, column=self.crawl_data_start_col + 1).value
-                    if validation_status is not None and str(validation_status).strip() != "" and str(validation_status).strip() != "warn":
-                        processed_count += 1
+                # 确保数组长度与列数匹配
+                while len(row_values) < expected_length:
+                    row_values.append("")
+                
+                # 根据校验状态设置标签（校验状态是爬取数据的第二列，即row_values[2]）
+                validation_status = row_values[2]
+                tag = validation_status if validation_status in ("fault", "check", "true", "warn", "cached") else ""
+                self.tree.insert('', 'end', values=row_values, tags=(tag,))
+                
+                if self.is_pending_status(crawl_values[1]):
+                    cached_url = crawl_values[-1]
+                    cached_url = str(cached_url).strip() if cached_url and str(cached_url).strip() else None
+                    self.pending_rows.append((row_num, original_name_str, cached_url))
+                else:
+                    processed_count += 1
             
             unprocessed_count = non_empty_count - processed_count
             self.total_rows = non_empty_count  # 只计算有效行数
             
-            # 检查是否已有表头
-            existing_start, existing_end = self.find_existing_crawl_headers()
+            # 加载前是否已有表头
             header_status = f"(表头: {'已存在' if existing_start else '新建'})"
             
             status_text = f"已加载有效数据 {non_empty_count} 条 {header_status}"
@@ -1424,6 +1986,31 @@ class DoubanCrawlerApp:
         except Exception as e:
             messagebox.showerror("错误", f"加载工作表数据失败: {str(e)}")
     
+    @staticmethod
+    def is_pending_status(validation_status):
+        """校验状态为空或warn的行视为未处理"""
+        return validation_status is None or str(validation_status).strip() in ("", "warn")
+    
+    def scan_crawl_rows(self):
+        """按列读取爬取名称列和爬取数据列（iter_rows(values_only=True)，只读这两处），
+        返回 [(行号, 爬取名称, 爬取数据值元组)]，跳过爬取名称为空的行
+        """
+        ws = self.worksheet
+        max_row = ws.max_row
+        if max_row < 2:
+            return []
+        end_col = self.crawl_data_start_col + len(COLUMN_HEADERS) - 1
+        names = ws.iter_rows(min_row=2, max_row=max_row, min_col=self.crawl_name_col,
+                             max_col=self.crawl_name_col, values_only=True)
+        crawl_data = ws.iter_rows(min_row=2, max_row=max_row, min_col=self.crawl_data_start_col,
+                                  max_col=end_col, values_only=True)
+        rows = []
+        for row_num, (name,), values in zip(range(2, max_row + 1), names, crawl_data):
+            name = str(name).strip() if name is not None else ""
+            if name:
+                rows.append((row_num, name, values))
+        return rows
+    
     def find_crawl_name_column(self):
         """查找"爬取名称"列的位置"""
         if not self.worksheet:
@@ -1442,24 +2029,13 @@ class DoubanCrawlerApp:
         if not self.worksheet:
             return None, None
         
-        # 查找第一个爬取数据表头的位置
-        for col_num in range(1, self.worksheet.max_column + 1):
-            cell_value = self.worksheet.cell(row=1, column=col_num).value
-            if cell_value and str(cell_value).strip() == COLUMN_HEADERS[0]:  # "爬取名称"
-                # 验证是否为完整的爬取数据表头序列
-                is_complete_header = True
-                for i, expected_header in enumerate(COLUMN_HEADERS):
-                    check_col = col_num + i
-                    if check_col > self.worksheet.max_column:
-                        is_complete_header = False
-                        break
-                    actual_value = self.worksheet.cell(row=1, column=check_col).value
-                    if not actual_value or str(actual_value).strip() != expected_header:
-                        is_complete_header = False
-                        break
-                
-                if is_complete_header:
-                    return col_num, col_num + len(COLUMN_HEADERS) - 1  # 返回起始列和结束列
+        # 一次读出表头行，查找第一个完整的爬取数据表头序列
+        header_row = next(self.worksheet.iter_rows(min_row=1, max_row=1, values_only=True), ())
+        headers = [str(value).strip() if value else "" for value in header_row]
+        size = len(COLUMN_HEADERS)
+        for index in range(len(headers) - size + 1):
+            if headers[index] == COLUMN_HEADERS[0] and headers[index:index + size] == COLUMN_HEADERS:
+                return index + 1, index + size  # 返回起始列和结束列
         
         return None, None
     
@@ -1521,6 +2097,8 @@ class DoubanCrawlerApp:
         self.is_paused = False
         self.stop_crawling = False
         self.pause_event.set()
+        self.active_crawler = self.crawler  # 本次爬取使用的爬虫，停止时中断它的请求配额
+        self.active_crawler.request_budget.reset()
         
         # 更新按钮状态
         self.start_button.config(text="爬取中...", state="disabled")
@@ -1557,33 +2135,18 @@ class DoubanCrawlerApp:
         self.stop_crawling = True
         self.is_paused = False
         self.pause_event.set()  # 确保线程不被阻塞
+        if self.active_crawler is not None:
+            self.active_crawler.request_budget.interrupt()  # 正在等待请求配额的请求立即返回
         self.progress_queue.put(("status", "正在停止并保存进度..."))
     
     def crawl_worker(self):
-        """爬取工作线程"""
+        """爬取工作线程：取出待处理行索引，交给 crawl_rows_async 异步爬取"""
         try:
-            save_counter = 0
-            processed_count = 0
-            valid_rows = []
-            skipped_count = 0
-            total_non_empty = 0
-            
-            # 收集所有有效的行（非空的爬取名称且未处理过的）
-            for row_num in range(2, self.worksheet.max_row + 1):
-                movie_name = self.worksheet.cell(row=row_num, column=self.crawl_name_col).value
-                if movie_name and str(movie_name).strip():
-                    total_non_empty += 1
-                    # 检查校验状态列是否为空（第二列是校验状态）
-                    validation_status = self.worksheet.cell(row=row_num, column=self.crawl_data_start_col + 1).value
-                    
-                    # 如果校验状态为空、None或warn，则认为未处理，加入待爬取列表
-                    if (validation_status is None or 
-                        str(validation_status).strip() == "" or 
-                        str(validation_status).strip() == "warn"):
-                        valid_rows.append(row_num)
-                    else:
-                        skipped_count += 1
-                        logging.info(f"跳过已处理行 {row_num}: {movie_name} (状态: {validation_status})")
+            # 待处理行索引在加载工作表时建立（load_sheet_data），续爬时无需重新扫描整张表；
+            # 爬取开始后工作表只由写入线程访问
+            valid_rows = list(self.pending_rows)
+            total_non_empty = self.total_rows
+            skipped_count = total_non_empty - len(valid_rows)
             
             if not valid_rows:
                 if skipped_count > 0:
@@ -1592,103 +2155,114 @@ class DoubanCrawlerApp:
                     self.progress_queue.put(("complete", "没有需要处理的数据！"))
                 return
             
+            logging.info(f"待处理 {len(valid_rows)} 行，跳过已处理 {skipped_count} 行")
             self.progress_queue.put(("status", f"总数据:{total_non_empty}条，跳过已处理:{skipped_count}条，待处理:{len(valid_rows)}条"))
             
-            for i, row_num in enumerate(valid_rows):
-                # 检查停止状态
-                if self.stop_crawling:
-                    self.workbook.save(self.file_path_var.get())
-                    self.progress_queue.put(("complete", f"已停止爬取并保存进度！已处理 {processed_count} 条数据"))
-                    return
+            self.excel_writer = WorkbookWriter(
+                self.workbook, self.file_path_var.get(), self.apply_crawl_row,
+                checkpoint_interval=self.checkpoint_interval,
+                notify=lambda text: self.progress_queue.put(("status", text))).start()
+            finished_rows = set()
+            try:
+                processed_count = asyncio.run(self.crawl_rows_async(valid_rows, finished_rows))
+            finally:
+                # 写完剩余结果并最终保存（出错时也保存已写入的进度）
+                self.excel_writer.close()
+                # 更新待处理行索引：已得到结果的行移出，warn 和未爬取的行保留
+                self.pending_rows = [job for job in valid_rows if job[0] not in finished_rows]
+            
+            if self.stop_crawling:
+                self.progress_queue.put(("complete", f"已停止爬取并保存进度！已处理 {processed_count} 条数据"))
+                return
+            
+            self.progress_queue.put(("complete", f"爬取完成！共处理 {processed_count} 条数据"))
+            
+        except Exception as e:
+            self.progress_queue.put(("error", f"爬取过程中出错: {str(e)}"))
+        finally:
+            self.is_crawling = False
+    
+    async def crawl_rows_async(self, valid_rows, finished_rows):
+        """异步爬取调度，valid_rows 为 (行号, 爬取名称, 缓存URL) 列表，返回处理的行数；
+        校验状态不再是待处理（非warn）的行号加入 finished_rows
+
+        同时处理 max_concurrent_titles 个标题（请求和解析在线程池中进行），请求节奏统一由
+        爬虫的全局请求配额控制：标题N+1的搜索请求与标题N的详情页解析、写表重叠进行，
+        等待配额的时间不再是整个流程的空转
+        """
+        crawler = self.active_crawler
+        loop = asyncio.get_running_loop()
+        concurrency = max(1, crawler.max_concurrent_titles)
+        slots = asyncio.Semaphore(concurrency)
+        progress = {"processed": 0}
+        
+        async def crawl_one(row_num, movie_name, cached_url):
+            try:
+                result, message = await loop.run_in_executor(
+                    executor, crawler.crawl_movie_info_with_anti_crawler_detection, movie_name, cached_url)
+            except CrawlInterrupted:
+                return  # 停止爬取，该行保持未处理
+            finally:
+                slots.release()
+            
+            # 结果交给写入线程，这里不等待写表和保存
+            status = self.write_crawl_result(crawler, row_num, movie_name, result, message)
+            if not self.is_pending_status(status):
+                finished_rows.add(row_num)
+            progress["processed"] += 1
+            self.progress_queue.put(("progress", progress["processed"] / len(valid_rows) * 100))
+        
+        tasks = []
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for i, (row_num, movie_name, cached_url) in enumerate(valid_rows):
+                await slots.acquire()
                 
                 # 检查暂停状态
-                self.pause_event.wait()
+                if not self.pause_event.is_set():
+                    await loop.run_in_executor(None, self.pause_event.wait)
                 
-                if not self.is_crawling:
+                if self.stop_crawling or not self.is_crawling:
+                    slots.release()
                     break
                 
-                # 获取爬取名称
-                movie_name = self.worksheet.cell(row=row_num, column=self.crawl_name_col).value
-                movie_name = str(movie_name).strip()
-                
-                # 更新状态
                 self.progress_queue.put(("current", f"正在处理: {movie_name} ({i+1}/{len(valid_rows)})"))
-                
-                # 检查是否有缓存URL
-                cached_url = None
-                cache_col = self.crawl_data_start_col + len(COLUMN_HEADERS) - 1  # 缓存URL列
-                cached_url_cell = self.worksheet.cell(row=row_num, column=cache_col).value
-                if cached_url_cell and str(cached_url_cell).strip():
-                    cached_url = str(cached_url_cell).strip()
+                if cached_url:
                     self.progress_queue.put(("status", f"检测到缓存URL，跳过搜索步骤: {movie_name}"))
                 
-                # 爬取数据，使用新的反爬检测方法和缓存支持
-                result, message = self.crawler.crawl_movie_info_with_anti_crawler_detection(movie_name, cached_url)
-                
-                # 更新爬虫状态显示
-                status_info = self.crawler.get_crawler_status()
-                status_text = (f"延迟:{status_info['delay']:.1f}s | "
-                             f"成功率:{status_info['success_rate']} | "
-                             f"连续失败:{status_info['consecutive_fails']} | "
-                             f"会话:{status_info['session_age']}")
-                self.progress_queue.put(("crawler_status", status_text))
-                
-                if result:
-                    # 写入数据到Excel（从爬取数据开始列写入）
-                    for col_offset, value in enumerate(result):
-                        col_num = self.crawl_data_start_col + col_offset
-                        self.worksheet.cell(row=row_num, column=col_num, value=value)
-                    
-                    # 设置样式
-                    self.set_row_style_crawl_data(row_num, result[1])  # result[1]是校验状态
-                    
-                    # 更新UI预览（显示完整的爬取结果）
-                    self.progress_queue.put(("row_update", (row_num, result)))
-                else:
-                    # 爬取失败，根据失败原因设置状态
-                    fault_col = self.crawl_data_start_col + 1  # 校验状态列
-                    self.worksheet.cell(row=row_num, column=self.crawl_data_start_col, value=movie_name)
-                    
-                    # 根据失败原因设置不同状态
-                    if "反爬" in message:
-                        status = "warn"
-                        self.worksheet.cell(row=row_num, column=fault_col, value="warn")
-                        self.set_row_style_crawl_data(row_num, "warn")
-                        # 创建警告的结果数组
-                        fault_result = [movie_name, "warn"] + [""] * (len(COLUMN_HEADERS) - 2)
-                    else:
-                        status = "fault"
-                        self.worksheet.cell(row=row_num, column=fault_col, value="fault")
-                        self.set_row_style_crawl_data(row_num, "fault")
-                        # 创建失败的结果数组
-                        fault_result = [movie_name, "fault"] + [""] * (len(COLUMN_HEADERS) - 2)
-                    
-                    self.progress_queue.put(("row_update", (row_num, fault_result)))
-                
-                processed_count += 1
-                
-                # 更新进度
-                current_progress = (processed_count / len(valid_rows)) * 100
-                self.progress_queue.put(("progress", current_progress))
-                
-                save_counter += 1
-                
-                # 每5个保存一次
-                if save_counter >= 5:
-                    self.workbook.save(self.file_path_var.get())
-                    save_counter = 0
-                    self.progress_queue.put(("status", f"已保存进度... 正在处理: {movie_name} ({i+1}/{len(valid_rows)})"))
-                
-                # 智能延迟已在爬虫内部处理，这里不再额外延迟
-            
-            # 最终保存
-            self.workbook.save(self.file_path_var.get())
-            self.progress_queue.put(("complete", f"爬取完成！共处理 {processed_count} 条数据"))
+                tasks.append(asyncio.ensure_future(crawl_one(row_num, movie_name, cached_url)))
             
-        except Exception as e:
-            self.progress_queue.put(("error", f"爬取过程中出错: {str(e)}"))
-        finally:
-            self.is_crawling = False
+            if tasks:
+                await asyncio.gather(*tasks)
+        return progress["processed"]
+    
+    def write_crawl_result(self, crawler, row_num, movie_name, result, message):
+        """把一行的爬取结果（或失败状态）提交给写入线程并刷新预览，返回写入的校验状态"""
+        # 更新爬虫状态显示
+        status_info = crawler.get_crawler_status()
+        status_text = (f"延迟:{status_info['delay']:.1f}s | "
+                     f"成功率:{status_info['success_rate']} | "
+                     f"连续失败:{status_info['consecutive_fails']} | "
+                     f"会话:{status_info['session_age']}")
+        self.progress_queue.put(("crawler_status", status_text))
+        
+        if result:
+            values, status = result, result[1]  # result[1]是校验状态
+        else:
+            # 爬取失败只写爬取名称和校验状态："反爬"记为warn（下次继续爬取），其余记为fault
+            status = "warn" if "反爬" in message else "fault"
+            values = [movie_name, status]
+            result = values + [""] * (len(COLUMN_HEADERS) - 2)
+        self.excel_writer.put_row(row_num, values, status)
+        
+        # 更新UI预览（显示完整的爬取结果）
+        self.progress_queue.put(("row_update", (row_num, result)))
+        return status
+    
+    def apply_crawl_row(self, row_num, values, status):
+        """写入一行爬取数据（从爬取数据开始列写入）并设置样式，在写入线程中调用"""
+        for col_offset, value in enumerate(values):
+            self.worksheet.cell(row=row_num, column=self.crawl_data_start_col + col_offset, value=value)
+        self.set_row_style_crawl_data(row_num, status)
     
     def set_row_style_crawl_data(self, row_num, validation_status):
         """设置爬取数据区域的Excel行样式"""
@@ -1837,9 +2411,13 @@ class DoubanCrawlerApp:
     
     def show_config(self):
         """显示高级设置对话框"""
+        if self.is_crawling:
+            messagebox.showwarning("警告", "爬虫正在运行中，请停止后再修改设置")
+            return
+        
         config_window = tk.Toplevel(self.root)
         config_window.title("爬虫高级设置")
-        config_window.geometry("500x600")
+        config_window.geometry("500x700")
         config_window.resizable(False, False)
         config_window.grab_set()  # 模态对话框
         
@@ -1914,9 +2492,26 @@ class DoubanCrawlerApp:
                                 values=['DEBUG', 'INFO', 'WARNING', 'ERROR'], state="readonly")
         log_combo.grid(row=9, column=1, sticky=tk.W, pady=(10, 5))
         
+        # 本地条目库有效期设置
+        ttk.Label(frame, text="本地库有效期 (天):").grid(row=10, column=0, sticky=tk.W, pady=(5, 5))
+        store_age_var = tk.IntVar(value=self.crawler.store_max_age_days)
+        store_age_spin = ttk.Spinbox(frame, from_=0, to=3650, textvariable=store_age_var, width=10)
+        store_age_spin.grid(row=10, column=1, sticky=tk.W, pady=(5, 5))
+        
+        # 全局请求配额设置
+        ttk.Label(frame, text="每分钟请求数:").grid(row=11, column=0, sticky=tk.W, pady=(5, 5))
+        rate_var = tk.IntVar(value=self.crawler.requests_per_minute)
+        rate_spin = ttk.Spinbox(frame, from_=1, to=60, textvariable=rate_var, width=10)
+        rate_spin.grid(row=11, column=1, sticky=tk.W, pady=(5, 5))
+        
+        ttk.Label(frame, text="同时处理标题数:").grid(row=12, column=0, sticky=tk.W, pady=(5, 5))
+        concurrent_var = tk.IntVar(value=self.crawler.max_concurrent_titles)
+        concurrent_spin = ttk.Spinbox(frame, from_=1, to=4, textvariable=concurrent_var, width=10)
+        concurrent_spin.grid(row=12, column=1, sticky=tk.W, pady=(5, 5))
+        
         # 说明文本
         info_text = tk.Text(frame, height=10, width=50, wrap=tk.WORD)
-        info_text.grid(row=10, column=0, columnspan=2, pady=(10, 10))
+        info_text.grid(row=13, column=0, columnspan=2, pady=(10, 10))
         info_text.insert('1.0', """反反爬设置说明：
 
 【爬虫模式】
@@ -1933,12 +2528,22 @@ class DoubanCrawlerApp:
 • 最大延迟：触发反爬后的最大等待时间
 • 紧急延迟：连续失败过多时的保护延迟
 
+【请求配额】
+• 每分钟请求数：所有请求共用的速率上限，请求间隔随机浮动
+• 同时处理标题数：等待配额时并行进行其它标题的解析和写表
+• 失败、反爬时的等待会整体推后后续请求
+
 【快速反爬模式 ⭐新功能】
 • 启用后，第一次检测到反爬立即处理，无需5次重试
 • 大幅减少爬取时间，提高效率
 • 处理反爬后使用快速延迟模式（3-6秒）
 • 建议启用，可显著提升爬取速度
 
+【本地条目库】
+• 爬取过的条目保存在 douban_subjects.db（解析结果+压缩的详情页）
+• 有效期内再次爬取同一名称或缓存URL时直接使用本地数据，不请求豆瓣
+• 有效期设为 0 则每次都重新爬取（仍会更新本地库）
+
 【Selenium优势】
 - 真实浏览器环境，难以被检测
 - 支持JavaScript渲染
@@ -1950,9 +2555,13 @@ class DoubanCrawlerApp:
         
         # 按钮框架
         btn_frame = ttk.Frame(frame)
-        btn_frame.grid(row=11, column=0, columnspan=2, pady=(10, 0))
+        btn_frame.grid(row=14, column=0, columnspan=2, pady=(10, 0))
         
         def apply_config():
+            if self.is_crawling:
+                messagebox.showwarning("警告", "爬虫正在运行中，请停止后再修改设置")
+                return
+            
             # 保存基础设置
             self.crawler.base_delay = delay_var.get()
             self.crawler.max_delay = max_delay_var.get()
@@ -1991,6 +2600,11 @@ class DoubanCrawlerApp:
             self.crawler.use_proxy = use_proxy
             self.crawler.proxy_list = proxy_list
             self.crawler.quick_anti_crawler_mode = quick_mode_var.get()
+            self.crawler.store_max_age_days = store_age_var.get()
+            self.crawler.set_request_rate(rate_var.get())
+            if self.crawler.max_concurrent_titles != concurrent_var.get():
+                self.crawler.max_concurrent_titles = max(1, concurrent_var.get())
+                self.crawler._rebuild_session()  # 连接池大小与同时处理的标题数一致
             
             # 设置日志级别
             level = getattr(logging, log_level_var.get())